@@ -4,15 +4,20 @@ from flask_login import LoginManager, login_user, login_required, current_user,
 from models.users import User, db
 from models.transactions import Transaction
 from models.budget_recurring import Budget, RecurringTransaction
+from models.rollups import SpendingRollup, CategorySpend
+from models.email_jobs import EmailJob
+from models.idempotency import IdempotencyKey
 from routes.user_routes import user_bp, user_routes
 from routes.transaction_routes import transaction_bp
+from jinja2 import FileSystemBytecodeCache
+import config
 import logging
+import os
 
-def create_app():
+def create_app(config_overrides=None):
     app = Flask(__name__)
     
     # Configure the app
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///site.db'
     app.config['SECRET_KEY'] = 'your_secret_key'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
@@ -22,23 +27,82 @@ def create_app():
     app.config['SESSION_COOKIE_HTTPONLY'] = True  # Prevent JavaScript from accessing session cookie
     app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'  # CSRF protection
     app.config['SESSION_REFRESH_EACH_REQUEST'] = True  # Refresh session on each request
+
+    # e.g. a temporary database and sheets root for benchmarks
+    if config_overrides:
+        app.config.update(config_overrides)
     
-    # Initialize the SQLAlchemy instance with the app
-    db.init_app(app)
+    # Initialize the SQLAlchemy instance from DATABASE_URL and the DB_*/SQLITE_* settings
+    from services.db_engine import db_engine
+    db_engine.init_app(app)
+
+    # Per-request timing and SQL counters, exposed on /metrics
+    from services.metrics import metrics
+    metrics.init_app(app)
+
+    # Absolute, lock-protected sheet storage under SHEETS_ROOT
+    from services.sheet_storage import sheet_storage
+    sheet_storage.init_app(app)
+
+    # Excel mirroring happens in the background, after the DB commit
+    from services.excel_queue import excel_queue
+    excel_queue.init_app(app)
     
-    with app.app_context():
-        db.create_all()  # This line creates the database tables
+    # The schema is created by `python upgrade_db.py` / `flask init-db`, not on every boot
+    app.config.setdefault('SCHEMA_AUTO_CREATE', config.SCHEMA_AUTO_CREATE)
+    if app.config['SCHEMA_AUTO_CREATE']:
+        from upgrade_db import upgrade_schema
+        with app.app_context():
+            upgrade_schema(verbose=False)
+
+    # Compiled templates are cached on disk, so a fresh worker loads bytecode instead of recompiling
+    app.config.setdefault('JINJA_CACHE_DIR', config.JINJA_CACHE_DIR or os.path.join(app.instance_path, 'jinja_cache'))
+    os.makedirs(app.config['JINJA_CACHE_DIR'], exist_ok=True)
+    app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(app.config['JINJA_CACHE_DIR'])}
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create missing tables and indexes, and precompile the templates"""
+        from upgrade_db import upgrade_schema, precompile_templates
+        upgrade_schema()
+        db_engine.optimize(analyze=True)
+        print(f"Precompiled {precompile_templates(app)} templates")
+
+    # Outbound mail is sent by a worker pool from the email_jobs table
+    from services.email_queue import email_queue
+    email_queue.init_app(app)
+
+    # Per-user cache for the dashboard, /spendings and /budgets views
+    from services.cache import result_cache
+    result_cache.init_app(app)
+
+    # Recurring transactions are materialised by a background sweep, not on page views
+    from services.recurring_scheduler import recurring_scheduler
+    recurring_scheduler.init_app(app)
+
+    # Password hashing runs on a bounded pool so logins can't take every core
+    from services.password_hasher import password_hasher
+    password_hasher.init_app(app)
+
+    # Users are loaded on every authenticated request, so they're served from a short-lived cache
+    from services.user_cache import user_cache
+    user_cache.init_app(app)
+
+    # Quick-card taps and form posts share commits and are deduplicated by idempotency key
+    from services.group_commit import group_writer
+    group_writer.init_app(app)
 
     login_manager = LoginManager()
     login_manager.init_app(app)
 
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return user_cache.load(int(user_id))
 
     from routes.transaction_routes import transaction_bp
     from routes.budget_routes import budget_bp
     from routes.quick_routes import quick_bp
+    from routes.ops_routes import ops_bp
 
     # Register blueprints
     app.register_blueprint(user_bp)
@@ -46,6 +110,7 @@ def create_app():
     app.register_blueprint(transaction_bp)
     app.register_blueprint(budget_bp)
     app.register_blueprint(quick_bp)
+    app.register_blueprint(ops_bp)
 
     # Home Tab
     @app.route('/', methods=['GET'])
@@ -57,39 +122,25 @@ def create_app():
     def dashboard():
         from models.transactions import Transaction
         from services.transaction_services import TransactionServices
+        from services.rollup_service import RollupService
+        from services.cache import result_cache
         from datetime import datetime
-        from sqlalchemy import func
-        
-        # Process recurring transactions (with error handling)
-        try:
-            TransactionServices.process_recurring_transactions(current_user.id)
-        except AttributeError:
-            # Method not available yet, skip recurring transaction processing
-            logging.warning("process_recurring_transactions method not available")
-        except Exception as e:
-            logging.error(f"Error processing recurring transactions: {e}")
         
         now = datetime.now()
         month_num = now.month
         year_num = now.year
+        cache_key = (current_user.id, 'dashboard', now.date().isoformat())
+        
+        # Repeat views are served from the cache until a write invalidates them
+        hit, summary = result_cache.get(cache_key)
+        if hit:
+            return render_template('dashboard.html', user=current_user, summary=summary)
         
         # Calculate summary statistics for the current month
         try:
-            # Total spending
-            total_spent = db.session.query(func.sum(Transaction.amount)).filter(
-                Transaction.user_id == current_user.id,
-                db.extract('month', Transaction.date) == month_num,
-                db.extract('year', Transaction.date) == year_num
-            ).scalar() or 0
-            
-            # Category breakdown (for charts)
-            category_data = db.session.query(
-                Transaction.category, func.sum(Transaction.amount)
-            ).filter(
-                Transaction.user_id == current_user.id,
-                db.extract('month', Transaction.date) == month_num,
-                db.extract('year', Transaction.date) == year_num
-            ).group_by(Transaction.category).all()
+            # Total spending and category breakdown (for charts) come from the rollup
+            total_spent = RollupService.month_total(current_user.id, year_num, month_num)
+            category_data = RollupService.category_totals(current_user.id, year_num, month_num)
             
             category_labels = [c[0] for c in category_data]
             category_values = [float(c[1]) for c in category_data]
@@ -113,6 +164,9 @@ def create_app():
                 'recent_transactions': [tx.to_dict() for tx in recent_transactions],
                 'analytics': analytics
             }
+            # An empty analytics dict means it failed; don't pin that for the TTL
+            if analytics:
+                result_cache.set(cache_key, summary)
         except Exception as e:
             print(f"Error gathering summary data: {e}")
             summary = {
@@ -129,26 +183,25 @@ def create_app():
     @app.route('/login', methods=['GET', 'POST'])
     def login():
         if request.method == 'POST':
+            from services.user_services import UserService
+            from services.password_hasher import HasherBusy
             user_name = request.form['username']
             password = request.form['password']
-            user = User.get_by_user_name(user_name)
-            
-            print(f"Login attempt: {user_name}")  # Debug statement
+
+            try:
+                user = UserService.authenticate(user_name, password)
+            except HasherBusy:
+                flash('Too many sign-ins right now, please try again in a moment.', 'danger')
+                return render_template('login.html', form=LoginForm()), 503
             if user:
-                print(f"User found: {user.user_name}")  # Debug statement
-                if user.check_password(password):
-                    print("Password check passed")  # Debug statement
-                    login_user(user)
-                    flash('Login successful', 'success')
-                    return redirect(url_for('dashboard'))
-                else:
-                    print("Password check failed")  # Debug statement
-            else:
-                print("User not found")  # Debug statement
-            
+                login_user(user)
+                flash('Login successful', 'success')
+                return redirect(url_for('dashboard'))
+            logging.debug("Login failed: invalid username or password")
+
             flash('Invalid username or password', 'danger')
         
-        return render_template('login.html')
+        return render_template('login.html', form=LoginForm())
 
     @app.route('/login_status')
     def login_status():
@@ -164,6 +217,7 @@ def create_app():
     return app
 
 if __name__ == '__main__':
-    app = create_app()
+    # The serving process runs the background workers; scripts that only build the app don't
+    app = create_app({'EMAIL_QUEUE_AUTOSTART': True, 'RECURRING_SCHEDULER_ENABLED': True})
     app.run(debug=True)
     # app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,163 @@
+"""Micro-benchmarks of the analytics code as the dataset grows.
+
+For each dataset size, a fresh temporary database is filled by
+``generate_dataset.generate`` and every analytics function and aggregate
+query is timed for one user (median of ``--repeat`` runs). The fitted
+log-log slope per function shows how it scales with the user's row count:
+about 0 is constant time (rollup lookups), about 1 is linear. Results are
+written as JSON, and as a PNG chart with ``--plot`` if matplotlib is
+installed.
+
+    python benchmarks/analytics_scaling.py --sizes 10000 100000 1000000 --users 10
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import func
+from models.users import db
+from models.transactions import Transaction
+from models.get_dates import get_month_range
+from services.rollup_service import RollupService
+from services.transaction_services import TransactionServices
+from generate_dataset import generate
+from load_test import temporary_app, git_commit, RESULTS_DIR
+
+
+def benchmarks(user_id, client):
+    """name -> zero-argument callable"""
+    today = date.today()
+    month, year = today.month, today.year
+    start, end = get_month_range(year, month)
+
+    return {
+        '_detect_anomalies': lambda: TransactionServices._detect_anomalies(user_id, month, year),
+        '_calculate_monthly_trend': lambda: TransactionServices._calculate_monthly_trend(user_id, year),
+        '_calculate_savings_rate': lambda: TransactionServices._calculate_savings_rate(user_id, month, year),
+        '_calculate_category_growth': lambda: TransactionServices._calculate_category_growth(user_id),
+        'get_analytics_data': lambda: TransactionServices.get_analytics_data(user_id),
+        '_legacy_analytics_data': lambda: TransactionServices._legacy_analytics_data(user_id),
+        'spendings insights (/spendings)': lambda: client.post('/spendings', data={
+            'month': today.strftime('%B'), 'year': str(year)}),
+        'sql: month total': lambda: db.session.query(func.sum(Transaction.amount)).filter(
+            Transaction.user_id == user_id, Transaction.in_period(start, end)).scalar(),
+        'sql: category totals': lambda: db.session.query(Transaction.category, func.sum(Transaction.amount)).filter(
+            Transaction.user_id == user_id, Transaction.in_period(start, end)).group_by(Transaction.category).all(),
+        'sql: full history scan': lambda: db.session.query(Transaction.date, Transaction.amount).filter(
+            Transaction.user_id == user_id).all(),
+        'rollup: month total': lambda: RollupService.month_total(user_id, year, month),
+        'rollup: category totals': lambda: RollupService.category_totals(user_id, year, month),
+    }
+
+
+def time_call(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        db.session.expire_all()
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def slope(points):
+    """Least-squares slope of log(ms) against log(rows)"""
+    points = [(math.log(x), math.log(y)) for x, y in points if x > 0 and y > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    denominator = sum((x - mean_x) ** 2 for x, _ in points)
+    if not denominator:
+        return None
+    return round(sum((x - mean_x) * (y - mean_y) for x, y in points) / denominator, 2)
+
+
+def run(sizes, users, months, repeat):
+    curves = {}
+    for size in sizes:
+        with temporary_app() as app:
+            with app.app_context():
+                db.create_all()
+                started = time.perf_counter()
+                user_ids, written = generate(size, users=users, months=months)
+                generate_seconds = time.perf_counter() - started
+                user_id = user_ids[0]
+                user_rows = Transaction.query.filter_by(user_id=user_id).count()
+
+            client = app.test_client()
+            client.post('/login', data={'username': 'gen_0', 'password': 'benchmark'})
+            # Keep the result cache out of the measurement
+            app.config['RESULT_CACHE_TTL'] = 0
+            from services.cache import result_cache
+            result_cache.ttl = 0
+
+            with app.app_context():
+                print(f"\n{written} rows ({user_rows} for the measured user), generated in {generate_seconds:.1f}s")
+                for name, fn in benchmarks(user_id, client).items():
+                    fn()  # warm up
+                    ms = time_call(fn, repeat)
+                    curves.setdefault(name, []).append({'rows': written, 'user_rows': user_rows, 'ms': round(ms, 3)})
+                    print(f"  {name:38s} {ms:10.2f} ms")
+
+    summary = {name: slope([(p['user_rows'], p['ms']) for p in points]) for name, points in curves.items()}
+    print(f"\n{'function':40s} {'log-log slope':>14s}")
+    for name, value in summary.items():
+        print(f"{name:40s} {value if value is not None else '-':>14}")
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'params': {'sizes': sizes, 'users': users, 'months': months, 'repeat': repeat},
+        'curves': curves,
+        'slopes': summary,
+    }
+
+
+def plot(result, path):
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib is not installed; skipping the chart")
+        return
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for name, points in result['curves'].items():
+        ax.plot([p['user_rows'] for p in points], [p['ms'] for p in points], marker='o', label=name)
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+    ax.set_xlabel("transactions of the measured user")
+    ax.set_ylabel("median ms")
+    ax.legend(fontsize=7)
+    fig.tight_layout()
+    fig.savefig(path)
+    print(f"Chart written to {path}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 30000, 100000, 300000])
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--plot', action='store_true', help="Also write a PNG of the scaling curves")
+    parser.add_argument('--output', help="Result file (default: benchmarks/results/analytics-<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    result = run(sorted(args.sizes), args.users, args.months, args.repeat)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"analytics-{result['commit'] or 'nogit'}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"\nResults written to {output}")
+    if args.plot:
+        plot(result, os.path.splitext(output)[0] + '.png')
@@ -0,0 +1,105 @@
+"""Bulk ingestion throughput: POST /api/transactions/bulk against one-at-a-time posts.
+
+Boots a throwaway app (see ``load_test.temporary_app``) with one seeded user,
+then for each ``--sizes`` value posts that many transactions, spread over the
+last ``--months`` months, in a single bulk request. As a baseline it posts
+``--single`` transactions one by one through /map_transaction. Both are timed
+until the Excel write-behind queue has drained, so the sheet work is counted.
+Reports rows/s, request time and the SQL statements each approach ran.
+
+    python benchmarks/bulk_ingest_benchmark.py --sizes 1000 5000 10000 --single 200
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from seed import seed_users, CATEGORIES
+from load_test import temporary_app, git_commit, RESULTS_DIR, SQLCounter
+from models.users import db
+
+CATEGORY_NAMES = list(CATEGORIES)
+
+
+def entries(count, months, offset=0):
+    today = date.today()
+    days = max(1, months * 30)
+    return [{
+        'date': (today - timedelta(days=(offset + i) % days)).isoformat(),
+        'title': f"Imported {offset + i}",
+        'amount': round(10 + (offset + i) % 500 * 1.37, 2),
+        'category': CATEGORY_NAMES[(offset + i) % len(CATEGORY_NAMES)],
+        'payment_method': 'Card',
+    } for i in range(count)]
+
+
+def timed(app, counter, fn):
+    excel_queue = app.extensions['excel_queue']
+    counter.reset()
+    started = time.perf_counter()
+    fn()
+    requested = time.perf_counter()
+    excel_queue.flush()
+    return requested - started, time.perf_counter() - started, counter.read()[0]
+
+
+def run(sizes, single, months):
+    results = {}
+    with temporary_app() as app:
+        with app.app_context():
+            _, user_name, password = seed_users(1, months=1, per_day=1)[0]
+            counter = SQLCounter(db.engine)
+        client = app.test_client()
+        client.post('/login', data={'username': user_name, 'password': password})
+
+        def one_by_one():
+            for entry in entries(single, months=1):
+                client.post('/map_transaction', data=entry)
+
+        request_s, total_s, statements = timed(app, counter, one_by_one)
+        results['single'] = {'rows': single, 'request_ms': round(request_s * 1000, 1),
+                             'total_ms': round(total_s * 1000, 1), 'rows_per_second': round(single / total_s, 1),
+                             'sql_per_row': round(statements / single, 1)}
+
+        offset = 0
+        for size in sizes:
+            batch = entries(size, months, offset)
+            offset += size
+            statuses = []
+            request_s, total_s, statements = timed(
+                app, counter, lambda: statuses.append(client.post('/api/transactions/bulk', json=batch).status_code))
+            results[f'bulk {size}'] = {'rows': size, 'status': statuses[0], 'request_ms': round(request_s * 1000, 1),
+                                       'total_ms': round(total_s * 1000, 1), 'rows_per_second': round(size / total_s, 1),
+                                       'sql_statements': statements}
+
+    for name, result in results.items():
+        print(f"{name:12s} {result['rows']:6d} rows  request {result['request_ms']:9.1f} ms  "
+              f"with sheets {result['total_ms']:9.1f} ms  {result['rows_per_second']:9.1f} rows/s")
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'params': {'sizes': sizes, 'single': single, 'months': months},
+        'scenarios': results,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 10000])
+    parser.add_argument('--single', type=int, default=200, help="Rows posted one at a time for the baseline")
+    parser.add_argument('--months', type=int, default=3, help="Months the bulk rows are spread over")
+    parser.add_argument('--output', help="Result file (default: benchmarks/results/bulk-<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    result = run(args.sizes, args.single, args.months)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"bulk-{result['commit'] or 'nogit'}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"\nResults written to {output}")
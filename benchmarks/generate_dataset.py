@@ -0,0 +1,175 @@
+"""Bulk synthetic dataset generator: 10k to 10M transactions.
+
+Rows are spread over ``--users`` users and ``--months`` of history ending
+today. Daily volume follows a yearly seasonality curve and a weekend bump,
+amounts are skewed within each category's range (see ``seed.CATEGORIES``),
+and every user also gets monthly recurring payments (rent, subscriptions)
+on fixed days. Each user's columns are generated with NumPy, sliced into
+chunks and written with Core executemany, then the spending rollup is
+rebuilt once.
+
+    python benchmarks/generate_dataset.py --rows 1000000 --users 50 --database sqlite:////tmp/big.db
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from sqlalchemy import insert
+from services.password_hasher import password_hasher
+from models.users import User, db
+from models.transactions import Transaction
+from services.rollup_service import RollupService
+from seed import CATEGORIES, CATEGORY_WEIGHTS, PAYMENT_METHODS, TITLES
+
+# (title, category, sub_category, amount, day_of_month) logged every month for every user
+RECURRING = [
+    ("Monthly rent", "Rent", "House Rent", 12000.0, 1),
+    ("Netflix", "Entertainment", "Movie/OTT Subscription", 649.0, 5),
+    ("Wifi bill", "Bills", "Wifi Bill", 799.0, 12),
+    ("SIP", "Investments", "SIP", 5000.0, 10),
+]
+
+
+def create_users(count, password='benchmark', prefix='gen'):
+    """Insert ``count`` users in one statement (one password hash shared by all). Returns their ids."""
+    password_hash = password_hasher.hash(password)
+    rows = [{
+        'first_name': 'Gen', 'last_name': str(n), 'user_name': f'{prefix}_{n}',
+        'password': password_hash, 'email_id': f'{prefix}_{n}@example.com', 'all_sheets': {}
+    } for n in range(count)]
+    db.session.execute(insert(User), rows)
+    db.session.commit()
+    return [user_id for (user_id,) in db.session.query(User.id).filter(User.user_name.like(f'{prefix}\\_%', escape='\\')).order_by(User.id)]
+
+
+def daily_weights(start, end, seasonality):
+    """Every day in [start, end] (as an object array of dates) and its relative transaction volume"""
+    days = np.array([date.fromordinal(o) for o in range(start.toordinal(), end.toordinal() + 1)], dtype=object)
+    months = np.array([d.month for d in days])
+    weekend = np.array([d.weekday() >= 5 for d in days])
+    # Peaks around October-December (festive season), trough mid-year
+    season = 1 + seasonality * np.cos(2 * np.pi * (months - 11) / 12)
+    return days, season * np.where(weekend, 1.3, 1.0)
+
+
+def user_rows(user_id, days, weights, rows_per_user, rng):
+    """Column arrays for one user's organic (non-recurring) transactions"""
+    counts = rng.poisson(weights / weights.sum() * rows_per_user)
+    tx_days = np.repeat(days, counts)
+    n = len(tx_days)
+
+    categories = list(CATEGORIES)
+    p = np.array(CATEGORY_WEIGHTS, dtype=float)
+    cat_idx = rng.choice(len(categories), size=n, p=p / p.sum())
+    skew = rng.beta(1.5, 6, size=n)
+
+    titles = np.empty(n, dtype=object)
+    subs = np.empty(n, dtype=object)
+    amounts = np.empty(n)
+    for i, category in enumerate(categories):
+        mask = cat_idx == i
+        k = int(mask.sum())
+        if not k:
+            continue
+        sub_categories, low, high = CATEGORIES[category]
+        titles[mask] = np.array(TITLES[category], dtype=object)[rng.integers(0, len(TITLES[category]), k)]
+        subs[mask] = np.array(sub_categories, dtype=object)[rng.integers(0, len(sub_categories), k)]
+        amounts[mask] = np.round(low + (high - low) * skew[mask], 2)
+
+    methods = np.array(PAYMENT_METHODS, dtype=object)[rng.integers(0, len(PAYMENT_METHODS), n)]
+    category_names = np.array(categories, dtype=object)[cat_idx]
+    return tx_days, titles, amounts, category_names, subs, methods
+
+
+def recurring_rows(user_id, start, end, now):
+    rows = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        for title, category, sub_category, amount, day in RECURRING:
+            scheduled = date(year, month, day)
+            if start <= scheduled <= end:
+                rows.append({'user_id': user_id, 'date': scheduled, 'title': f"[Recurring] {title}",
+                             'amount': amount, 'category': category, 'sub_category': sub_category,
+                             'payment_method': 'UPI', 'created_at': now})
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return rows
+
+
+def generate(rows, users=10, months=24, seasonality=0.25, recurring=True, seed=7, chunk_size=50000, prefix='gen'):
+    """Generate about ``rows`` transactions. Returns ``(user_ids, rows_written)``."""
+    rng = np.random.default_rng(seed)
+    end = date.today()
+    start = (end.replace(day=1) - timedelta(days=31 * (months - 1))).replace(day=1)
+    days, weights = daily_weights(start, end, seasonality)
+    # One timestamp for every row, organic and recurring
+    now = datetime.utcnow()
+
+    user_ids = create_users(users, prefix=prefix)
+    per_user = rows / users
+    if recurring:
+        per_user = max(0, per_user - len(recurring_rows(0, start, end, now)))
+
+    written = 0
+    batch = []
+
+    def flush():
+        nonlocal written, batch
+        db.session.execute(insert(Transaction), batch)
+        db.session.commit()
+        written += len(batch)
+        batch = []
+
+    for user_id in user_ids:
+        if recurring:
+            batch.extend(recurring_rows(user_id, start, end, now))
+        columns = user_rows(user_id, days, weights, per_user, rng)
+        offset, total = 0, len(columns[0])
+        while offset < total:
+            if len(batch) >= chunk_size:
+                flush()
+            # Fill the batch from slices of the column arrays; tolist() turns NumPy scalars into Python values
+            stop = min(total, offset + chunk_size - len(batch))
+            tx_days, titles, amounts, categories, subs, methods = (column[offset:stop].tolist() for column in columns)
+            batch.extend({'user_id': user_id, 'date': tx_date, 'title': title, 'amount': amount,
+                          'category': category, 'sub_category': sub, 'payment_method': method, 'created_at': now}
+                         for tx_date, title, amount, category, sub, method
+                         in zip(tx_days, titles, amounts, categories, subs, methods))
+            offset = stop
+    if batch:
+        flush()
+
+    RollupService.rebuild()
+    return user_ids, written
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000, help="Approximate number of transactions (10k - 10M)")
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--seasonality', type=float, default=0.25, help="Amplitude of the yearly volume curve (0 = flat)")
+    parser.add_argument('--no-recurring', action='store_true')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--prefix', default='gen', help="Username prefix, so several datasets can share a database")
+    parser.add_argument('--database', help="Target database URL (default: the app's site.db)")
+    args = parser.parse_args()
+
+    from app import create_app
+    overrides = {'RECURRING_SCHEDULER_ENABLED': False, 'EMAIL_QUEUE_AUTOSTART': False}
+    if args.database:
+        overrides['SQLALCHEMY_DATABASE_URI'] = args.database
+    app = create_app(overrides)
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        user_ids, written = generate(args.rows, users=args.users, months=args.months, seasonality=args.seasonality,
+                                     recurring=not args.no_recurring, seed=args.seed, prefix=args.prefix)
+        elapsed = time.perf_counter() - started
+        print(f"Generated {written} transactions for {len(user_ids)} users in {elapsed:.1f}s "
+              f"({written / elapsed:.0f} rows/s)")
@@ -0,0 +1,148 @@
+"""Quick-card taps per second on SQLite with and without group commit.
+
+Boots a throwaway app (see ``load_test.temporary_app``) per scenario, gives
+each of ``--users`` seeded users a quick card, and runs ``--threads`` client
+threads that tap POST /api/quick_cards/<id>/log, each with a fresh
+idempotency key, for ``--duration`` seconds. Every tap also repeats
+``--retry-percent`` of the time with the same key, as a client retrying a
+request whose response it lost; those must not create rows. Reports taps/s,
+tap p50/p95/p99, commits and the average writes per commit, for group commit
+on and off under each ``--synchronous`` setting (FULL fsyncs every commit,
+NORMAL only at WAL checkpoints).
+
+    python benchmarks/group_commit_benchmark.py --threads 16 --duration 10 --synchronous NORMAL FULL
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import func
+from models.users import db
+from models.budget_recurring import QuickCard
+from models.transactions import Transaction
+from seed import seed_users
+from load_test import temporary_app, percentile, git_commit, RESULTS_DIR
+
+
+def drive(app, accounts, cards, threads, duration, retry_percent):
+    latencies, lock = [], threading.Lock()
+    counts = {'taps': 0, 'retries': 0, 'errors': 0}
+    stop = threading.Event()
+
+    def tapper(index):
+        user_id, user_name, password = accounts[index % len(accounts)]
+        client = app.test_client()
+        client.post('/login', data={'username': user_name, 'password': password})
+        url = f'/api/quick_cards/{cards[user_id]}/log'
+        rng = random.Random(index)
+        ready.wait()
+        while not stop.is_set():
+            key = uuid.uuid4().hex
+            started = time.perf_counter()
+            response = client.post(url, headers={'Idempotency-Key': key})
+            elapsed = time.perf_counter() - started
+            retried = rng.random() * 100 < retry_percent
+            if retried:
+                client.post(url, headers={'Idempotency-Key': key})
+            with lock:
+                if response.status_code == 201:
+                    counts['taps'] += 1
+                    latencies.append(elapsed)
+                else:
+                    counts['errors'] += 1
+                counts['retries'] += retried
+
+    ready = threading.Event()
+    workers = [threading.Thread(target=tapper, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    time.sleep(1)  # let every client log in first
+    ready.set()
+    time.sleep(duration)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    return counts, sorted(v * 1000 for v in latencies)
+
+
+def run_scenario(enabled, synchronous, users, threads, duration, retry_percent):
+    overrides = {'GROUP_COMMIT_ENABLED': enabled, 'SQLITE_SYNCHRONOUS': synchronous,
+                 'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000'}
+    with temporary_app(**overrides) as app:
+        with app.app_context():
+            accounts = seed_users(users, months=1, per_day=1)
+            for user_id, _, _ in accounts:
+                db.session.add(QuickCard(user_id=user_id, title='Coffee', amount=120, category='Food',
+                                         sub_category='Cafe', payment_method='UPI'))
+            db.session.commit()
+            cards = {card.user_id: card.id for card in QuickCard.query.all()}
+            before = db.session.query(func.count(Transaction.id)).scalar()
+
+        writer = app.extensions['group_commit']
+        stats_before = writer.stats()
+        counts, latencies = drive(app, accounts, cards, threads, duration, retry_percent)
+        stats = {name: value - stats_before[name] for name, value in writer.stats().items()}
+
+        with app.app_context():
+            rows = db.session.query(func.count(Transaction.id)).scalar() - before
+
+    return {
+        'group_commit': enabled,
+        'synchronous': synchronous,
+        'taps_per_second': round(counts['taps'] / duration, 1),
+        'taps': counts['taps'],
+        'retries': counts['retries'],
+        'errors': counts['errors'],
+        'rows_created': rows,
+        'commits': stats['batches'],
+        'writes_per_commit': round(counts['taps'] / stats['batches'], 2) if stats['batches'] else 0,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+    }
+
+
+def run(users, threads, duration, retry_percent, synchronous_modes):
+    results = {}
+    for synchronous in synchronous_modes:
+        for enabled in (False, True):
+            name = f"{'group' if enabled else 'per-tap'} commit, synchronous={synchronous}"
+            result = results[name] = run_scenario(enabled, synchronous, users, threads, duration, retry_percent)
+            print(f"{name:36s} {result['taps_per_second']:8.1f} taps/s  p50/p95/p99 {result['p50_ms']:6.1f}/"
+                  f"{result['p95_ms']:6.1f}/{result['p99_ms']:6.1f} ms  {result['writes_per_commit']:6.2f} writes/commit  "
+                  f"rows {result['rows_created']} for {result['taps']} taps + {result['retries']} retries")
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'params': {'users': users, 'threads': threads, 'duration': duration, 'retry_percent': retry_percent,
+                   'cpus': os.cpu_count()},
+        'scenarios': results,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=8)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--retry-percent', type=float, default=5)
+    parser.add_argument('--synchronous', nargs='+', default=['NORMAL', 'FULL'])
+    parser.add_argument('--output', help="Result file (default: benchmarks/results/group-commit-<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    result = run(args.users, args.threads, args.duration, args.retry_percent, args.synchronous)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"group-commit-{result['commit'] or 'nogit'}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"\nResults written to {output}")
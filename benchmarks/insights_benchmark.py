@@ -0,0 +1,113 @@
+"""Benchmark of the /spendings insights engine per period length.
+
+For each dataset size a fresh temporary database is filled by
+``generate_dataset.generate`` and, for one user and each period (week,
+month, quarter, year), the engine's query (``load``), its NumPy pass
+(``compute``) and the whole ``/spendings`` request are timed (median of
+``--repeat`` runs, result cache off). ``orm loop (month)`` is the way the
+route used to work, loading ORM objects for the month and the one before and
+summing them in Python, kept as a reference point.
+
+    python benchmarks/insights_benchmark.py --sizes 10000 100000 1000000 --users 10
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.users import db
+from models.transactions import Transaction
+from services.insights_engine import InsightsEngine
+from generate_dataset import generate
+from load_test import temporary_app, git_commit, RESULTS_DIR
+
+
+def orm_loop(user_id, start, end, prev_start):
+    """Category totals, previous total and daily totals the way the route computed them before"""
+    spendings, daily, prev_total = {}, {}, 0
+    for tx in Transaction.query.filter(Transaction.user_id == user_id, Transaction.in_period(start, end)).all():
+        spendings[tx.category or 'Other'] = spendings.get(tx.category or 'Other', 0) + tx.amount
+        daily[tx.date.day] = daily.get(tx.date.day, 0) + tx.amount
+    for tx in Transaction.query.filter(Transaction.user_id == user_id, Transaction.in_period(prev_start, start)).all():
+        prev_total += tx.amount
+    return spendings, daily, prev_total
+
+
+def benchmarks(user_id, client, today):
+    """name -> zero-argument callable"""
+    cases = {}
+    for period in InsightsEngine.PERIODS:
+        start, end = InsightsEngine.period_range(period, today.year, today.month, today.isocalendar()[1])
+        prev_start, _ = InsightsEngine.previous_range(period, start)
+        columns = InsightsEngine.load(user_id, prev_start, end)
+        budgets = InsightsEngine.load_budgets(user_id, start, end)
+        cases[f'{period}: load'] = lambda s=prev_start, e=end: InsightsEngine.load(user_id, s, e)
+        cases[f'{period}: compute'] = lambda c=columns, s=start, e=end, p=prev_start, b=budgets: InsightsEngine.compute(*c, s, e, p, b)
+        cases[f'{period}: /spendings'] = lambda p=period: client.post('/spendings', data={
+            'period': p, 'month': today.strftime('%B'), 'year': str(today.year), 'week': str(today.isocalendar()[1])})
+        if period == 'month':
+            cases['orm loop (month)'] = lambda s=start, e=end, p=prev_start: orm_loop(user_id, s, e, p)
+    return cases
+
+
+def time_call(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        db.session.expire_all()
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def run(sizes, users, months, repeat):
+    today = date.today()
+    results = {}
+    for size in sizes:
+        with temporary_app(RESULT_CACHE_TTL=0) as app:
+            with app.app_context():
+                db.create_all()
+                user_ids, written = generate(size, users=users, months=months)
+                user_id = user_ids[0]
+                user_rows = Transaction.query.filter_by(user_id=user_id).count()
+
+            client = app.test_client()
+            client.post('/login', data={'username': 'gen_0', 'password': 'benchmark'})
+
+            with app.app_context():
+                print(f"\n{written} rows ({user_rows} for the measured user)")
+                for name, fn in benchmarks(user_id, client, today).items():
+                    fn()  # warm up
+                    ms = time_call(fn, repeat)
+                    results.setdefault(name, []).append({'rows': written, 'user_rows': user_rows, 'ms': round(ms, 3)})
+                    print(f"  {name:28s} {ms:10.2f} ms")
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'params': {'sizes': sizes, 'users': users, 'months': months, 'repeat': repeat},
+        'results': results,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 300000])
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help="Result file (default: benchmarks/results/insights-<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    result = run(sorted(args.sizes), args.users, args.months, args.repeat)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"insights-{result['commit'] or 'nogit'}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"\nResults written to {output}")
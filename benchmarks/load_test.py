@@ -0,0 +1,299 @@
+"""End-to-end HTTP load test against a throwaway database.
+
+Boots ``create_app()`` on a temporary SQLite database and sheets root, seeds
+synthetic users (see ``seed.py``) and drives a weighted mix of requests
+through Flask test clients, one per worker thread and user. Reports per-route
+p50/p95/p99 latency, requests per second and SQL statements per request, and
+writes the run as JSON so results can be compared across commits.
+
+    python benchmarks/load_test.py --users 10 --requests 2000 --workers 4
+    python benchmarks/load_test.py --compare benchmarks/results/old.json benchmarks/results/new.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date, datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event
+from app import create_app
+from models.users import db
+from seed import seed_users
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# route name -> relative weight in the mixed workload
+DEFAULT_MIX = {
+    'map_transaction': 15,
+    'quick_map_log': 10,
+    'view_transactions': 10,
+    'api_transactions': 15,
+    'spendings': 15,
+    'dashboard': 20,
+    'budgets': 10,
+    'download': 5,
+}
+
+
+@contextmanager
+def temporary_app(**overrides):
+    """A fully configured app on a temp SQLite file and temp SHEETS_ROOT, removed afterwards"""
+    workdir = tempfile.mkdtemp(prefix='tm-bench-')
+    config = {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        'SHEETS_ROOT': os.path.join(workdir, 'Sheets'),
+        'RECURRING_SCHEDULER_ENABLED': False,
+        'EMAIL_QUEUE_AUTOSTART': False,
+        'SCHEMA_AUTO_CREATE': True,
+        'TESTING': True,
+    }
+    config.update(overrides)
+    try:
+        yield create_app(config)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+class SQLCounter:
+    """Counts statements and their time per thread via the engine's cursor events"""
+
+    def __init__(self, engine):
+        self._local = threading.local()
+        event.listen(engine, 'before_cursor_execute', self._before)
+        event.listen(engine, 'after_cursor_execute', self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.started = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.count = getattr(self._local, 'count', 0) + 1
+        self._local.seconds = getattr(self._local, 'seconds', 0.0) + time.perf_counter() - self._local.started
+
+    def reset(self):
+        self._local.count = 0
+        self._local.seconds = 0.0
+
+    def read(self):
+        return getattr(self._local, 'count', 0), getattr(self._local, 'seconds', 0.0)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def make_requests(client, user, rng):
+    """route name -> callable issuing that request for one logged-in user"""
+    today = date.today()
+    month, year = today.strftime('%B'), str(today.year)
+
+    def map_transaction():
+        return client.post('/map_transaction', data={
+            'title': rng.choice(['Coffee', 'Uber', 'Groceries', 'Lunch']),
+            'amount': str(rng.randint(20, 900)),
+            'category': rng.choice(['Food', 'Travel', 'Shopping']),
+            'sub_category': 'Not Applicable',
+            'payment_method': 'UPI'
+        })
+
+    def quick_map_log():
+        return client.post('/quick_map', data={'action': 'log', 'card_id': rng.choice(user['cards'])})
+
+    def view_transactions():
+        return client.post('/view_transactions', data={'month': month, 'year': year, 'sort_by': 'date_desc'})
+
+    def api_transactions():
+        return client.get('/api/transactions', query_string={
+            'month': month, 'year': year, 'sort_by': rng.choice(['date_desc', 'amount_desc']), 'limit': 50
+        })
+
+    def spendings():
+        return client.get('/spendings')
+
+    def dashboard():
+        return client.get('/dashboard')
+
+    def budgets():
+        return client.get('/budgets')
+
+    def download():
+        return client.post('/download', data={'month': month, 'year': year, 'action': 'download'})
+
+    return {
+        'map_transaction': map_transaction,
+        'quick_map_log': quick_map_log,
+        'view_transactions': view_transactions,
+        'api_transactions': api_transactions,
+        'spendings': spendings,
+        'dashboard': dashboard,
+        'budgets': budgets,
+        'download': download,
+    }
+
+
+def run(users=10, requests=2000, workers=4, months=6, per_day=3, mix=None, seed=42):
+    mix = mix or DEFAULT_MIX
+    samples = defaultdict(list)   # route -> [(seconds, sql_count, sql_seconds, ok)]
+    samples_lock = threading.Lock()
+
+    with temporary_app() as app:
+        with app.app_context():
+            db.create_all()
+            started = time.perf_counter()
+            accounts = seed_users(users, months=months, per_day=per_day, seed=seed)
+            seed_seconds = time.perf_counter() - started
+            from models.budget_recurring import QuickCard
+            cards = {user_id: [c.id for c in QuickCard.query.filter_by(user_id=user_id)] for user_id, _, _ in accounts}
+            from models.transactions import Transaction
+            row_count = Transaction.query.count()
+            counter = SQLCounter(db.engine)
+
+        print(f"Seeded {users} users / {row_count} transactions in {seed_seconds:.1f}s")
+
+        def worker(index):
+            rng = random.Random(seed + index)
+            names, weights = zip(*mix.items())
+            per_user = {}
+            for user_id, user_name, password in accounts[index::workers]:
+                client = app.test_client()
+                counter.reset()
+                t0 = time.perf_counter()
+                response = client.post('/login', data={'username': user_name, 'password': password})
+                elapsed = time.perf_counter() - t0
+                sql_count, sql_seconds = counter.read()
+                with samples_lock:
+                    samples['login'].append((elapsed, sql_count, sql_seconds, response.status_code < 400))
+                per_user[user_id] = make_requests(client, {'cards': cards[user_id]}, rng)
+            if not per_user:
+                return
+
+            for _ in range(requests // workers):
+                route = rng.choices(names, weights)[0]
+                call = per_user[rng.choice(list(per_user))][route]
+                counter.reset()
+                t0 = time.perf_counter()
+                response = call()
+                elapsed = time.perf_counter() - t0
+                sql_count, sql_seconds = counter.read()
+                with samples_lock:
+                    samples[route].append((elapsed, sql_count, sql_seconds, response.status_code < 400))
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+        wall_start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - wall_start
+
+        from services.excel_queue import excel_queue
+        excel_queue.flush(60)
+
+    return summarise(samples, wall, {
+        'users': users, 'requests': requests, 'workers': workers, 'months': months,
+        'per_day': per_day, 'seed': seed, 'mix': mix, 'seeded_transactions': row_count
+    })
+
+
+def summarise(samples, wall, params):
+    routes = {}
+    total = 0
+    for route, rows in sorted(samples.items()):
+        latencies = sorted(r[0] * 1000 for r in rows)
+        total += len(rows)
+        routes[route] = {
+            'count': len(rows),
+            'errors': sum(1 for r in rows if not r[3]),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'max_ms': round(latencies[-1], 2),
+            'mean_sql_queries': round(sum(r[1] for r in rows) / len(rows), 2),
+            'max_sql_queries': max(r[1] for r in rows),
+            'mean_sql_ms': round(sum(r[2] for r in rows) * 1000 / len(rows), 2),
+        }
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'params': params,
+        'wall_seconds': round(wall, 3),
+        'requests_per_second': round(total / wall, 1) if wall else 0,
+        'routes': routes,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def print_report(result):
+    print(f"\n{result['requests_per_second']} req/s over {result['wall_seconds']}s (commit {result['commit']})")
+    print(f"{'route':20s} {'count':>6s} {'err':>4s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} {'sql/req':>8s} {'sql ms':>8s}")
+    for route, stats in result['routes'].items():
+        print(f"{route:20s} {stats['count']:6d} {stats['errors']:4d} {stats['p50_ms']:8.2f} {stats['p95_ms']:8.2f} "
+              f"{stats['p99_ms']:8.2f} {stats['mean_sql_queries']:8.2f} {stats['mean_sql_ms']:8.2f}")
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{'route':20s} {'p95 old':>9s} {'p95 new':>9s} {'change':>8s} {'sql old':>8s} {'sql new':>8s}")
+    for route in sorted(set(old['routes']) | set(new['routes'])):
+        a, b = old['routes'].get(route), new['routes'].get(route)
+        if not a or not b:
+            print(f"{route:20s} only in {'new' if b else 'old'} run")
+            continue
+        change = (b['p95_ms'] - a['p95_ms']) / a['p95_ms'] * 100 if a['p95_ms'] else 0
+        print(f"{route:20s} {a['p95_ms']:9.2f} {b['p95_ms']:9.2f} {change:+7.1f}% "
+              f"{a['mean_sql_queries']:8.2f} {b['mean_sql_queries']:8.2f}")
+    print(f"{'req/s':20s} {old['requests_per_second']:9.1f} {new['requests_per_second']:9.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--requests', type=int, default=2000, help="Total requests across all workers")
+    parser.add_argument('--workers', type=int, default=4, help="Concurrent client threads")
+    parser.add_argument('--months', type=int, default=6, help="Months of history per user")
+    parser.add_argument('--per-day', type=int, default=3, help="Average transactions per user per day")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Result file (default: benchmarks/results/load-<commit>-<time>.json)")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="Compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        raise SystemExit(0)
+
+    result = run(users=args.users, requests=args.requests, workers=args.workers,
+                 months=args.months, per_day=args.per_day, seed=args.seed)
+    print_report(result)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"load-{result['commit'] or 'nogit'}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"\nResults written to {output}")
@@ -0,0 +1,133 @@
+"""Login throughput and its effect on concurrent dashboard requests.
+
+Each scenario boots a throwaway app (see ``load_test.temporary_app``), then
+runs ``--login-threads`` threads posting logins in a loop next to
+``--dashboard-threads`` threads loading /dashboard as logged-in users, for
+``--duration`` seconds. Scenarios are a dashboard-only baseline plus one run
+per ``--hash-workers`` value (the size of the password hashing pool; giving
+it as many workers as login threads is the same as hashing inline). Reports
+logins/s, login and dashboard p50/p95, logins turned away with 503, and the
+latency of rejecting an unknown username.
+
+    python benchmarks/login_benchmark.py --login-threads 8 --dashboard-threads 2 --hash-workers 8 2
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.users import db
+from seed import seed_users
+from load_test import temporary_app, percentile, git_commit, RESULTS_DIR
+
+
+def drive(app, accounts, login_threads, dashboard_threads, duration):
+    samples = {'login': [], 'dashboard': [], 'rejected': 0}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def login_loop(index):
+        _, user_name, password = accounts[index % len(accounts)]
+        client = app.test_client()
+        while not stop.is_set():
+            started = time.perf_counter()
+            response = client.post('/login', data={'username': user_name, 'password': password})
+            elapsed = time.perf_counter() - started
+            with lock:
+                if response.status_code == 503:
+                    samples['rejected'] += 1
+                else:
+                    samples['login'].append(elapsed)
+
+    def dashboard_loop(index):
+        _, user_name, password = accounts[index % len(accounts)]
+        client = app.test_client()
+        client.post('/login', data={'username': user_name, 'password': password})
+        while not stop.is_set():
+            started = time.perf_counter()
+            client.get('/dashboard')
+            with lock:
+                samples['dashboard'].append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=login_loop, args=(i,)) for i in range(login_threads)]
+    threads += [threading.Thread(target=dashboard_loop, args=(i,)) for i in range(dashboard_threads)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    def latency(values):
+        values = sorted(v * 1000 for v in values)
+        return {'count': len(values), 'p50_ms': round(percentile(values, 50), 2), 'p95_ms': round(percentile(values, 95), 2)}
+
+    return {
+        'logins_per_second': round(len(samples['login']) / duration, 1),
+        'rejected': samples['rejected'],
+        'login': latency(samples['login']),
+        'dashboard': latency(samples['dashboard']),
+    }
+
+
+def unknown_user_ms(app, repeat=50):
+    client = app.test_client()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        client.post('/login', data={'username': 'nobody_here', 'password': 'wrong'})
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(percentile(sorted(timings), 50), 2)
+
+
+def run(users, login_threads, dashboard_threads, hash_workers, duration, method):
+    scenarios = [('dashboard only', None, 0)] + [(f'{w} hash worker(s)', w, login_threads) for w in hash_workers]
+    results = {}
+    for name, workers, threads in scenarios:
+        overrides = {'PASSWORD_HASH_METHOD': method}
+        if workers:
+            overrides['PASSWORD_HASH_WORKERS'] = workers
+        with temporary_app(**overrides) as app:
+            with app.app_context():
+                db.create_all()
+                accounts = seed_users(users, months=2, per_day=3)
+            result = drive(app, accounts, threads, dashboard_threads, duration)
+            result['unknown_user_p50_ms'] = unknown_user_ms(app)
+        results[name] = result
+        print(f"{name:20s} logins/s {result['logins_per_second']:7.1f}  login p50/p95 "
+              f"{result['login']['p50_ms']:8.1f}/{result['login']['p95_ms']:8.1f} ms  dashboard p50/p95 "
+              f"{result['dashboard']['p50_ms']:7.1f}/{result['dashboard']['p95_ms']:7.1f} ms  "
+              f"503s {result['rejected']}  unknown user {result['unknown_user_p50_ms']} ms")
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'params': {'users': users, 'login_threads': login_threads, 'dashboard_threads': dashboard_threads,
+                   'hash_workers': hash_workers, 'duration': duration, 'method': method},
+        'scenarios': results,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=4)
+    parser.add_argument('--login-threads', type=int, default=8)
+    parser.add_argument('--dashboard-threads', type=int, default=2)
+    parser.add_argument('--hash-workers', type=int, nargs='+', default=[8, 2])
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--method', default='scrypt:32768:8:1', help="PASSWORD_HASH_METHOD for every scenario")
+    parser.add_argument('--output', help="Result file (default: benchmarks/results/login-<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    result = run(args.users, args.login_threads, args.dashboard_threads, args.hash_workers, args.duration, args.method)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"login-{result['commit'] or 'nogit'}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"\nResults written to {output}")
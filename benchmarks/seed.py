@@ -0,0 +1,98 @@
+"""Synthetic users with realistic transaction histories, for the benchmarks.
+
+Call inside an app context against a throwaway database (see
+``load_test.temporary_app``). Transactions are bulk inserted with Core and
+the spending rollup is rebuilt once at the end, so seeding is fast enough to
+run before every benchmark.
+"""
+import random
+from datetime import date, datetime, timedelta
+from sqlalchemy import insert
+from models.users import User, db
+from models.transactions import Transaction
+from models.budget_recurring import Budget, QuickCard
+from services.rollup_service import RollupService
+
+CATEGORIES = {
+    "Bills": (["Electricity Bill", "Water Bill", "Mobile Recharge", "Wifi Bill"], 300, 2500),
+    "Food": (["Snacks", "Groceries", "Restaurant", "Cafe", "Street Food"], 40, 1200),
+    "Travel": (["Public Transport", "Ride Hailing", "Fuel", "Toll/FastTag"], 20, 900),
+    "Shopping": (["Clothing & Fashion", "Electronics", "Online Shopping"], 200, 6000),
+    "Entertainment": (["Movie/OTT Subscription", "Gaming", "Concerts & Events"], 100, 1500),
+    "Healthcare": (["Hospital Bills", "Pharmacy", "Health Insurance"], 100, 5000),
+    "Rent": (["House Rent"], 8000, 15000),
+    "Investments": (["SIP", "Mutual Funds", "Stocks"], 1000, 10000),
+}
+# Relative frequency of each category; Food and Travel dominate like real spending
+CATEGORY_WEIGHTS = [6, 30, 25, 10, 8, 4, 1, 3]
+PAYMENT_METHODS = ["UPI", "Cash", "Debit Card", "Credit Card"]
+TITLES = {
+    "Bills": ["Electricity", "Water", "Jio recharge", "Airtel fiber"],
+    "Food": ["Swiggy", "Zomato", "Coffee", "Tea stall", "Grocery store", "Bakery"],
+    "Travel": ["Metro card", "Uber", "Ola", "Petrol", "Bus ticket"],
+    "Shopping": ["Amazon", "Flipkart", "Myntra", "Decathlon"],
+    "Entertainment": ["Netflix", "Spotify", "PVR", "Steam"],
+    "Healthcare": ["Apollo pharmacy", "Clinic visit", "Lab test"],
+    "Rent": ["Monthly rent"],
+    "Investments": ["SIP", "Index fund", "Gold"],
+}
+
+
+def transaction_rows(user_id, start, end, per_day, rng):
+    """Yield insert dicts for one user between ``start`` and ``end`` (inclusive)"""
+    categories = list(CATEGORIES)
+    day = start
+    while day <= end:
+        # Weekends are busier
+        count = rng.randint(0, per_day * 2) + (1 if day.weekday() >= 5 else 0)
+        for _ in range(count):
+            category = rng.choices(categories, CATEGORY_WEIGHTS)[0]
+            sub_categories, low, high = CATEGORIES[category]
+            yield {
+                'user_id': user_id,
+                'date': day,
+                'title': rng.choice(TITLES[category]),
+                'amount': round(rng.uniform(low, high), 2),
+                'category': category,
+                'sub_category': rng.choice(sub_categories),
+                'payment_method': rng.choice(PAYMENT_METHODS),
+                'created_at': datetime.utcnow()
+            }
+        day += timedelta(days=1)
+
+
+def seed_users(count, months=6, per_day=3, password='benchmark', seed=42, batch_size=5000):
+    """Create ``count`` users named ``bench_<n>`` with ``months`` of history, budgets and quick cards.
+
+    Returns a list of ``(user_id, user_name, password)``.
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    start = (today.replace(day=1) - timedelta(days=31 * (months - 1))).replace(day=1)
+
+    users = []
+    for n in range(count):
+        user = User('Bench', str(n), f'bench_{n}', password, f'bench_{n}@example.com')
+        db.session.add(user)
+        db.session.flush()
+        users.append((user.id, user.user_name, password))
+
+        for category in ("Food", "Travel", "Shopping", "Bills"):
+            db.session.add(Budget(user_id=user.id, category=category, amount=rng.choice([2000, 5000, 8000]),
+                                  month=today.month, year=today.year))
+        for title, amount, category in (("Coffee", 120, "Food"), ("Metro card", 60, "Travel")):
+            db.session.add(QuickCard(user_id=user.id, title=title, amount=amount, category=category,
+                                     sub_category=CATEGORIES[category][0][0], payment_method="UPI"))
+
+        batch = []
+        for row in transaction_rows(user.id, start, today, per_day, rng):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                db.session.execute(insert(Transaction), batch)
+                batch = []
+        if batch:
+            db.session.execute(insert(Transaction), batch)
+    db.session.commit()
+
+    RollupService.rebuild()
+    return users
@@ -0,0 +1,110 @@
+"""Concurrency stress test for the sheet storage layer.
+
+Many threads create users' sheets and append rows to them at the same time,
+the way a threaded WSGI server would. Afterwards every user's directory must
+hold only that user's sheet, every appended row must be present exactly once,
+no temp files may be left behind and the working directory must not have
+moved.
+
+    python benchmarks/sheet_storage_stress.py --users 16 --threads 32 --rows 40
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+from services.sheet_storage import sheet_storage
+from services.sheet_manager import sheet_manager
+from services.transaction_services import ExcelService
+from models.users import User
+
+
+def run(users, threads, rows):
+    root = tempfile.mkdtemp(prefix='sheets-stress-')
+    sheet_storage.root = root
+    sheet_manager.invalidate()
+    cwd = os.getcwd()
+
+    user_names = [f'stress_user_{i}' for i in range(users)]
+    accounts = {}
+    accounts_lock = threading.Lock()
+
+    def account(user_name):
+        # User() prepares the directory and the current sheet, like registration does
+        with accounts_lock:
+            user = accounts.get(user_name)
+        if user is None:
+            user = User('Stress', 'Test', user_name, 'pw', f'{user_name}@example.com')
+            with accounts_lock:
+                user = accounts.setdefault(user_name, user)
+        return user
+
+    def task(index):
+        user_name = random.choice(user_names)
+        user = account(user_name)
+        assert user.get_current_sheet()
+        ExcelService.append_transaction_data(user.current_sheet_path, {
+            'date': '2025-01-01',
+            'title': f'{user_name}#{index}',
+            'amount': 1,
+            'category': 'Other',
+            'sub_category': 'Other',
+            'payment_method': 'Cash'
+        })
+        if os.getcwd() != cwd:
+            raise AssertionError(f'working directory moved to {os.getcwd()}')
+        return user_name, index
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(task, range(users * rows)))
+    elapsed = time.perf_counter() - started
+
+    expected = {}
+    for user_name, index in results:
+        expected.setdefault(user_name, set()).add(f'{user_name}#{index}')
+
+    problems = []
+    for entry in sorted(os.listdir(root)):
+        user_dir = os.path.join(root, entry)
+        for file_name in os.listdir(user_dir):
+            if not file_name.endswith('.xlsx') or file_name.startswith('.'):
+                problems.append(f'stray file {entry}/{file_name}')
+                continue
+            workbook = openpyxl.load_workbook(os.path.join(user_dir, file_name), read_only=True)
+            titles = [row[2] for row in workbook.active.iter_rows(min_row=4, values_only=True) if row[2]]
+            workbook.close()
+            foreign = [t for t in titles if not t.startswith(f'{entry}#')]
+            if foreign:
+                problems.append(f'{entry}/{file_name} holds {len(foreign)} row(s) of other users')
+            missing = expected.get(entry, set()) - set(titles)
+            if missing:
+                problems.append(f'{entry}/{file_name} lost {len(missing)} row(s)')
+            if len(titles) != len(set(titles)):
+                problems.append(f'{entry}/{file_name} has duplicated rows')
+
+    print(f"{len(results)} appends across {users} users with {threads} threads in {elapsed:.2f}s "
+          f"({len(results) / elapsed:.0f} appends/s)")
+    shutil.rmtree(root, ignore_errors=True)
+    if problems:
+        for problem in problems:
+            print(f"✗ {problem}")
+        raise SystemExit(1)
+    print("✓ every sheet is in its owner's folder, complete, and no temp files were left")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=16)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--rows', type=int, default=40, help="Appends per user (on average)")
+    args = parser.parse_args()
+    run(args.users, args.threads, args.rows)
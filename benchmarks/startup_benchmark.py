@@ -0,0 +1,124 @@
+"""Cold-start time of the app, with a budget that fails the run when it regresses.
+
+Each run starts a fresh interpreter that imports ``app`` and calls
+``create_app()`` on a temporary database and sheets root, so nothing is
+shared between runs except the OS file cache. Reports the median import and
+``create_app()`` time over ``--runs``, the slowest of app.py's own imports from
+``python -X importtime``, and any heavy module (pandas, openpyxl, numpy,
+smtplib...) that got loaded at startup instead of on first use. Exits with
+status 1 when the median total is over ``--budget-ms`` or a heavy module is
+loaded, so it can gate a CI job.
+
+    python benchmarks/startup_benchmark.py --runs 5 --budget-ms 800
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# Only needed by the paths that use them; importing any of these at startup is a regression
+HEAVY_MODULES = ['pandas', 'numpy', 'openpyxl', 'smtplib', 'email.mime']
+
+CHILD = """
+import json, os, sys, tempfile, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+workdir = tempfile.mkdtemp(prefix='tm-startup-')
+app.create_app({
+    'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(workdir, 'startup.db'),
+    'SHEETS_ROOT': os.path.join(workdir, 'Sheets'),
+    'JINJA_CACHE_DIR': os.path.join(workdir, 'jinja_cache'),
+    'RECURRING_SCHEDULER_ENABLED': False,
+    'EMAIL_QUEUE_AUTOSTART': False,
+})
+created = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'heavy': [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def cold_start():
+    output = subprocess.check_output([sys.executable, '-c', CHILD], cwd=ROOT, text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(limit):
+    """The modules ``app.py`` imports directly, by cumulative import time, from ``-X importtime``"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    totals = []
+    for line in result.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # header or unrelated output
+        name = parts[2][1:]
+        # -X importtime indents each nesting level by two spaces; app.py's own imports are one level down
+        if name.startswith('  ') and not name.startswith('   '):
+            totals.append({'module': name.strip(), 'ms': round(int(parts[1]) / 1000, 1)})
+    return sorted(totals, key=lambda item: -item['ms'])[:limit]
+
+
+def run(runs, budget_ms):
+    cold_start()  # warm the OS file cache and __pycache__ so runs are comparable
+    samples = [cold_start() for _ in range(runs)]
+    import_ms = statistics.median(s['import_ms'] for s in samples)
+    create_ms = statistics.median(s['create_app_ms'] for s in samples)
+    heavy = sorted({m for s in samples for m in s['heavy']})
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'params': {'runs': runs, 'budget_ms': budget_ms},
+        'import_ms': round(import_ms, 1),
+        'create_app_ms': round(create_ms, 1),
+        'total_ms': round(import_ms + create_ms, 1),
+        'heavy_modules_loaded': heavy,
+        'slowest_imports': slowest_imports(10),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=800,
+                        help="Fail when the median import + create_app() time is over this")
+    parser.add_argument('--output', help="Result file (default: benchmarks/results/startup-<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    result = run(args.runs, args.budget_ms)
+    print(f"import app     {result['import_ms']:8.1f} ms")
+    print(f"create_app()   {result['create_app_ms']:8.1f} ms")
+    print(f"total          {result['total_ms']:8.1f} ms  (budget {args.budget_ms:.0f} ms)")
+    print("slowest imports: " + ", ".join(f"{i['module']} {i['ms']} ms" for i in result['slowest_imports']))
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"startup-{result['commit'] or 'nogit'}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    failures = []
+    if result['total_ms'] > args.budget_ms:
+        failures.append(f"cold start {result['total_ms']} ms is over the {args.budget_ms:.0f} ms budget")
+    if result['heavy_modules_loaded']:
+        failures.append(f"loaded at startup: {', '.join(result['heavy_modules_loaded'])}")
+    if failures:
+        raise SystemExit("FAIL: " + "; ".join(failures))
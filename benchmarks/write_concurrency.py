@@ -0,0 +1,144 @@
+"""Write throughput under concurrency, with and without the tuned SQLite engine.
+
+Each scenario boots a throwaway database (see ``load_test.temporary_app``) and
+starts ``--workers`` processes, each with its own app and connection pool like
+separate gunicorn workers, that log in as their own user and post
+/map_transaction as fast as they can for ``--duration`` seconds, loading
+/api/transactions ``--reads-per-write`` times after each post. Reports
+committed writes/s, write and read p50/p95/p99, writes that failed (the route
+swallows the "database is locked" error and flashes it, so failures are
+counted as posts that left no row) and how many writes were retried.
+
+Scenarios:
+  baseline  rollback journal, synchronous=FULL, no retries (the old defaults)
+  tuned     WAL, synchronous=NORMAL, busy_timeout and retry with backoff
+
+    python benchmarks/write_concurrency.py --workers 8 --duration 10
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import func
+from models.users import db
+from models.transactions import Transaction
+from seed import seed_users
+from load_test import temporary_app, percentile, git_commit, RESULTS_DIR
+
+SCENARIOS = {
+    'baseline': {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL', 'DB_WRITE_RETRIES': 0},
+    'tuned': {},
+}
+
+
+def worker(settings, account, duration, reads_per_write, start_at, results):
+    from app import create_app
+    from services.db_engine import db_engine
+
+    app = create_app(settings)
+    client = app.test_client()
+    _, user_name, password = account
+    client.post('/login', data={'username': user_name, 'password': password})
+    form = {'title': 'Coffee', 'amount': '120', 'category': 'Food', 'sub_category': 'Cafe', 'payment_method': 'UPI'}
+
+    time.sleep(max(0, start_at - time.time()))
+    writes, reads = [], []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        client.post('/map_transaction', data=form)
+        writes.append(time.perf_counter() - started)
+        for _ in range(reads_per_write):
+            started = time.perf_counter()
+            client.get('/api/transactions')
+            reads.append(time.perf_counter() - started)
+    results.put({'writes': writes, 'reads': reads, 'retries': db_engine.stats()['retries']})
+
+
+def run_scenario(name, workers, duration, reads_per_write):
+    overrides = dict(SCENARIOS[name], DB_OPTIMIZE_INTERVAL=0)
+    with temporary_app(**overrides) as app:
+        with app.app_context():
+            accounts = seed_users(workers, months=1, per_day=1)
+            before = db.session.query(func.count(Transaction.id)).scalar()
+        settings = {key: app.config[key] for key in ('SQLALCHEMY_DATABASE_URI', 'SHEETS_ROOT', 'TESTING',
+                                                      'RECURRING_SCHEDULER_ENABLED', 'EMAIL_QUEUE_AUTOSTART')}
+        settings.update(overrides, SCHEMA_AUTO_CREATE=False)
+        # Close the parent's connections so the workers are the only ones touching the file
+        with app.app_context():
+            db.engine.dispose()
+
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        start_at = time.time() + 5  # every worker booted and logged in before the clock starts
+        processes = [context.Process(target=worker, args=(settings, accounts[i], duration, reads_per_write,
+                                                                 start_at, results))
+                     for i in range(workers)]
+        for process in processes:
+            process.start()
+        samples = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+        with app.app_context():
+            committed = db.session.query(func.count(Transaction.id)).scalar() - before
+            journal_mode = db.session.execute(db.text("PRAGMA journal_mode")).scalar()
+
+    def latency(kind):
+        values = sorted(v * 1000 for s in samples for v in s[kind])
+        return {'count': len(values), 'p50_ms': round(percentile(values, 50), 2),
+                'p95_ms': round(percentile(values, 95), 2), 'p99_ms': round(percentile(values, 99), 2)}
+
+    writes = latency('writes')
+    return {
+        'journal_mode': journal_mode,
+        'committed': committed,
+        'failed': writes['count'] - committed,
+        'retries': sum(s['retries'] for s in samples),
+        'writes_per_second': round(committed / duration, 1),
+        'write': writes,
+        'read': latency('reads'),
+    }
+
+
+def run(workers, duration, reads_per_write, scenarios):
+    results = {}
+    for name in scenarios:
+        result = results[name] = run_scenario(name, workers, duration, reads_per_write)
+        write, read = result['write'], result['read']
+        print(f"{name:9s} ({result['journal_mode']:6s}) {result['writes_per_second']:7.1f} writes/s  "
+              f"write p50/p95/p99 {write['p50_ms']:7.1f}/{write['p95_ms']:7.1f}/{write['p99_ms']:7.1f} ms  "
+              f"read p50/p95 {read['p50_ms']:6.1f}/{read['p95_ms']:6.1f} ms  "
+              f"failed {result['failed']}  retried {result['retries']}")
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'params': {'workers': workers, 'duration': duration, 'reads_per_write': reads_per_write,
+                   'cpus': os.cpu_count()},
+        'scenarios': results,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--reads-per-write', type=int, default=1)
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--output', help="Result file (default: benchmarks/results/writes-<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    result = run(args.workers, args.duration, args.reads_per_write, args.scenarios)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"writes-{result['commit'] or 'nogit'}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"\nResults written to {output}")
@@ -13,3 +13,82 @@ if not os.getenv('PYTHONANYWHERE_SITE'):
 
 GMAIL_USER = os.getenv('GMAIL_USER')
 GMAIL_APP_PASSWORD = os.getenv('GMAIL_APP_PASSWORD')
+
+# Outbound mail. Point SMTP_HOST/SMTP_PORT at local_smtp_server.py (127.0.0.1:1025,
+# SMTP_USE_TLS=0) to exercise the email queue without Gmail.
+SMTP_HOST = os.getenv('SMTP_HOST', 'smtp.gmail.com')
+SMTP_PORT = int(os.getenv('SMTP_PORT', '587'))
+SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', '1') not in ('0', 'false', 'False')
+SMTP_USERNAME = os.getenv('SMTP_USERNAME', GMAIL_USER or '')
+SMTP_PASSWORD = os.getenv('SMTP_PASSWORD', GMAIL_APP_PASSWORD or '')
+EMAIL_FROM = os.getenv('EMAIL_FROM', SMTP_USERNAME or 'noreply@localhost')
+EMAIL_WORKERS = int(os.getenv('EMAIL_WORKERS', '2'))
+EMAIL_MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', '5'))
+EMAIL_RETRY_BASE_SECONDS = float(os.getenv('EMAIL_RETRY_BASE_SECONDS', '2'))
+# Start the email workers in create_app() to pick up jobs left queued by a previous run.
+# Off by default so scripts that build the app (upgrade_db.py, migrate_to_db.py, ...) don't
+# start them; `python app.py` turns it on, and a WSGI deployment sets EMAIL_QUEUE_AUTOSTART=1.
+# Either way the workers also start on the first enqueue.
+EMAIL_QUEUE_AUTOSTART = os.getenv('EMAIL_QUEUE_AUTOSTART', '0') not in ('0', 'false', 'False')
+
+# Run the recurring-transaction sweep in a background thread every
+# RECURRING_SCHEDULER_INTERVAL seconds. Off by default for the same reason as
+# EMAIL_QUEUE_AUTOSTART; `python app.py` turns it on, and a WSGI deployment either sets
+# RECURRING_SCHEDULER_ENABLED=1 or runs run_recurring.py as its own process.
+RECURRING_SCHEDULER_ENABLED = os.getenv('RECURRING_SCHEDULER_ENABLED', '0') not in ('0', 'false', 'False')
+RECURRING_SCHEDULER_INTERVAL = int(os.getenv('RECURRING_SCHEDULER_INTERVAL', '3600'))
+
+# Root directory of the per-user Excel sheets (plus .exports/ and .outbox/). Relative
+# values are resolved against the working directory at startup.
+SHEETS_ROOT = os.path.abspath(os.getenv('SHEETS_ROOT', 'Sheets'))
+
+# Password hashing. PASSWORD_HASH_METHOD is a werkzeug method string with its cost
+# parameters (e.g. scrypt:32768:8:1 or pbkdf2:sha256:600000); stored hashes made with
+# other parameters are upgraded on the next successful login. Hashing runs on at most
+# PASSWORD_HASH_WORKERS threads, with up to PASSWORD_HASH_MAX_PENDING requests waiting.
+PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '32'))
+
+# Startup. Tables, indexes and the search index are created by `python upgrade_db.py`
+# (or `flask --app app init-db`), not on every boot; SCHEMA_AUTO_CREATE=1 brings back
+# create-on-boot for throwaway databases. Compiled templates are cached in JINJA_CACHE_DIR
+# (default: instance/jinja_cache) so recycled workers don't recompile them.
+SCHEMA_AUTO_CREATE = os.getenv('SCHEMA_AUTO_CREATE', '0') not in ('0', 'false', 'False')
+JINJA_CACHE_DIR = os.getenv('JINJA_CACHE_DIR')
+
+# Database. DATABASE_URL defaults to SQLite in the instance folder; a server URL
+# (postgresql://..., mysql+pymysql://...) gets a pool of DB_POOL_SIZE connections plus
+# DB_MAX_OVERFLOW. SQLite runs in WAL mode with the SQLITE_* pragmas below, and
+# PRAGMA optimize refreshes planner statistics every DB_OPTIMIZE_INTERVAL seconds
+# (0 disables). Writes that hit "database is locked" are retried DB_WRITE_RETRIES times
+# with exponential backoff starting at DB_WRITE_RETRY_BASE_SECONDS.
+DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///site.db')
+if DATABASE_URL.startswith('postgres://'):
+    DATABASE_URL = 'postgresql://' + DATABASE_URL[len('postgres://'):]
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', '20000'))
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+DB_OPTIMIZE_INTERVAL = int(os.getenv('DB_OPTIMIZE_INTERVAL', '3600'))
+DB_WRITE_RETRIES = int(os.getenv('DB_WRITE_RETRIES', '5'))
+DB_WRITE_RETRY_BASE_SECONDS = float(os.getenv('DB_WRITE_RETRY_BASE_SECONDS', '0.05'))
+
+# Group commit. Quick-card taps and form posts are committed by one writer thread in
+# batches of up to GROUP_COMMIT_MAX_BATCH, gathered for GROUP_COMMIT_WINDOW_MS after the
+# first one arrives (GROUP_COMMIT_ENABLED=0 commits each one in its request). Client
+# idempotency keys are remembered for IDEMPOTENCY_TTL seconds.
+GROUP_COMMIT_ENABLED = os.getenv('GROUP_COMMIT_ENABLED', '1') not in ('0', 'false', 'False')
+GROUP_COMMIT_WINDOW_MS = float(os.getenv('GROUP_COMMIT_WINDOW_MS', '2'))
+GROUP_COMMIT_MAX_BATCH = int(os.getenv('GROUP_COMMIT_MAX_BATCH', '256'))
+IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', '3600'))
+
+# Operational endpoints (/metrics, /cache_stats) report process-wide numbers for every user.
+# With OPS_TOKEN set they need "Authorization: Bearer <OPS_TOKEN>"; without it they only
+# answer requests from the local machine. /healthz and /readyz stay open for probes.
+OPS_TOKEN = os.getenv('OPS_TOKEN')
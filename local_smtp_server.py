@@ -9,6 +9,10 @@ import os
 load_dotenv()
 
 class CustomHandler:
+    def __init__(self, forward=True):
+        self.forward = forward
+        self.accepted = []  # Messages taken in stand-in mode
+
     async def handle_EHLO(self, server, session, envelope, hostname):
         session.host_name = hostname
         return '250 OK'
@@ -28,6 +32,12 @@ class CustomHandler:
         try:
             # Create message from received data
             msg = message_from_bytes(envelope.content)
+
+            # Stand-in mode for tests and benchmarks: accept without forwarding
+            if not self.forward:
+                self.accepted.append(msg)
+                logging.info(f"Accepted '{msg['Subject']}' without forwarding")
+                return '250 Message accepted'
             
             # Gmail SMTP settings
             gmail_smtp = "smtp.gmail.com"
@@ -60,20 +70,26 @@ class CustomHandler:
     async def handle_QUIT(self, server, session, envelope):
         return '221 Bye'
 
+def start_server():
+    """Start the server on its own thread and return the controller (``controller.handler`` is the handler)"""
+    # LOCAL_SMTP_FORWARD=0 turns this into a sink for the email queue
+    # (run the app with SMTP_HOST=127.0.0.1 SMTP_PORT=1025 SMTP_USE_TLS=0)
+    handler = CustomHandler(forward=os.getenv('LOCAL_SMTP_FORWARD', '1') not in ('0', 'false', 'False'))
+    controller = Controller(
+        handler, 
+        hostname=os.getenv('LOCAL_SMTP_HOST', '127.0.0.1'),
+        port=int(os.getenv('LOCAL_SMTP_PORT', '1025'))
+    )
+    controller.start()
+    return controller
+
 async def main():
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     
-    handler = CustomHandler()
-    controller = Controller(
-        handler, 
-        hostname='127.0.0.1',
-        port=1025
-    )
-    
-    controller.start()
+    controller = start_server()
     logging.info(f'SMTP server running on {controller.hostname}:{controller.port}')
     
     try:
@@ -1,91 +1,239 @@
+import argparse
+import json
+import multiprocessing
 import os
-import pandas as pd
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, date
+
+import openpyxl
+from sqlalchemy import insert
+import config
+
 from app import create_app
 from models.users import User, db
 from models.transactions import Transaction
-from datetime import datetime
+from services.rollup_service import RollupService
+from upgrade_db import upgrade_schema
+
+# Map sheet headings (see SpreadSheet.apply_template) to Transaction columns
+COLUMN_MAPPING = {
+    'Date': 'date',
+    'Transaction Title': 'title',
+    'Amount': 'amount',
+    'Category': 'category',
+    'Sub Category': 'sub_category',
+    'Payment Method': 'payment_method'
+}
+HEADER_ROW = 3
+DEFAULT_CHECKPOINT = 'migration_checkpoint.json'
+
+
+def _parse_date(value):
+    """The row's date. A missing or unparsable date raises ValueError, so the row is reported as bad:
+    a stand-in like today's date would change the dedup fingerprint between runs."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        return datetime.strptime(value.strip()[:10], '%Y-%m-%d').date()
+    raise ValueError(f"missing or unparsable date: {value!r}")
+
+
+def _text(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def parse_sheet(file_path):
+    """Read one month sheet in streaming mode. Runs in a worker process.
+
+    Returns ``(file_path, rows, errors)`` where rows are plain dicts ready for
+    a bulk insert (minus ``user_id``) and errors is ``[(row_number, reason)]``
+    for the rows that were skipped as bad.
+    """
+    rows = []
+    errors = []
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        columns = {}
+        for index, heading in enumerate(next(sheet.iter_rows(min_row=HEADER_ROW, max_row=HEADER_ROW, values_only=True), ())):
+            if heading in COLUMN_MAPPING:
+                columns[COLUMN_MAPPING[heading]] = index
+
+        if 'title' not in columns or 'amount' not in columns:
+            return file_path, rows, errors
+
+        for row_number, values in enumerate(sheet.iter_rows(min_row=HEADER_ROW + 1, values_only=True), HEADER_ROW + 1):
+            get = lambda field: values[columns[field]] if field in columns and columns[field] < len(values) else None
+
+            # Skip if title or amount is empty (could be the SUM row or empty space)
+            title, amount = get('title'), get('amount')
+            if title is None or amount is None or str(title).strip() == '':
+                continue
+
+            try:
+                rows.append({
+                    'date': _parse_date(get('date')),
+                    'title': str(title),
+                    'amount': float(amount),
+                    'category': _text(get('category')) or 'Other',
+                    'sub_category': _text(get('sub_category')),
+                    'payment_method': _text(get('payment_method'))
+                })
+            except (TypeError, ValueError) as e:
+                errors.append((row_number, str(e)))
+    finally:
+        workbook.close()
+
+    return file_path, rows, errors
+
+
+def _file_signature(file_path):
+    stat = os.stat(file_path)
+    return f'{stat.st_mtime_ns}:{stat.st_size}'
+
 
-def migrate_data():
-    app = create_app()
+def _load_checkpoint(path):
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def _save_checkpoint(path, checkpoint):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def _existing_fingerprints(user_id):
+    """Multiset of (date, title, amount) already stored for a user, read from the fingerprint index"""
+    rows = db.session.query(Transaction.date, Transaction.title, Transaction.amount).filter(
+        Transaction.user_id == user_id
+    ).all()
+    return Counter((tx_date, title, float(amount)) for tx_date, title, amount in rows)
+
+
+def migrate_data(sheets_dir=config.SHEETS_ROOT, workers=None, batch_size=1000, dry_run=False,
+                 checkpoint_path=DEFAULT_CHECKPOINT, resume=True, app=None):
+    if app is None:
+        # No schedulers, queues or optimize thread: the parser processes must not start next to live threads
+        app = create_app({'RECURRING_SCHEDULER_ENABLED': False, 'EMAIL_QUEUE_AUTOSTART': False,
+                          'DB_OPTIMIZE_INTERVAL': 0})
     with app.app_context():
-        # Ensure tables are created
-        db.create_all()
-        
+        # Tables plus any index an older database is missing; the dedup below reads the fingerprint index
+        upgrade_schema(verbose=False)
+
+        checkpoint = _load_checkpoint(checkpoint_path) if resume else {}
+
+        # One task per sheet file, skipping files already migrated and unchanged since
+        tasks = {}
+        skipped_files = 0
         users = User.query.all()
         print(f"Found {len(users)} users.")
-        
         for user in users:
-            print(f"Processing user: {user.user_name}")
-            user_dir = os.path.join('Sheets', user.user_name)
-            
-            if not os.path.exists(user_dir):
-                print(f"No sheets directory for user {user.user_name}")
+            user_dir = os.path.join(sheets_dir, user.user_name)
+            if not os.path.isdir(user_dir):
                 continue
-                
-            for file_name in os.listdir(user_dir):
-                if file_name.endswith('.xlsx'):
-                    file_path = os.path.join(user_dir, file_name)
-                    print(f"  Reading file: {file_name}")
-                    
+            for file_name in sorted(os.listdir(user_dir)):
+                if not file_name.endswith('.xlsx'):
+                    continue
+                file_path = os.path.join(user_dir, file_name)
+                if checkpoint.get(file_path) == _file_signature(file_path):
+                    skipped_files += 1
+                    continue
+                tasks[file_path] = user.id
+
+        print(f"{len(tasks)} sheet(s) to migrate, {skipped_files} already done per checkpoint.")
+        if not tasks:
+            return
+
+        fingerprints = {}
+        totals = Counter()
+        started = time.perf_counter()
+
+        # Spawned rather than forked, so no thread or open connection is copied into the workers
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = [pool.submit(parse_sheet, file_path) for file_path in tasks]
+            for done, future in enumerate(as_completed(futures), 1):
+                try:
+                    file_path, rows, errors = future.result()
+                except Exception as e:
+                    print(f"  Error reading sheet: {e}")
+                    totals['failed_files'] += 1
+                    continue
+
+                user_id = tasks[file_path]
+                if user_id not in fingerprints:
+                    fingerprints[user_id] = _existing_fingerprints(user_id)
+                existing = fingerprints[user_id]
+
+                # Drop rows already in the DB; repeated identical rows are matched one for one
+                new_rows = []
+                for row in rows:
+                    key = (row['date'], row['title'], row['amount'])
+                    if existing[key] > 0:
+                        existing[key] -= 1
+                        continue
+                    row['user_id'] = user_id
+                    new_rows.append(row)
+
+                if not dry_run and new_rows:
                     try:
-                        # Skip the first two rows (Title and merged Total Amount header)
-                        df = pd.read_excel(file_path, skiprows=2)
-                        
-                        # Map columns
-                        column_mapping = {
-                            'Sr No': 'sr_no',
-                            'Date': 'date',
-                            'Transaction Title': 'title',
-                            'Amount': 'amount',
-                            'Category': 'category',
-                            'Sub Category': 'sub_category',
-                            'Payment Method': 'payment_method'
-                        }
-                        
-                        existing_columns = {k: v for k, v in column_mapping.items() if k in df.columns}
-                        df = df.rename(columns=existing_columns)
-                        
-                        # Drop fully empty rows
-                        df = df.dropna(subset=['title', 'amount'], how='all')
-                        
-                        for _, row in df.iterrows():
-                            # Skip if title or amount is empty (could be the SUM row or empty space)
-                            if pd.isna(row.get('title')) or pd.isna(row.get('amount')):
-                                continue
-                                
-                            try:
-                                # Parse date safely
-                                date_val = row.get('date')
-                                if isinstance(date_val, str):
-                                    date_obj = datetime.strptime(date_val, '%Y-%m-%d').date()
-                                elif hasattr(date_val, 'date'):
-                                    date_obj = date_val.date()
-                                else:
-                                    date_obj = datetime.utcnow().date()
-                                    
-                                # Check if transaction already exists (optional, but good for idempotency)
-                                # For simplicity, we'll just add them. 
-                                # A better check would be (user_id, date, title, amount)
-                                
-                                transaction = Transaction(
-                                    user_id=user.id,
-                                    date=date_obj,
-                                    title=str(row.get('title', '')),
-                                    amount=float(row.get('amount', 0)),
-                                    category=str(row.get('category', 'Other')),
-                                    sub_category=str(row.get('sub_category', '')),
-                                    payment_method=str(row.get('payment_method', ''))
-                                )
-                                db.session.add(transaction)
-                            except Exception as e:
-                                print(f"    Error processing row: {e}")
-                                
+                        for start in range(0, len(new_rows), batch_size):
+                            db.session.execute(insert(Transaction), new_rows[start:start + batch_size])
+                        RollupService.apply_many([RollupService.snapshot(row) for row in new_rows])
                         db.session.commit()
-                        print(f"  Completed migration for {file_name}")
-                        
                     except Exception as e:
-                        print(f"  Error reading {file_name}: {e}")
                         db.session.rollback()
+                        # The rows never landed, so forget them for dedup purposes
+                        fingerprints.pop(user_id, None)
+                        print(f"  Error writing {file_path}: {e}")
+                        totals['failed_files'] += 1
+                        continue
+
+                if not dry_run:
+                    checkpoint[file_path] = _file_signature(file_path)
+                    _save_checkpoint(checkpoint_path, checkpoint)
+
+                totals['parsed'] += len(rows)
+                totals['inserted'] += len(new_rows)
+                totals['duplicates'] += len(rows) - len(new_rows)
+                totals['errors'] += len(errors)
+
+                elapsed = time.perf_counter() - started
+                rate = totals['parsed'] / elapsed if elapsed else 0
+                print(f"  [{done}/{len(tasks)}] {file_path}: {len(rows)} rows, "
+                      f"{len(new_rows)} new, {len(rows) - len(new_rows)} duplicate, {len(errors)} bad "
+                      f"({rate:,.0f} rows/s)")
+                for row_number, reason in errors[:10]:
+                    print(f"    skipped row {row_number}: {reason}")
+                if len(errors) > 10:
+                    print(f"    ... and {len(errors) - 10} more")
+
+        elapsed = time.perf_counter() - started
+        verb = "Would insert" if dry_run else "Inserted"
+        print(f"{verb} {totals['inserted']} of {totals['parsed']} rows "
+              f"({totals['duplicates']} duplicates, {totals['errors']} bad rows, "
+              f"{totals['failed_files']} failed files) in {elapsed:.1f}s "
+              f"= {totals['parsed'] / elapsed if elapsed else 0:,.0f} rows/s")
 
 if __name__ == "__main__":
-    migrate_data()
+    parser = argparse.ArgumentParser(description="Migrate Excel sheets in Sheets/ into the database")
+    parser.add_argument('--sheets-dir', default=config.SHEETS_ROOT)
+    parser.add_argument('--workers', type=int, default=None, help="Parser processes (default: CPU count)")
+    parser.add_argument('--batch-size', type=int, default=1000, help="Rows per executemany batch")
+    parser.add_argument('--dry-run', action='store_true', help="Parse and dedup only, write nothing")
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT, help="Checkpoint file for resuming")
+    parser.add_argument('--no-resume', action='store_true', help="Ignore the checkpoint and rescan every sheet")
+    args = parser.parse_args()
+
+    migrate_data(sheets_dir=args.sheets_dir, workers=args.workers, batch_size=args.batch_size,
+                 dry_run=args.dry_run, checkpoint_path=args.checkpoint, resume=not args.no_resume)
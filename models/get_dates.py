@@ -1,4 +1,4 @@
-from datetime import date
+from datetime import date, timedelta
 
 def get_current_month_and_year():
     dict = {
@@ -14,6 +14,61 @@ def get_current_month_and_year():
 
     return dict
 
+def get_month_range(year, month):
+    """Return the half-open [start, end) date range covering one month"""
+    start = date(int(year), int(month), 1)
+    if start.month == 12:
+        end = date(start.year + 1, 1, 1)
+    else:
+        end = date(start.year, start.month + 1, 1)
+    return start, end
+
+def get_day_range(year, month, day):
+    """Return the half-open [start, end) date range covering one day"""
+    start = date(int(year), int(month), int(day))
+    return start, start + timedelta(days=1)
+
+def get_period_range(year, month=None, day=None, start=None, end=None):
+    """Resolve a day, month or custom period into a half-open [start, end) range.
+
+    A custom period is given with ``start``/``end`` dates, where ``end`` is inclusive
+    (the way it is picked in a form) and is turned into the exclusive bound here.
+    """
+    if start is not None or end is not None:
+        if start is None or end is None:
+            raise ValueError("A custom period needs both start and end")
+        return start, end + timedelta(days=1)
+    if day:
+        return get_day_range(year, month, day)
+    if month:
+        return get_month_range(year, month)
+    return date(int(year), 1, 1), date(int(year) + 1, 1, 1)
+
+def get_week_range(year, week):
+    """Return the half-open [start, end) date range covering an ISO week (Monday to Sunday)"""
+    start = date.fromisocalendar(int(year), int(week), 1)
+    return start, start + timedelta(days=7)
+
+def get_quarter_range(year, quarter):
+    """Return the half-open [start, end) date range covering a calendar quarter (1-4)"""
+    start = date(int(year), 3 * (int(quarter) - 1) + 1, 1)
+    return start, get_month_range(start.year, start.month + 2)[1]
+
+SPANS = ('week', 'month', 'quarter', 'year')
+
+def get_span_range(span, on):
+    """Return the half-open [start, end) range of the week, month, quarter or year containing ``on``"""
+    if span == 'week':
+        iso = on.isocalendar()
+        return get_week_range(iso[0], iso[1])
+    if span == 'month':
+        return get_month_range(on.year, on.month)
+    if span == 'quarter':
+        return get_quarter_range(on.year, (on.month - 1) // 3 + 1)
+    if span == 'year':
+        return get_period_range(on.year)
+    raise ValueError(f"Unknown span: {span}")
+
 if __name__ == "__main__":
     print('getting date in main file..\n')
     todays_date = get_current_month_and_year()
@@ -0,0 +1,63 @@
+from models import db
+from datetime import datetime
+
+class SpendingRollup(db.Model):
+    __tablename__ = 'spending_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'year', 'month', 'category', 'sub_category', 'payment_method',
+                            name='uq_spending_rollup_bucket'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    category = db.Column(db.String(100), nullable=False)
+    # Empty string instead of NULL so the unique bucket key works on every backend
+    sub_category = db.Column(db.String(100), nullable=False, default='')
+    payment_method = db.Column(db.String(100), nullable=False, default='')
+    total = db.Column(db.Float, nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    min_amount = db.Column(db.Float)
+    max_amount = db.Column(db.Float)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'year': self.year,
+            'month': self.month,
+            'category': self.category,
+            'sub_category': self.sub_category,
+            'payment_method': self.payment_method,
+            'total': self.total,
+            'count': self.count,
+            'min_amount': self.min_amount,
+            'max_amount': self.max_amount
+        }
+
+class CategorySpend(db.Model):
+    """Running spent total per user, month and category, kept next to the rollup buckets"""
+    __tablename__ = 'category_spend'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'year', 'month', 'category', name='uq_category_spend_bucket'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    category = db.Column(db.String(100), nullable=False)
+    total = db.Column(db.Float, nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'year': self.year,
+            'month': self.month,
+            'category': self.category,
+            'total': self.total,
+            'count': self.count
+        }
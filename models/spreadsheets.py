@@ -1,6 +1,5 @@
-import openpyxl
-from openpyxl.styles import Alignment
 from datetime import datetime
+from services.sheet_storage import sheet_storage
 
 class SpreadSheet:
     def __init__(self, sheet_name, user):
@@ -8,14 +7,16 @@ class SpreadSheet:
         self.user = user
 
     def create_sheet(self):
+        import openpyxl  # Imported on first use to keep startup light
         workbook = openpyxl.Workbook()
-        workbook.save(f'{self.sheet_name}.xlsx')
+        sheet_storage.save_workbook(workbook, sheet_storage.sheet_path(self.user.user_name, self.sheet_name))
         return workbook
     
     def create_sheet_path(self):
         self.sheet_path = self.user.current_sheet_path
 
     def is_blank(self):
+        import openpyxl
         self.create_sheet_path()
         workbook = openpyxl.load_workbook(self.sheet_path)
         sheet = workbook.active
@@ -27,10 +28,36 @@ class SpreadSheet:
         return True
 
     def apply_template(self):
+        import openpyxl
         self.create_sheet_path()
-        workbook = openpyxl.load_workbook(self.sheet_path)
-        sheet = workbook.active
+        with sheet_storage.lock(self.sheet_path):
+            workbook = openpyxl.load_workbook(self.sheet_path)
+            self._apply_template(workbook.active)
+            sheet_storage.save_workbook(workbook, self.sheet_path)
+
+    def create_templated_sheet(self, sheet_path):
+        """Create a new sheet at ``sheet_path`` with the template already applied, in a single save"""
+        import openpyxl
+        workbook = openpyxl.Workbook()
+        self._apply_template(workbook.active)
+        sheet_storage.save_workbook(workbook, sheet_path)
+        self.sheet_path = sheet_path
+        return workbook
 
+    @staticmethod
+    def has_template(sheet_path):
+        """Cheap check for the heading row, reading only the first rows of the sheet"""
+        import openpyxl
+        workbook = openpyxl.load_workbook(sheet_path, read_only=True)
+        try:
+            for row in workbook.active.iter_rows(min_row=3, max_row=3, max_col=1, values_only=True):
+                return row[0] == "Sr No"
+            return False
+        finally:
+            workbook.close()
+
+    def _apply_template(self, sheet):
+        from openpyxl.styles import Alignment
         # Define the headings that match the input form fields in transactions.html
         headings = ["Sr No", "Date", "Transaction Title", "Amount", "Category", "Sub Category", "Payment Method"]
 
@@ -74,7 +101,5 @@ class SpreadSheet:
         amount_column = 'D'  # Assuming "Amount" is in column D
         sheet.cell(row=3, column=len(headings) + 1, value=f"=SUM({amount_column}4:{amount_column}{max_row})").alignment = Alignment(horizontal='center', vertical='center')
 
-        workbook.save(self.sheet_path)
-
     def get_current_date(self):
         return datetime.now().strftime("%Y-%m-%d")
@@ -3,6 +3,13 @@ from datetime import datetime
 
 class Transaction(db.Model):
     __tablename__ = 'transactions'
+    __table_args__ = (
+        db.Index('ix_transactions_user_date', 'user_id', 'date'),
+        db.Index('ix_transactions_user_category_date', 'user_id', 'category', 'date'),
+        db.Index('ix_transactions_user_date_amount', 'user_id', 'date', 'amount'),
+        # Dedup key used by migrate_to_db.py
+        db.Index('ix_transactions_fingerprint', 'user_id', 'date', 'title', 'amount'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -16,6 +23,11 @@ class Transaction(db.Model):
 
     user = db.relationship('User', backref=db.backref('transactions', lazy=True))
 
+    @staticmethod
+    def in_period(start, end):
+        """Sargable half-open date filter, see models.get_dates.get_period_range"""
+        return db.and_(Transaction.date >= start, Transaction.date < end)
+
     def to_dict(self):
         return {
             'id': self.id,
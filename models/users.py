@@ -1,11 +1,13 @@
 from models.get_dates import get_current_month_and_year
 import os
 from models.spreadsheets import SpreadSheet
+from services.sheet_storage import sheet_storage
 from models import db
-from sqlalchemy import func, JSON
+from sqlalchemy import JSON
+from sqlalchemy.orm import deferred
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
-from werkzeug.security import check_password_hash, generate_password_hash
+from services.password_hasher import password_hasher
 
 # db = SQLAlchemy()  # Removed redundant initialization
 
@@ -17,14 +19,15 @@ class User(UserMixin, db.Model):
     user_name = db.Column(db.String(50), unique=True, nullable=False)
     password = db.Column(db.String(100), nullable=False)
     email_id = db.Column(db.String(100), unique=True, nullable=False)
-    all_sheets = db.Column(JSON, default = dict)
+    # Only the sheet paths code reads this, so it isn't loaded with the row
+    all_sheets = deferred(db.Column(JSON, default = dict))
 
     def __init__(self, first_name, last_name, user_name, password, email_id):
         self.first_name = first_name
         self.last_name = last_name
         self.email_id = email_id
         self.user_name = user_name
-        self.password = generate_password_hash(password)  # Hash the password
+        self.password = password_hasher.hash(password)  # Hash the password on the bounded hashing pool
         self.current_sheet_path = None
         self.current_sheet_name = None
         self.make_user_dir()
@@ -70,91 +73,43 @@ class User(UserMixin, db.Model):
 
     def sync_all_sheets_with_directory(self):
         """Ensure all sheets in the user's directory are present in all_sheets."""
-        user_dir = f'Sheets/{self.user_name}'
+        user_dir = sheet_storage.user_dir(self.user_name)
 
         # If the directory doesn't exist, create it
         if not os.path.exists(user_dir):
             self.make_user_dir()
             return
 
-        # Fetch all_sheets from the database
-        user_record = User.query.filter_by(id=self.id).first()
-        all_sheets = user_record.all_sheets if user_record and user_record.all_sheets else {}
+        all_sheets = dict(self.all_sheets or {})
 
         # List all files in the user's directory
         for file_name in os.listdir(user_dir):
             if file_name.endswith('.xlsx'):
-                sheet_path = f'{user_dir}/{file_name}'
+                sheet_path = os.path.join(user_dir, file_name)
                 sheet_name = file_name.replace('.xlsx', '')
 
                 # Add missing sheets to all_sheets
                 if sheet_name not in all_sheets:
                     all_sheets[sheet_name] = sheet_path
 
-        # Commit updated all_sheets to the database
-        User.query.filter_by(id=self.id).update({User.all_sheets: all_sheets})
-        db.session.commit()
+        # Only write when something new turned up; a user that isn't saved yet keeps it for its INSERT
+        if all_sheets != (self.all_sheets or {}):
+            self.all_sheets = all_sheets
+            if self.id is not None:
+                db.session.commit()
 
     def get_current_sheet(self):
         """Get or create the current month's sheet and return its path"""
+        from services.sheet_manager import sheet_manager
+
         # Force refresh dates
         self.get_todays_date()
 
-        # Synchronize all_sheets with the user's directory
-        self.sync_all_sheets_with_directory()
-
-        # Current month sheet name
-        file_name = f'{self.month}_{self.year}'
-        sheet_path = f'Sheets/{self.user_name}/{file_name}.xlsx'
-
-        # Fetch all_sheets from the database
-        user_record = User.query.filter_by(id=self.id).first()
-        all_sheets = user_record.all_sheets if user_record and user_record.all_sheets else {}
-
-        # Create user directory if it doesn't exist
-        if not os.path.exists(f'Sheets/{self.user_name}'):
-            self.make_user_dir()
-
-        # Create new sheet if it doesn't exist
-        if not os.path.exists(sheet_path):
-            try:
-                # Save current working directory
-                original_dir = os.getcwd()
-                os.chdir(f'{os.getcwd()}/Sheets/{self.user_name}')
-
-                # Create new sheet
-                sheet = SpreadSheet(file_name, self)
-                sheet.create_sheet()
-
-                # Return to original directory
-                os.chdir(original_dir)
-
-                # Add the new sheet to all_sheets and commit to the database
-                all_sheets[file_name] = sheet_path
-                User.query.filter_by(id=self.id).update({User.all_sheets: all_sheets})
-                db.session.commit()
-
-            except Exception as e:
-                print(f"Error creating sheet: {str(e)}")
-                return False
-
-        # Ensure the sheet is in all_sheets even if it already exists
-        if file_name not in all_sheets:
-            all_sheets[file_name] = sheet_path
-            User.query.filter_by(id=self.id).update({User.all_sheets: all_sheets})
-            db.session.commit()
-
-        # Update current sheet variables
-        self.current_sheet_path = sheet_path
-        self.current_sheet_name = file_name
-
-        # Apply template if sheet is blank
+        # Served from the sheet manager's cache except on month rollover or a missing sheet
         try:
-            sheet = SpreadSheet(self.current_sheet_name, self)
-            if sheet.is_blank():
-                sheet.apply_template()
+            self.current_sheet_name, self.current_sheet_path = sheet_manager.current_sheet(self)
         except Exception as e:
-            print(f"Error applying template: {str(e)}")
+            print(f"Error preparing sheet: {str(e)}")
             return False
 
         return True
@@ -166,37 +121,23 @@ class User(UserMixin, db.Model):
         self.year = today['Year']
 
     def make_user_dir(self):
-        #Make Sheets Dir if it doesn't exist
+        #Make the user's dir under the sheets root if it doesn't exist
         #and if it exist, pass
-        os.makedirs('Sheets', exist_ok=True)
-        
-        #verify if the user's dir already exist in sheets dir
-        path = f'Sheets/{self.user_name}'
-        verify_users_sheet_dir = os.path.exists(path)
-        print(f'{self.user_name} dir is {verify_users_sheet_dir = }')
-
-        #if dir doesnt not exist then create one
-        if verify_users_sheet_dir == False:
-            os.chdir('Sheets')
-
-            os.makedirs(f'{self.user_name}', exist_ok=True)
+        created = sheet_storage.ensure_user_dir(self.user_name)
+        if created:
             print(f'{self.first_name} user dir created')
-            os.chdir('../')
-            return
-        else:
-            return
         
     def update_user_dir_name(self,prev_user_name, new_user_name):
         print('\n\nTrying to change user dir\n\n')
         if new_user_name == prev_user_name:
             return
         else:
-            print('\n\nVerifying user dir\n\n')
-            verify_user_dir = os.path.exists(f'Sheets/{prev_user_name}')
-            print(f'{verify_user_dir = }')
-            if verify_user_dir:
-                print('\n\nChanging user dir\n\n')
-                os.rename(f"Sheets/{prev_user_name}", f"Sheets/{new_user_name}")
+            print('\n\nChanging user dir\n\n')
+            from services.sheet_manager import sheet_manager
+            with sheet_storage.lock(sheet_storage.user_dir(prev_user_name)):
+                renamed = sheet_storage.rename_user_dir(prev_user_name, new_user_name)
+            if renamed:
+                sheet_manager.invalidate(prev_user_name)
                 print("\n\nUser Dir's Name Changed Successfully\n\n")
 
                 self.update_user_dir_in_allsheets(prev_user_name, new_user_name)
@@ -204,29 +145,14 @@ class User(UserMixin, db.Model):
                 return
             
     def update_user_dir_in_allsheets(self,prev_user_name, new_user_name):
-        # "Sheets/omeher/March_2025.xlsx"
-
-        for item in self.all_sheets:
-            print(f'\n{self.all_sheets[item] = }')
-            s = self.all_sheets[item]
-            new_value = s.replace(prev_user_name, new_user_name)
-
-            print(f'{new_value = }')
-
-            User.query.filter_by(id=self.id).update(
-                {User.all_sheets: func.json_set(
-                    User.all_sheets, f'$.{item}', new_value)})
-
-
-            db.session.commit()
-            print(f'{self.all_sheets[item] = }\n')
-            
-
+        # Rebuild each path from its sheet name: replacing the old username in an
+        # absolute path would also hit it in SHEETS_ROOT or any other segment
+        self.all_sheets = {item: sheet_storage.sheet_path(new_user_name, item) for item in (self.all_sheets or {})}
         db.session.commit()
         print('\nAll Sheets Updated Successfully\n')
 
     def check_password(self, password):
-        return check_password_hash(self.password, password)
+        return password_hasher.verify(self.password, password)
 
 
 
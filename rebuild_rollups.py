@@ -0,0 +1,27 @@
+import argparse
+from app import create_app
+from models.users import User, db
+from services.rollup_service import RollupService
+
+def rebuild_rollups(user_name=None):
+    app = create_app()
+    with app.app_context():
+        # Ensure the rollup and category counter tables exist on databases created before them
+        db.create_all()
+
+        if user_name:
+            user = User.get_by_user_name(user_name)
+            if not user:
+                print(f"No user named {user_name}")
+                return
+            buckets = RollupService.rebuild(user.id)
+            print(f"Rebuilt {buckets} rollup buckets for {user_name}")
+        else:
+            buckets = RollupService.rebuild()
+            print(f"Rebuilt {buckets} rollup buckets for all users")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill the spending rollup and category counters from transaction history")
+    parser.add_argument('--user', help="Only rebuild this username")
+    args = parser.parse_args()
+    rebuild_rollups(args.user)
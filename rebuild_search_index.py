@@ -0,0 +1,19 @@
+from app import create_app
+from services.search_service import SearchService
+
+def rebuild_search_index():
+    app = create_app()
+    with app.app_context():
+        # A newly created index is populated by ensure_index, so only an existing one is rebuilt here
+        existed = SearchService.is_available()
+        if not SearchService.ensure_index():
+            print("Full-text search needs SQLite with FTS5; searches will use ILIKE instead")
+            return
+        if not existed:
+            print(f"Created {SearchService.TABLE} and indexed every transaction")
+            return
+        rows = SearchService.rebuild()
+        print(f"Indexed {rows} transactions in {SearchService.TABLE}")
+
+if __name__ == "__main__":
+    rebuild_search_index()
@@ -1,8 +1,10 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
 from models.budget_recurring import Budget, RecurringTransaction, db
-from models.transactions import Transaction
-from sqlalchemy import func
+from services.budget_service import BudgetService
+from services.cache import result_cache
+from services.db_engine import db_engine
+from services.recurring_scheduler import RecurringScheduler
 from datetime import datetime
 
 budget_bp = Blueprint('budget', __name__)
@@ -14,57 +16,46 @@ def manage_budgets():
         category = request.form.get('category')
         amount = request.form.get('amount')
         now = datetime.now()
-        
-        # Check if budget for this category and month already exists
-        budget = Budget.query.filter_by(
-            user_id=current_user.id, 
-            category=category, 
-            month=now.month, 
-            year=now.year
-        ).first()
-        
-        if budget:
-            budget.amount = float(amount)
-        else:
-            budget = Budget(
-                user_id=current_user.id,
-                category=category,
-                amount=float(amount),
-                month=now.month,
+
+        def save():
+            # Check if budget for this category and month already exists
+            budget = Budget.query.filter_by(
+                user_id=current_user.id, 
+                category=category, 
+                month=now.month, 
                 year=now.year
-            )
-            db.session.add(budget)
+            ).first()
             
-        db.session.commit()
+            if budget:
+                budget.amount = float(amount)
+            else:
+                budget = Budget(
+                    user_id=current_user.id,
+                    category=category,
+                    amount=float(amount),
+                    month=now.month,
+                    year=now.year
+                )
+                db.session.add(budget)
+                
+            db.session.commit()
+
+        # Run again with backoff if another writer holds the SQLite lock
+        db_engine.write(save)
+        result_cache.invalidate_for_budget(current_user.id, now.year, now.month)
         flash(f'Budget for {category} updated!', 'success')
         return redirect(url_for('budget.manage_budgets'))
 
     # GET request
     now = datetime.now()
-    budgets = Budget.query.filter_by(user_id=current_user.id, month=now.month, year=now.year).all()
-    
-    # Get actual spending per category for this month
-    spending_data = db.session.query(
-        Transaction.category, func.sum(Transaction.amount)
-    ).filter(
-        Transaction.user_id == current_user.id,
-        db.extract('month', Transaction.date) == now.month,
-        db.extract('year', Transaction.date) == now.year
-    ).group_by(Transaction.category).all()
-    
-    spending_dict = {s[0]: float(s[1]) for s in spending_data}
-    
-    budget_list = []
-    for b in budgets:
-        spent = spending_dict.get(b.category, 0)
-        budget_list.append({
-            'category': b.category,
-            'budget_amount': b.amount,
-            'spent_amount': spent,
-            'remaining': b.amount - spent,
-            'percent': min(100, (spent / b.amount * 100)) if b.amount > 0 else 0
-        })
-        
+    cache_key = (current_user.id, 'budgets', (now.year, now.month))
+    hit, budget_list = result_cache.get(cache_key)
+    if hit:
+        return render_template('budgets.html', budgets=budget_list)
+
+    # Spending per category comes from the running counters, joined in one query
+    budget_list = BudgetService.month_status(current_user.id, now.year, now.month)
+    result_cache.set(cache_key, budget_list)
     return render_template('budgets.html', budgets=budget_list)
 
 @budget_bp.route('/recurring', methods=['GET', 'POST'])
@@ -89,7 +80,12 @@ def manage_recurring():
         )
         db.session.add(recurring)
         db.session.commit()
-        flash('Recurring transaction added!', 'success')
+        # Log it now if it's already due this month, rather than at the next scheduled sweep
+        created = RecurringScheduler.sweep(user_id=current_user.id)
+        if created:
+            flash(f'Recurring transaction added and {created} due transaction(s) logged.', 'success')
+        else:
+            flash('Recurring transaction added!', 'success')
         return redirect(url_for('budget.manage_recurring'))
         
     recurring_txs = RecurringTransaction.query.filter_by(user_id=current_user.id).all()
@@ -0,0 +1,98 @@
+from flask import Blueprint, Response, abort, current_app, jsonify, request
+from functools import wraps
+from sqlalchemy import text
+from models import db
+from services.metrics import metrics
+import config
+import hmac
+import os
+
+ops_bp = Blueprint('ops', __name__)
+
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+def ops_only(view):
+    """Serve ``view`` only to holders of OPS_TOKEN, or to local requests when no token is set"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = current_app.config.get('OPS_TOKEN', config.OPS_TOKEN)
+        if token:
+            supplied = request.headers.get('Authorization', '')
+            if not hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode()):
+                abort(403)
+        elif request.remote_addr not in LOCAL_ADDRESSES:
+            abort(403)
+        return view(*args, **kwargs)
+    return wrapper
+
+@ops_bp.route('/metrics', methods=['GET'])
+@ops_only
+def prometheus_metrics():
+    from services.excel_queue import excel_queue
+    from services.cache import result_cache
+    from services.sheet_manager import sheet_manager
+    from services.user_cache import user_cache
+    from services.db_engine import db_engine
+    from services.group_commit import group_writer
+
+    cache = result_cache.stats()
+    users = user_cache.stats()
+    writes = db_engine.stats()
+    group = group_writer.stats()
+    extra = [
+        '# HELP excel_queue_pending Excel operations waiting to be written',
+        '# TYPE excel_queue_pending gauge',
+        f'excel_queue_pending {excel_queue.pending_count()}',
+        '# HELP result_cache_entries Entries in the view result cache',
+        '# TYPE result_cache_entries gauge',
+        f'result_cache_entries {cache["size"]}',
+        '# HELP result_cache_events_total Result cache hits, misses, evictions and invalidations',
+        '# TYPE result_cache_events_total counter',
+    ]
+    for event in ('hits', 'misses', 'evictions', 'expirations', 'invalidations'):
+        extra.append(f'result_cache_events_total{{event="{event}"}} {cache[event]}')
+    extra += [
+        '# HELP sheet_manager_lookups_total Current-sheet lookups served from memory (hit) or the filesystem (miss)',
+        '# TYPE sheet_manager_lookups_total counter',
+        f'sheet_manager_lookups_total{{result="hit"}} {sheet_manager.hits}',
+        f'sheet_manager_lookups_total{{result="miss"}} {sheet_manager.misses}',
+        '# HELP user_cache_lookups_total User loader lookups served from the identity cache (hit) or the database (miss)',
+        '# TYPE user_cache_lookups_total counter',
+        f'user_cache_lookups_total{{result="hit"}} {users["hits"]}',
+        f'user_cache_lookups_total{{result="miss"}} {users["misses"]}',
+        '# HELP db_write_retries_total Writes run again after "database is locked" (retried) or abandoned (gave_up)',
+        '# TYPE db_write_retries_total counter',
+        f'db_write_retries_total{{result="retried"}} {writes["retries"]}',
+        f'db_write_retries_total{{result="gave_up"}} {writes["gave_up"]}',
+        '# HELP group_commit_events_total Small writes acknowledged, commits they shared, and repeats of an idempotency key',
+        '# TYPE group_commit_events_total counter',
+    ]
+    for event in ('writes', 'batches', 'duplicates'):
+        extra.append(f'group_commit_events_total{{event="{event}"}} {group[event]}')
+    return Response(metrics.render(extra), mimetype='text/plain; version=0.0.4')
+
+@ops_bp.route('/cache_stats', methods=['GET'])
+@ops_only
+def cache_stats():
+    from services.cache import result_cache
+    return jsonify(result_cache.stats())
+
+@ops_bp.route('/healthz', methods=['GET'])
+def health():
+    # Liveness: the process is up and serving requests
+    return jsonify({"status": "ok"})
+
+@ops_bp.route('/readyz', methods=['GET'])
+def readiness():
+    checks = {}
+    try:
+        db.session.execute(text('SELECT 1'))
+        checks['database'] = 'ok'
+    except Exception as e:
+        checks['database'] = f'error: {e}'
+
+    sheets_root = current_app.config.get('SHEETS_ROOT')
+    checks['sheets_root'] = 'ok' if sheets_root and os.access(sheets_root, os.W_OK) else 'not writable'
+
+    ready = all(value == 'ok' for value in checks.values())
+    return jsonify({"status": "ready" if ready else "unavailable", "checks": checks}), 200 if ready else 503
@@ -1,11 +1,33 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
 from models.budget_recurring import QuickCard, db
-from models.transactions import Transaction
+from services.budget_service import BudgetService
+from services.group_commit import group_writer
 from datetime import datetime
+import logging
+import uuid
 
 quick_bp = Blueprint('quick', __name__)
 
+def _log_card(card, key):
+    """Log one transaction from ``card`` dated today; a repeated ``key`` returns the first one's id"""
+    row = {
+        'date': datetime.now().date(),
+        'title': card.title,
+        'amount': card.amount,
+        'category': card.category,
+        'sub_category': card.sub_category,
+        'payment_method': card.payment_method,
+        'created_at': datetime.utcnow()
+    }
+    result = group_writer.submit(current_user.id, [row], key=key)
+    return result['ids'][0], result['duplicate'], row['date']
+
+def _idempotency_key(value):
+    if value and len(value) > 64:
+        raise ValueError("Idempotency key must be at most 64 characters")
+    return value or None
+
 @quick_bp.route('/quick_map', methods=['GET', 'POST'])
 @login_required
 def quick_map():
@@ -17,18 +39,24 @@ def quick_map():
             card_id = request.form.get('card_id')
             card = QuickCard.query.get(card_id)
             if card and card.user_id == current_user.id:
-                new_tx = Transaction(
-                    user_id=current_user.id,
-                    date=datetime.now().date(),
-                    title=card.title,
-                    amount=card.amount,
-                    category=card.category,
-                    sub_category=card.sub_category,
-                    payment_method=card.payment_method
-                )
-                db.session.add(new_tx)
-                db.session.commit()
+                try:
+                    # The page renders a key per card, so a double tap or resubmit logs once
+                    key = _idempotency_key(request.form.get('idempotency_key') or request.headers.get('Idempotency-Key'))
+                    _, duplicate, logged_on = _log_card(card, key)
+                except ValueError as e:
+                    flash(str(e), 'danger')
+                    return redirect(url_for('quick.quick_map'))
+                except Exception as e:
+                    logging.error(f"Error logging quick card {card_id}: {e}")
+                    flash('Error saving to database', 'danger')
+                    return redirect(url_for('quick.quick_map'))
+                if duplicate:
+                    flash(f'Transaction "{card.title}" was already logged.', 'info')
+                    return redirect(url_for('quick.quick_map'))
                 flash(f'Transaction "{card.title}" logged successfully!', 'success')
+                budget_status = BudgetService.status(current_user.id, card.category, logged_on.year, logged_on.month)
+                if budget_status:
+                    flash(*BudgetService.notice(budget_status))
             return redirect(url_for('quick.quick_map'))
             
         elif action == 'create':
@@ -65,7 +93,24 @@ def quick_map():
 
     # GET request
     cards = QuickCard.query.filter_by(user_id=current_user.id).all()
-    return render_template('quick_map.html', quick_cards=cards)
+    return render_template('quick_map.html', quick_cards=cards, idempotency_key=uuid.uuid4().hex)
+
+@quick_bp.route('/api/quick_cards/<int:card_id>/log', methods=['POST'])
+@login_required
+def api_log_card(card_id):
+    card = QuickCard.query.get(card_id)
+    if not card or card.user_id != current_user.id:
+        return jsonify({"error": "Quick card not found"}), 404
+    try:
+        key = _idempotency_key(request.headers.get('Idempotency-Key') or (request.get_json(silent=True) or {}).get('idempotency_key'))
+        transaction_id, duplicate, _ = _log_card(card, key)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logging.error(f"Error logging quick card {card_id}: {e}")
+        return jsonify({"error": "Error saving to database"}), 500
+    # 200 for a repeated key, with the transaction the first request created
+    return jsonify({'id': transaction_id, 'duplicate': duplicate}), 200 if duplicate else 201
 
 @quick_bp.route('/quick_map/delete/<int:id>', methods=['POST'])
 @login_required
@@ -1,11 +1,17 @@
 from flask import Blueprint, render_template, request, send_file, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
 from services.transaction_services import TransactionServices, ExcelService  # Import ExcelService
+from services.excel_queue import excel_queue
+from services.cache import result_cache
+from services.budget_service import BudgetService
+from services.db_engine import db_engine
+from services.group_commit import group_writer
 import logging
 import io
+import uuid
 from datetime import datetime
 import os  # Add this import at the top with other imports
-import pandas as pd
+from models.get_dates import get_period_range
 
 transaction_bp = Blueprint('transaction', __name__)
 
@@ -36,51 +42,58 @@ def map_transaction():
 
         logging.debug(f"Received transaction data: {transaction_data}")
 
-        # Save to Database (New Primary)
+        # The form carries a key rendered with the page, so a resubmitted form records once
+        key = request.form.get('idempotency_key') or request.headers.get('Idempotency-Key')
+        if key and len(key) > 64:
+            flash('Invalid idempotency key', 'danger')
+            return redirect(url_for('transaction.map_transaction'))
+
+        # Save to Database (New Primary), committed together with concurrent small writes
         try:
-            from models.transactions import Transaction
-            from models import db
-            new_tx = Transaction(
-                user_id=current_user.id,
-                date=date_obj,
-                title=title,
-                amount=float(amount),
-                category=category,
-                sub_category=sub_category,
-                payment_method=payment_method
-            )
-            db.session.add(new_tx)
-            db.session.commit()
+            result = group_writer.submit(current_user.id, [{
+                'date': date_obj,
+                'title': title,
+                'amount': float(amount),
+                'category': category,
+                'sub_category': sub_category,
+                'payment_method': payment_method,
+                'created_at': datetime.utcnow()
+            }], key=key)
             logging.debug("Transaction saved to database successfully.")
         except Exception as e:
             logging.error(f"Error saving to database: {e}")
             flash('Error saving to database', 'danger')
             return redirect(url_for('transaction.map_transaction'))
 
-        # Append to Excel (Secondary/Backup)
+        if result['duplicate']:
+            flash('This transaction was already recorded', 'info')
+            return redirect(url_for('transaction.map_transaction'))
+
+        # Append to Excel (Secondary/Backup), written behind by the per-user queue
         try:
-            current_user.get_current_sheet()
-            ExcelService.append_transaction_data(current_user.current_sheet_path, transaction_data)
+            excel_queue.enqueue(current_user.id, 'append', transaction_data)
         except Exception as e:
-            logging.error(f"Error appending to Excel: {e}")
+            logging.error(f"Error queueing Excel append: {e}")
             # We don't flash error here as DB was successful
 
         flash('Transaction recorded successfully', 'success')
+        budget_status = BudgetService.status(current_user.id, category, date_obj.year, date_obj.month)
+        if budget_status:
+            flash(*BudgetService.notice(budget_status))
         return redirect(url_for('transaction.map_transaction'))
 
-    return render_template('transactions.html', action=url_for('transaction.map_transaction'))
+    return render_template('transactions.html', action=url_for('transaction.map_transaction'),
+                           idempotency_key=uuid.uuid4().hex)
 
 @transaction_bp.route('/view_transactions', methods=['GET', 'POST'])
 @login_required
 def view_transactions():
-    from models.transactions import Transaction
-    from models import db
-    
     # Get values from form or default to current month/year
     month_val = request.form.get('month')
     year_val = request.form.get('year')
     transaction_day = request.form.get('transaction_day', '')
     search_query = request.form.get('search_query', '')
+    search_all = bool(request.form.get('search_all'))
     category_filter = request.form.get('category', '')
     sort_by = request.form.get('sort_by', 'date_desc')
     
@@ -91,66 +104,101 @@ def view_transactions():
 
     logging.debug(f"Viewing transactions: {month_val} {year_val}, Day: {transaction_day}, Search: {search_query}, Category: {category_filter}, Sort: {sort_by}")
 
-    # Query from DB
-    try:
-        query = Transaction.query.filter_by(user_id=current_user.id)
-        
-        # Date Filter - if specific day is selected, use it
-        if transaction_day:
-            try:
-                day = int(transaction_day)
-                month_num = datetime.strptime(month_val, '%B').month
-                query = query.filter(db.extract('day', Transaction.date) == day)
-                query = query.filter(db.extract('month', Transaction.date) == month_num)
-                query = query.filter(db.extract('year', Transaction.date) == int(year_val))
-            except (ValueError, AttributeError):
-                # If day is invalid, fall back to month/year filter
-                month_num = datetime.strptime(month_val, '%B').month
-                query = query.filter(db.extract('month', Transaction.date) == month_num)
-                query = query.filter(db.extract('year', Transaction.date) == int(year_val))
-        else:
-            # Convert month name to number
-            month_num = datetime.strptime(month_val, '%B').month
-            query = query.filter(db.extract('month', Transaction.date) == month_num)
-            query = query.filter(db.extract('year', Transaction.date) == int(year_val))
-        
-        # Search Filter
-        if search_query:
-            query = query.filter(Transaction.title.ilike(f"%{search_query}%"))
-            
-        # Category Filter
-        if category_filter:
-            query = query.filter(Transaction.category == category_filter)
-            
-        # Sorting
-        if sort_by == 'date_asc':
-            query = query.order_by(Transaction.date.asc())
-        elif sort_by == 'amount_asc':
-            query = query.order_by(Transaction.amount.asc())
-        elif sort_by == 'amount_desc':
-            query = query.order_by(Transaction.amount.desc())
-        else: # date_desc
-            query = query.order_by(Transaction.date.desc())
-        
-        db_transactions = query.all()
-        transactions = [tx.to_dict() for tx in db_transactions]
-        
-        logging.debug(f"Found {len(transactions)} transactions in DB")
-    except Exception as e:
-        logging.error(f"Error querying database: {e}")
-        flash('Error retrieving transactions from database', 'error')
-        transactions = []
-
+    # Rows are fetched page by page from /api/transactions by the page itself
     return render_template('view_transactions.html',
-                           transactions=transactions,
                            request=request,
                            month_val=month_val,
                            year_val=year_val,
                            transaction_day=transaction_day,
                            search_query=search_query,
+                           search_all=search_all,
                            category_filter=category_filter,
                            sort_by=sort_by)
 
+def _filter_period(year_val, month_val, transaction_day=''):
+    """[start, end) for the month, or for one day of it when a valid day is given"""
+    month_num = datetime.strptime(month_val, '%B').month
+    if transaction_day:
+        try:
+            return get_period_range(int(year_val), month_num, int(transaction_day))
+        except (ValueError, AttributeError):
+            # If day is invalid, fall back to month/year filter
+            pass
+    return get_period_range(int(year_val), month_num)
+
+@transaction_bp.route('/api/transactions', methods=['GET'])
+@login_required
+def api_transactions():
+    from services.transaction_services import TransactionServices
+
+    now = datetime.now()
+    month_val = request.args.get('month') or now.strftime('%B')
+    year_val = request.args.get('year') or str(now.year)
+    sort_by = request.args.get('sort_by', 'date_desc')
+
+    try:
+        start, end = _filter_period(year_val, month_val, request.args.get('day', ''))
+        limit = int(request.args.get('limit', 50))
+        transactions, next_cursor = TransactionServices.page_transactions(
+            current_user.id, start, end,
+            category=request.args.get('category', ''),
+            search=request.args.get('search', ''),
+            sort_by=sort_by,
+            cursor=request.args.get('cursor'),
+            limit=limit
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        'transactions': transactions,
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    })
+
+@transaction_bp.route('/api/transactions/bulk', methods=['POST'])
+@login_required
+def bulk_transactions():
+    from services.bulk_ingest_service import BulkIngestService
+
+    payload = request.get_json(silent=True)
+    # Either a bare list of entries or {"transactions": [...], "atomic": true}
+    if isinstance(payload, dict):
+        entries, atomic = payload.get('transactions'), bool(payload.get('atomic', False))
+    else:
+        entries, atomic = payload, False
+    if not isinstance(entries, list) or not entries:
+        return jsonify({"error": "Expected a non-empty JSON list of transactions"}), 400
+    if len(entries) > BulkIngestService.MAX_ROWS:
+        return jsonify({"error": f"At most {BulkIngestService.MAX_ROWS} transactions per request"}), 413
+
+    try:
+        result = BulkIngestService.ingest(current_user, entries, atomic=atomic)
+    except Exception as e:
+        logging.error(f"Bulk insert failed: {e}")
+        return jsonify({"error": "Error saving to database"}), 500
+
+    if not result['inserted']:
+        return jsonify(result), 422
+    # 207: some entries were saved and the rest are listed in errors
+    return jsonify(result), 207 if result['errors'] else 201
+
+@transaction_bp.route('/api/transactions/search', methods=['GET'])
+@login_required
+def search_transactions():
+    from services.search_service import SearchService
+
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Missing search query"}), 400
+    try:
+        limit = max(1, min(int(request.args.get('limit', 50)), 200))
+    except ValueError:
+        return jsonify({"error": "Invalid limit"}), 400
+
+    results = SearchService.search(current_user.id, query, limit=limit)
+    return jsonify({'query': query, 'count': len(results), 'results': results})
+
 @transaction_bp.route('/download', methods=['GET', 'POST'])
 @login_required
 def download():
@@ -167,22 +215,24 @@ def download():
             return "Missing form parameters", 400
 
         # Generate the file content
-        file_path, file_response, file_name = TransactionServices.generate_file_content(month, year, user_id)
+        file_path, file_name = TransactionServices.generate_file_content(month, year, user_id)
 
         if file_path is None:
             return "Error generating file", 500
 
         if action == 'send_to_email':
             try:
-                # Send the file via email using the file path
-                TransactionServices.send_file_via_email(file_path, user_id)
-                return "File sent to email", 200
+                # Queue the email; the page polls /email_status/<job_id> for delivery
+                job_id = TransactionServices.queue_file_via_email(file_path, user_id, file_name)
+                if job_id is None:
+                    return "Failed to send file to email", 500
+                return jsonify({'job_id': job_id, 'status': 'queued'}), 202
             except Exception as e:
-                logging.error(f"Failed to send email: {e}")
+                logging.error(f"Failed to queue email: {e}")
                 return "Failed to send file to email", 500
         elif action == 'download':
             try:
-                response = file_response
+                response = send_file(file_path, as_attachment=True, download_name=f"{file_name}.xlsx")
                 # Set proper filename with quotes to handle special characters
                 response.headers['Content-Disposition'] = f'attachment; filename="{month}_{year}.xlsx"'
                 logging.debug(f'Content-Disposition: {response.headers["Content-Disposition"]}')
@@ -193,6 +243,15 @@ def download():
 
     return render_template('download.html')
 
+@transaction_bp.route('/email_status/<int:job_id>', methods=['GET'])
+@login_required
+def email_status(job_id):
+    from models.email_jobs import EmailJob
+    job = EmailJob.query.get(job_id)
+    if not job or job.user_id != current_user.id:
+        return jsonify({"error": "Email job not found"}), 404
+    return jsonify(job.to_dict())
+
 @transaction_bp.route('/handle_submit', methods=['POST'])
 def handle_submit():
     month = request.form.get("month")
@@ -211,6 +270,7 @@ def handle_submit():
 def update_transaction():
     from models.transactions import Transaction
     from models import db
+    from services.rollup_service import RollupService
     try:
         transaction_id = request.form.get('transaction_id')
         title = request.form.get('title')
@@ -221,35 +281,54 @@ def update_transaction():
         date_str = request.form.get('date')
         
         # Update DB (Primary)
-        tx = Transaction.query.get(transaction_id)
-        if tx and tx.user_id == current_user.id:
+        def save():
+            tx = Transaction.query.get(transaction_id)
+            if not tx or tx.user_id != current_user.id:
+                return None, None
+            old_snapshot = RollupService.snapshot(tx)
+            old_values = {'date': tx.date.strftime('%Y-%m-%d'), 'title': tx.title, 'amount': tx.amount}
             tx.title = title
             tx.amount = float(amount)
             tx.category = category
             tx.sub_category = sub_category
             tx.payment_method = payment_method
             tx.date = datetime.strptime(date_str, '%Y-%m-%d').date()
+            RollupService.record_update(old_snapshot, tx)
             db.session.commit()
-            logging.debug(f"Transaction {transaction_id} updated in DB.")
-        else:
+            return tx, old_values
+
+        # Run again with backoff if another writer holds the SQLite lock
+        tx, old_values = db_engine.write(save)
+        if tx is None:
             flash('Transaction not found or unauthorized', 'error')
             return redirect(url_for('transaction.view_transactions'))
+        old_date = datetime.strptime(old_values['date'], '%Y-%m-%d').date()
+        result_cache.invalidate_for_transaction(current_user.id, old_date, tx.date)
+        logging.debug(f"Transaction {transaction_id} updated in DB.")
 
-        # Update Excel (Secondary)
+        # Update Excel (Secondary), matching the sheet row by its old values
         try:
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-            month = date_obj.strftime('%B')
-            year = date_obj.strftime('%Y')
-            file_path = os.path.join('Sheets', current_user.user_name, f"{month}_{year}.xlsx")
-            
-            if os.path.exists(file_path):
-                # ExcelService still expects sequential Sr No for ID? 
-                # Actually Transaction.id is DB id, but Sr No is Excel row counter.
-                # This might be tricky if they differ. 
-                # For now, we'll assume Sr No is handled by ExcelService logic.
-                # But we need a way to map DB ID to Excel Sr No if we want total sync.
-                # However, the user usually views data from DB now.
-                pass 
+            new_values = {
+                'match': old_values,
+                'date': date_str,
+                'title': title,
+                'amount': amount,
+                'category': category,
+                'sub_category': sub_category,
+                'payment_method': payment_method,
+            }
+            old_path = ExcelService.sheet_path_for(current_user.user_name, old_date)
+            new_path = ExcelService.sheet_path_for(current_user.user_name, tx.date)
+
+            if old_path == new_path:
+                if os.path.exists(old_path):
+                    excel_queue.enqueue(current_user.id, 'update', new_values, file_path=old_path)
+            else:
+                # The transaction moved to another month, so move its row between sheets
+                if os.path.exists(old_path):
+                    excel_queue.enqueue(current_user.id, 'delete', {'match': old_values}, file_path=old_path)
+                if os.path.exists(new_path):
+                    excel_queue.enqueue(current_user.id, 'append', new_values, file_path=new_path)
         except Exception as e:
             logging.error(f"Error syncing Excel update: {e}")
 
@@ -266,18 +345,36 @@ def update_transaction():
 def delete_transaction():
     from models.transactions import Transaction
     from models import db
+    from services.rollup_service import RollupService
     try:
         transaction_id = request.form.get('transaction_id')
         
         # Delete from DB (Primary)
-        tx = Transaction.query.get(transaction_id)
-        if tx and tx.user_id == current_user.id:
+        def delete():
+            tx = Transaction.query.get(transaction_id)
+            if not tx or tx.user_id != current_user.id:
+                return None
             db.session.delete(tx)
+            RollupService.record_delete(tx)
             db.session.commit()
-            logging.debug(f"Transaction {transaction_id} deleted from DB.")
-        else:
+            return tx
+
+        # Run again with backoff if another writer holds the SQLite lock
+        tx = db_engine.write(delete)
+        if tx is None:
             flash('Transaction not found or unauthorized', 'error')
             return redirect(url_for('transaction.view_transactions'))
+        result_cache.invalidate_for_transaction(current_user.id, tx.date)
+        logging.debug(f"Transaction {transaction_id} deleted from DB.")
+
+        # Delete from Excel (Secondary)
+        try:
+            file_path = ExcelService.sheet_path_for(current_user.user_name, tx.date)
+            if os.path.exists(file_path):
+                match = {'date': tx.date.strftime('%Y-%m-%d'), 'title': tx.title, 'amount': tx.amount}
+                excel_queue.enqueue(current_user.id, 'delete', {'match': match}, file_path=file_path)
+        except Exception as e:
+            logging.error(f"Error syncing Excel delete: {e}")
 
         flash('Transaction deleted successfully', 'success')
 
@@ -290,185 +387,35 @@ def delete_transaction():
 @transaction_bp.route('/spendings', methods=['GET', 'POST'])
 @login_required
 def spendings():
-    from models.transactions import Transaction
-    from models.budget_recurring import Budget
-    from models import db
-    
-    # Get values from form or default to current month/year
-    month_val = request.form.get('month')
-    year_val = request.form.get('year')
-    
-    if not month_val or not year_val:
-        now = datetime.now()
-        month_val = now.strftime('%B')
-        year_val = str(now.year)
-
-    spendings_data = {}
-    total_spendings = 0
-    insights = {}
+    from services.insights_engine import InsightsEngine
+
+    # Get values from form or default to the current month
+    now = datetime.now()
+    period = request.form.get('period') or 'month'
+    month_val = request.form.get('month') or now.strftime('%B')
+    year_val = request.form.get('year') or str(now.year)
+    week_val = request.form.get('week') or str(now.isocalendar()[1])
+
+    context = {
+        'spendings_data': {},
+        'total_spendings': 0,
+        'top_category': None,
+        'transaction_count': 0,
+        'daily_average': 0,
+        'insights': {},
+    }
 
     try:
-        # Convert month name to number
         month_num = datetime.strptime(month_val, '%B').month
-        current_year = int(year_val)
-        
-        # Get current month transactions
-        query = Transaction.query.filter_by(user_id=current_user.id)
-        query = query.filter(db.extract('month', Transaction.date) == month_num)
-        query = query.filter(db.extract('year', Transaction.date) == current_year)
-        
-        db_transactions = query.all()
-        
-        for tx in db_transactions:
-            category = tx.category or 'Other'
-            spendings_data[category] = spendings_data.get(category, 0) + tx.amount
-            total_spendings += tx.amount
-            
-        logging.debug(f"Calculated spendings for {month_val} {year_val}: {spendings_data}")
-        
-        # Calculate additional metrics for the dashboard
-        top_category = max(spendings_data.items(), key=lambda x: x[1])[0] if spendings_data else None
-        transaction_count = len(db_transactions)
-        daily_average = round(total_spendings / 30, 2) if total_spendings > 0 else 0
-        
-        # ===== INSIGHTS CALCULATION =====
-        
-        # 1. Top 3 and Bottom 3 categories
-        sorted_categories = sorted(spendings_data.items(), key=lambda x: x[1], reverse=True)
-        insights['top_3_categories'] = sorted_categories[:3] if len(sorted_categories) > 0 else []
-        insights['bottom_3_categories'] = sorted_categories[-3:] if len(sorted_categories) > 3 else []
-        
-        # 2. Previous month comparison
-        prev_month_num = month_num - 1 if month_num > 1 else 12
-        prev_year = current_year if month_num > 1 else current_year - 1
-        
-        prev_query = Transaction.query.filter_by(user_id=current_user.id)
-        prev_query = prev_query.filter(db.extract('month', Transaction.date) == prev_month_num)
-        prev_query = prev_query.filter(db.extract('year', Transaction.date) == prev_year)
-        prev_transactions = prev_query.all()
-        
-        prev_total = sum(tx.amount for tx in prev_transactions) if prev_transactions else 0
-        
-        if prev_total > 0:
-            spending_change = total_spendings - prev_total
-            spending_change_percent = round((spending_change / prev_total) * 100, 1)
-            insights['prev_month_spending'] = round(prev_total, 2)
-            insights['spending_change'] = round(spending_change, 2)
-            insights['spending_change_percent'] = spending_change_percent
-            insights['spending_trend'] = 'up' if spending_change > 0 else 'down'
-        else:
-            insights['prev_month_spending'] = 0
-            insights['spending_change'] = total_spendings
-            insights['spending_change_percent'] = 0
-            insights['spending_trend'] = 'stable'
-        
-        # 3. Category changes (which categories increased/decreased compared to previous month)
-        prev_spendings_data = {}
-        for tx in prev_transactions:
-            category = tx.category or 'Other'
-            prev_spendings_data[category] = prev_spendings_data.get(category, 0) + tx.amount
-        
-        category_changes = []
-        for category, current_amount in spendings_data.items():
-            prev_amount = prev_spendings_data.get(category, 0)
-            if prev_amount > 0:
-                change = round(current_amount - prev_amount, 2)
-                change_percent = round((change / prev_amount) * 100, 1)
-                category_changes.append({
-                    'category': category,
-                    'current': current_amount,
-                    'previous': prev_amount,
-                    'change': change,
-                    'change_percent': change_percent,
-                    'trend': 'up' if change > 0 else 'down'
-                })
-        
-        # Sort by change amount
-        insights['category_changes'] = sorted(category_changes, key=lambda x: abs(x['change']), reverse=True)[:5]
-        
-        # 4. Budget analysis
-        budgets = Budget.query.filter_by(user_id=current_user.id).all()
-        budget_alerts = []
-        total_budget = 0
-        
-        for budget in budgets:
-            if budget.category in spendings_data:
-                spent = spendings_data[budget.category]
-                budget_limit = budget.amount
-                total_budget += budget_limit
-                
-                if spent > budget_limit:
-                    overspend = round(spent - budget_limit, 2)
-                    overspend_percent = round((overspend / budget_limit) * 100, 1)
-                    budget_alerts.append({
-                        'category': budget.category,
-                        'limit': budget_limit,
-                        'spent': spent,
-                        'overspend': overspend,
-                        'overspend_percent': overspend_percent,
-                        'status': 'alert'
-                    })
-        
-        insights['budget_alerts'] = budget_alerts
-        insights['total_budget'] = round(total_budget, 2)
-        insights['budget_utilization'] = round((total_spendings / total_budget * 100), 1) if total_budget > 0 else 0
-        
-        # 5. Daily spending pattern (average per day, high day, low day)
-        daily_spending = {}
-        for tx in db_transactions:
-            day = tx.date.day
-            daily_spending[day] = daily_spending.get(day, 0) + tx.amount
-        
-        if daily_spending:
-            max_day = max(daily_spending.items(), key=lambda x: x[1])
-            min_day = min(daily_spending.items(), key=lambda x: x[1])
-            insights['highest_spending_day'] = (max_day[0], round(max_day[1], 2))
-            insights['lowest_spending_day'] = (min_day[0], round(min_day[1], 2))
-        
-        # 6. Recommendations based on patterns
-        recommendations = []
-        if insights['spending_trend'] == 'up' and insights['spending_change_percent'] > 10:
-            recommendations.append({
-                'type': 'warning',
-                'text': f"Your spending increased by {insights['spending_change_percent']}% compared to last month. Consider reviewing your expenses."
-            })
-        
-        if budget_alerts:
-            recommendations.append({
-                'type': 'alert',
-                'text': f"You've exceeded budget in {len(budget_alerts)} category(ies). Review your spending limits."
-            })
-        
-        if sorted_categories and sorted_categories[0][1] > total_spendings * 0.7:
-            recommendations.append({
-                'type': 'info',
-                'text': f"Your top category ({sorted_categories[0][0]}) accounts for {round(sorted_categories[0][1]/total_spendings*100, 1)}% of spending. This is concentrated."
-            })
-        
-        if daily_average > 0 and insights.get('highest_spending_day'):
-            high_day_spending = insights['highest_spending_day'][1]
-            if high_day_spending > daily_average * 3:
-                recommendations.append({
-                    'type': 'info',
-                    'text': f"Day {insights['highest_spending_day'][0]} had unusually high spending (₹{high_day_spending}). Check for bulk purchases."
-                })
-        
-        insights['recommendations'] = recommendations
-
+        start, end = InsightsEngine.period_range(period, int(year_val), month_num, int(week_val))
+        context = result_cache.get_or_compute(
+            (current_user.id, 'spendings', (period, start)),
+            lambda: InsightsEngine.for_user(current_user.id, period, start, end)
+        )
+        logging.debug(f"Calculated {period} spendings from {start}: {context['spendings_data']}")
     except Exception as e:
         logging.error(f"Error calculating spendings: {e}")
         flash('Error calculating spendings', 'error')
-        top_category = None
-        transaction_count = 0
-        daily_average = 0
-        insights = {}
-
-    return render_template('spendings.html',
-                           spendings_data=spendings_data,
-                           total_spendings=total_spendings,
-                           top_category=top_category,
-                           transaction_count=transaction_count,
-                           daily_average=daily_average,
-                           insights=insights,
-                           request=request,
-                           user=current_user)
+
+    return render_template('spendings.html', request=request, user=current_user,
+                           selected_period=period, selected_week=week_val, **context)
@@ -1,9 +1,10 @@
 from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash
 from services.user_services import UserService
+from services.user_cache import user_cache
 from models.users import db, User
 from forms import RegistrationForm, LoginForm
 from flask_login import login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash
+from services.password_hasher import password_hasher, HasherBusy
 
 user_bp = Blueprint("user", __name__, url_prefix='/user')
 
@@ -27,11 +28,14 @@ def create_user():
         if User.query.filter_by(user_name=data['user_name']).first() or User.query.filter_by(email_id=data['email_id']).first():
             return jsonify({"error": "Username or email already exists"}), 400
 
-        user = UserService.create_user(first_name = data['first_name'],
-                        last_name = data['last_name'],
-                        user_name = data['user_name'],
-                        password = data['password'],
-                        email_id = data['email_id'])
+        try:
+            user = UserService.create_user(first_name = data['first_name'],
+                            last_name = data['last_name'],
+                            user_name = data['user_name'],
+                            password = data['password'],
+                            email_id = data['email_id'])
+        except HasherBusy:
+            return jsonify({"error": "Too many sign-ups right now, please try again in a moment"}), 503
             
         return jsonify(user.to_dict()), 200
     else:
@@ -72,9 +76,10 @@ def update_user(user_id):
         
         # Only update password if one was provided and hash it
         if data.get("password"):
-            user.password = generate_password_hash(data["password"])
+            user.password = password_hasher.hash(data["password"])
         
         user.update()
+        user_cache.invalidate(user.id)
         print('user updated')
 
         user.update_user_dir_name(prev_username, user.user_name)
@@ -121,13 +126,17 @@ def register():
             return redirect(url_for('user_routes.register'))
 
         # Add user registration logic here
-        user = User(
-            first_name=form.first_name.data,
-            last_name=form.last_name.data,
-            user_name=form.user_name.data,
-            password=form.password.data,
-            email_id=form.email_id.data
-        )
+        try:
+            user = User(
+                first_name=form.first_name.data,
+                last_name=form.last_name.data,
+                user_name=form.user_name.data,
+                password=form.password.data,
+                email_id=form.email_id.data
+            )
+        except HasherBusy:
+            flash('Too many sign-ups right now, please try again in a moment.', 'danger')
+            return render_template('register.html', form=form), 503
         user.save()
         flash('Account created for {}!'.format(form.user_name.data), 'success')
         return redirect(url_for('user_routes.login'))
@@ -138,8 +147,12 @@ def login():
     from flask import session
     form = LoginForm()
     if form.validate_on_submit():
-        user = User.query.filter_by(user_name=form.user_name.data).first()
-        if user and user.check_password(form.password.data):
+        try:
+            user = UserService.authenticate(form.user_name.data, form.password.data)
+        except HasherBusy:
+            flash('Too many sign-ins right now, please try again in a moment.', 'danger')
+            return render_template('login.html', form=form), 503
+        if user:
             # Set session as permanent if remember_me is checked
             session.permanent = form.remember_me.data
             login_user(user, remember=form.remember_me.data)
@@ -0,0 +1,26 @@
+import argparse
+import time
+from datetime import datetime
+from app import create_app
+from services.recurring_scheduler import RecurringScheduler
+
+def run(once=False, interval=3600, batch_size=500, as_of=None):
+    # This process is the scheduler, so don't also start the in-app background thread
+    app = create_app({'RECURRING_SCHEDULER_ENABLED': False})
+    with app.app_context():
+        while True:
+            created = RecurringScheduler.sweep(today=as_of, batch_size=batch_size)
+            print(f"{datetime.now():%Y-%m-%d %H:%M:%S} logged {created} recurring transaction(s)")
+            if once:
+                return
+            time.sleep(interval)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Materialise due recurring transactions for all users")
+    parser.add_argument('--once', action='store_true', help="Run a single sweep and exit")
+    parser.add_argument('--interval', type=int, default=3600, help="Seconds between sweeps")
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--as-of', type=lambda s: datetime.strptime(s, '%Y-%m-%d').date(),
+                        help="Treat this date (YYYY-MM-DD) as today")
+    args = parser.parse_args()
+    run(once=args.once, interval=args.interval, batch_size=args.batch_size, as_of=args.as_of)
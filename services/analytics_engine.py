@@ -0,0 +1,176 @@
+from models import db
+from models.transactions import Transaction
+from services.anomaly_service import AnomalyService
+from datetime import datetime, date
+import calendar
+import logging
+import numpy as np
+import pandas as pd
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+class AnalyticsEngine:
+    """Computes the dashboard analytics from one window query plus the anomaly rollups.
+
+    One query fetches ``(date, amount, category)`` for every month the metrics
+    look at (the current calendar year plus the lookback used by savings and
+    anomalies) and the metrics are derived from that frame with pandas/NumPy.
+    ``compute`` takes the anomalies from ``AnomalyService.detect`` instead,
+    which reads the rollup tables (and its cached baseline); passing no
+    anomalies to ``compute_from_frame`` derives them from the frame.
+    The result has the same shape as ``TransactionServices.get_analytics_data``.
+    """
+
+    @staticmethod
+    def window_for(today):
+        """Return the [start, end) date range needed for ``today``'s analytics."""
+        year_start = date(today.year, 1, 1)
+        months_back = max(3, AnomalyService.LOOKBACK_MONTHS)
+        lookback_year, lookback_month = AnomalyService.lookback_periods(today.year, today.month, months_back)[0]
+        start = min(year_start, date(lookback_year, lookback_month, 1))
+        end = date(today.year + 1, 1, 1)
+        return start, end
+
+    @staticmethod
+    def load_frame(user_id, start, end):
+        rows = db.session.query(
+            Transaction.date, Transaction.amount, Transaction.category
+        ).filter(
+            Transaction.user_id == user_id,
+            Transaction.date >= start,
+            Transaction.date < end
+        ).all()
+
+        frame = pd.DataFrame(rows, columns=['date', 'amount', 'category'])
+        frame['date'] = pd.to_datetime(frame['date'])
+        frame['amount'] = frame['amount'].astype(float)
+        frame['year'] = frame['date'].dt.year
+        frame['month'] = frame['date'].dt.month
+        return frame
+
+    @staticmethod
+    def compute(user_id, today=None):
+        try:
+            today = today or datetime.now().date()
+            start, end = AnalyticsEngine.window_for(today)
+            frame = AnalyticsEngine.load_frame(user_id, start, end)
+            # Anomalies come from the cached rollup baseline rather than the frame
+            anomalies = AnomalyService.detect(user_id, today.month, today.year)
+            return AnalyticsEngine.compute_from_frame(frame, today, anomalies)
+        except Exception as e:
+            logging.error(f"Error generating analytics data: {e}")
+            return {}
+
+    @staticmethod
+    def compute_from_frame(frame, today, anomalies=None):
+        year, month = today.year, today.month
+        last_year, last_month = (year - 1, 12) if month == 1 else (year, month - 1)
+
+        # Spending per (year, month) drives the trend, daily average and savings rate
+        monthly = frame.groupby(['year', 'month'])['amount'].sum()
+        current_mask = ((frame['year'] == year) & (frame['month'] == month)).to_numpy()
+        current = frame[current_mask]
+
+        return {
+            'monthly_trend': AnalyticsEngine._monthly_trend(monthly, year),
+            'category_growth': AnalyticsEngine._category_growth(frame, current, last_year, last_month),
+            'average_transaction': round(float(current['amount'].mean()), 2) if len(current) else 0,
+            'daily_average': AnalyticsEngine._daily_average(monthly, year, month),
+            'weekly_pattern': AnalyticsEngine._weekly_pattern(current),
+            'highest_spending_day': AnalyticsEngine._highest_spending_day(current),
+            'anomalies': anomalies if anomalies is not None else AnalyticsEngine._anomalies(frame, current, year, month),
+            'savings_rate': AnalyticsEngine._savings_rate(monthly, year, month),
+        }
+
+    @staticmethod
+    def _month_total(monthly, year, month):
+        return float(monthly.get((year, month), 0.0))
+
+    @staticmethod
+    def _monthly_trend(monthly, year):
+        return {
+            datetime(year, m, 1).strftime('%b'): AnalyticsEngine._month_total(monthly, year, m)
+            for m in range(1, 13)
+        }
+
+    @staticmethod
+    def _category_growth(frame, current, last_year, last_month):
+        last = frame[((frame['year'] == last_year) & (frame['month'] == last_month)).to_numpy()]
+        current_totals = current.groupby('category')['amount'].sum()
+        last_totals = last.groupby('category')['amount'].sum()
+
+        combined = pd.concat([current_totals.rename('current'), last_totals.rename('last')], axis=1).fillna(0.0)
+        growth = {}
+        for category, current_amt, last_amt in zip(combined.index, combined['current'].to_numpy(), combined['last'].to_numpy()):
+            if last_amt == 0:
+                growth[category] = 100 if current_amt > 0 else 0
+            else:
+                growth[category] = round(float((current_amt - last_amt) / last_amt) * 100, 1)
+        return growth
+
+    @staticmethod
+    def _daily_average(monthly, year, month):
+        days_in_month = calendar.monthrange(year, month)[1]
+        return round(AnalyticsEngine._month_total(monthly, year, month) / days_in_month, 2)
+
+    @staticmethod
+    def _weekly_pattern(current):
+        if current.empty:
+            return {}
+        weekday = current['date'].dt.weekday.to_numpy()
+        amounts = current['amount'].to_numpy()
+        totals = np.bincount(weekday, weights=amounts, minlength=7)
+        counts = np.bincount(weekday, minlength=7)
+
+        pattern = {}
+        for index, day in enumerate(WEEKDAYS):
+            pattern[day] = round(float(totals[index] / counts[index]), 2) if counts[index] > 0 else 0
+        return pattern
+
+    @staticmethod
+    def _highest_spending_day(current):
+        if current.empty:
+            return None
+        daily = current.groupby('date')['amount'].sum()
+        highest = daily.idxmax()
+        return {
+            'date': highest.strftime('%Y-%m-%d'),
+            'amount': round(float(daily[highest]), 2)
+        }
+
+    @staticmethod
+    def _anomalies(frame, current, year, month):
+        periods = AnomalyService.lookback_periods(year, month) + [(year, month)]
+        grouped = frame.groupby(['year', 'month', 'category'])['amount'].sum()
+        month_totals = {period: {} for period in periods}
+        for (y, m, category), total in grouped.items():
+            if (y, m) in month_totals:
+                month_totals[(y, m)][category] = float(total)
+        return AnomalyService.from_month_totals(month_totals, year, month, len(current))
+
+    @staticmethod
+    def _savings_rate(monthly, year, month):
+        current_total = AnalyticsEngine._month_total(monthly, year, month)
+
+        three_months_avg = 0
+        for i in range(1, 4):
+            if month - i <= 0:
+                three_months_avg += AnalyticsEngine._month_total(monthly, year - 1, 12 + month - i)
+            else:
+                three_months_avg += AnalyticsEngine._month_total(monthly, year, month - i)
+        three_months_avg = three_months_avg / 3
+
+        if three_months_avg == 0:
+            savings_comparison = "N/A"
+        else:
+            diff = ((current_total - three_months_avg) / three_months_avg) * 100
+            if diff < 0:
+                savings_comparison = f"↓ {abs(round(diff, 1))}% (Good!)"
+            else:
+                savings_comparison = f"↑ {round(diff, 1)}%"
+
+        return {
+            'current_month': round(current_total, 2),
+            'three_month_avg': round(three_months_avg, 2),
+            'trend': savings_comparison
+        }
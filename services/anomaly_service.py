@@ -0,0 +1,131 @@
+from services.rollup_service import RollupService
+from services.cache import result_cache
+import logging
+import numpy as np
+
+class AnomalyService:
+    """Per-category spending anomalies against a rolling monthly baseline.
+
+    The baseline is built from per-category monthly totals over the last
+    ``LOOKBACK_MONTHS`` complete months, read from the spending rollup in one
+    grouped query, and scored for all categories at once with NumPy: mean,
+    standard deviation, an EWMA of the monthly totals and the resulting
+    z-scores. The average is taken over the months of history the user
+    actually has, not a fixed three.
+
+    History only changes on backdated writes, so baselines are cached per
+    user and month (``result_cache`` kind ``anomaly_baseline``, dropped by
+    ``invalidate_for_transaction``). The current month's totals come from the
+    rollup, which every write keeps up to date, so a detection after a new
+    transaction costs O(categories).
+    """
+
+    LOOKBACK_MONTHS = 6
+    MIN_TRANSACTIONS = 5      # Don't flag anything on a nearly empty month
+    RATIO_THRESHOLD = 1.5     # Current month at least 50% above the baseline mean...
+    Z_THRESHOLD = 2.0         # ...and, with enough history, at least 2 standard deviations above it
+    MIN_MONTHS_FOR_Z = 3
+    EWMA_ALPHA = 0.5
+
+    @staticmethod
+    def lookback_periods(year, month, months=None):
+        """The ``months`` (year, month) pairs before ``year``/``month``, oldest first"""
+        months = months or AnomalyService.LOOKBACK_MONTHS
+        periods = []
+        for i in range(months, 0, -1):
+            index = year * 12 + (month - 1) - i
+            periods.append((index // 12, index % 12 + 1))
+        return periods
+
+    @staticmethod
+    def build_baseline(month_totals, periods):
+        """Baseline statistics per category from {(year, month): {category: total}}.
+
+        Months before the user's first spending in the window are left out, so
+        a user with two months of history is averaged over two months.
+        """
+        first = next((i for i, period in enumerate(periods) if month_totals.get(period)), None)
+        if first is None:
+            return {'categories': [], 'months': 0}
+        periods = periods[first:]
+
+        categories = sorted({category for period in periods for category in month_totals.get(period, {})})
+        history = np.zeros((len(categories), len(periods)))
+        index = {category: i for i, category in enumerate(categories)}
+        for column, period in enumerate(periods):
+            for category, total in month_totals.get(period, {}).items():
+                history[index[category], column] = total
+
+        ewma = history[:, 0].copy()
+        for column in range(1, history.shape[1]):
+            ewma = AnomalyService.EWMA_ALPHA * history[:, column] + (1 - AnomalyService.EWMA_ALPHA) * ewma
+
+        return {
+            'categories': categories,
+            'months': len(periods),
+            'mean': history.mean(axis=1),
+            'std': history.std(axis=1),
+            'ewma': ewma,
+        }
+
+    @staticmethod
+    def score(baseline, current_totals):
+        """Anomalies of ``current_totals`` ({category: total}) against ``baseline``, biggest increase first"""
+        categories = baseline['categories']
+        if not categories:
+            return []
+
+        current = np.array([current_totals.get(category, 0.0) for category in categories])
+        mean, std, ewma = baseline['mean'], baseline['std'], baseline['ewma']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = np.where(std > 0, (current - mean) / std, np.nan)
+            ewma_z = np.where(std > 0, (current - ewma) / std, np.nan)
+            increase = np.where(mean > 0, (current - mean) / mean * 100, np.nan)
+
+        flagged = (mean > 0) & (current > mean * AnomalyService.RATIO_THRESHOLD)
+        if baseline['months'] >= AnomalyService.MIN_MONTHS_FOR_Z:
+            # A flat history (std == 0) has no spread to measure against; the ratio decides
+            flagged &= (std == 0) | (z >= AnomalyService.Z_THRESHOLD)
+
+        anomalies = []
+        for i in np.flatnonzero(flagged):
+            anomalies.append({
+                'category': categories[i],
+                'current': round(float(current[i]), 2),
+                'historical_avg': round(float(mean[i]), 2),
+                'increase_pct': round(float(increase[i]), 1),
+                'z_score': None if np.isnan(z[i]) else round(float(z[i]), 2),
+                'ewma': round(float(ewma[i]), 2),
+                'ewma_z_score': None if np.isnan(ewma_z[i]) else round(float(ewma_z[i]), 2),
+                'history_months': baseline['months'],
+            })
+        anomalies.sort(key=lambda a: a['increase_pct'], reverse=True)
+        return anomalies
+
+    @staticmethod
+    def from_month_totals(month_totals, year, month, transaction_count):
+        """Detect anomalies from {(year, month): {category: total}} covering the lookback and ``year``/``month``"""
+        if transaction_count < AnomalyService.MIN_TRANSACTIONS:
+            return []
+        baseline = AnomalyService.build_baseline(month_totals, AnomalyService.lookback_periods(year, month))
+        return AnomalyService.score(baseline, month_totals.get((year, month), {}))
+
+    @staticmethod
+    def baseline(user_id, year, month):
+        """Cached baseline for ``user_id``'s ``year``/``month``, from one grouped rollup query"""
+        def compute():
+            periods = AnomalyService.lookback_periods(year, month)
+            month_totals = RollupService.category_month_totals(user_id, periods)
+            return AnomalyService.build_baseline(month_totals, periods)
+        return result_cache.get_or_compute((user_id, 'anomaly_baseline', (year, month)), compute)
+
+    @staticmethod
+    def detect(user_id, month, year):
+        try:
+            if RollupService.month_count(user_id, year, month) < AnomalyService.MIN_TRANSACTIONS:
+                return []
+            current_totals = dict(RollupService.category_totals(user_id, year, month))
+            return AnomalyService.score(AnomalyService.baseline(user_id, year, month), current_totals)
+        except Exception as e:
+            logging.error(f"Error detecting anomalies: {e}")
+            return []
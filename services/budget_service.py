@@ -0,0 +1,68 @@
+from models import db
+from models.budget_recurring import Budget
+from models.rollups import CategorySpend
+from sqlalchemy import and_
+import logging
+
+class BudgetService:
+    """Budget status read from the running ``CategorySpend`` counters.
+
+    A category's status is one indexed join of its budget with its counter,
+    so write paths can report it right after they commit instead of waiting
+    for someone to open /budgets or /spendings.
+    """
+
+    WARN_PERCENT = 80
+
+    @staticmethod
+    def _query(user_id, year, month):
+        return db.session.query(Budget.category, Budget.amount, CategorySpend.total).outerjoin(
+            CategorySpend, and_(
+                CategorySpend.user_id == Budget.user_id,
+                CategorySpend.year == Budget.year,
+                CategorySpend.month == Budget.month,
+                CategorySpend.category == Budget.category
+            )
+        ).filter(
+            Budget.user_id == user_id,
+            Budget.year == year,
+            Budget.month == month
+        )
+
+    @staticmethod
+    def _entry(category, limit, spent):
+        spent = float(spent or 0)
+        return {
+            'category': category,
+            'budget_amount': limit,
+            'spent_amount': spent,
+            'remaining': limit - spent,
+            'percent': min(100, (spent / limit * 100)) if limit > 0 else 0,
+            'used_percent': round(spent / limit * 100) if limit > 0 else 0,
+        }
+
+    @staticmethod
+    def status(user_id, category, year, month):
+        """Status of one category's budget for the month, or None when it has no budget"""
+        try:
+            row = BudgetService._query(user_id, year, month).filter(Budget.category == category).first()
+            return BudgetService._entry(*row) if row else None
+        except Exception as e:
+            logging.error(f"Error reading budget status: {e}")
+            return None
+
+    @staticmethod
+    def month_status(user_id, year, month):
+        """Status of every budget set for the month"""
+        return [BudgetService._entry(*row) for row in BudgetService._query(user_id, year, month).all()]
+
+    @staticmethod
+    def notice(status):
+        """``(message, flash category)`` telling the user where a write left the budget"""
+        used = status['used_percent']
+        message = f"You are now at {used}% of your {status['category']} budget"
+        if used > 100:
+            return f"{message} (₹{round(-status['remaining'], 2)} over).", 'danger'
+        if used >= BudgetService.WARN_PERCENT:
+            return f"{message} (₹{round(status['remaining'], 2)} left).", 'warning'
+        return f"{message}.", 'info'
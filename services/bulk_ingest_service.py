@@ -0,0 +1,172 @@
+from models import db
+from models.transactions import Transaction
+from services.rollup_service import RollupService
+from services.budget_service import BudgetService
+from services.cache import result_cache
+from services.db_engine import db_engine
+from services.excel_queue import excel_queue
+from services.transaction_services import ExcelService
+from datetime import date, datetime
+import logging
+import os
+import pandas as pd
+
+FIELDS = ['date', 'title', 'amount', 'category', 'sub_category', 'payment_method']
+MAX_LENGTHS = {'title': 200, 'category': 100, 'sub_category': 100, 'payment_method': 100}
+
+
+class BulkIngestService:
+    """Creates a batch of transactions with explicit dates in one transaction.
+
+    ``validate`` checks every entry at once with pandas (dates, amounts,
+    required text, column lengths) and returns the clean rows plus a list of
+    per-entry errors. ``ingest`` inserts the valid rows with one multi-row
+    ``INSERT ... RETURNING`` (row by row on MySQL), applies them to the rollup and category
+    counters with one upsert per bucket, and commits once. Afterwards each
+    affected month sheet gets a single queued ``append_many`` (one workbook
+    load/save), the caches are invalidated once per distinct date, and the
+    budgets of the touched categories are read back for the response.
+    """
+
+    MAX_ROWS = 10000
+
+    @staticmethod
+    def validate(entries, today=None):
+        """Split ``entries`` into ``(rows, errors)``.
+
+        ``rows`` are insert-ready dicts, each with the ``index`` of its entry;
+        ``errors`` is ``[{'index': i, 'errors': [message, ...]}]`` for the rest.
+        """
+        today = today or date.today()
+        frame = pd.DataFrame([entry if isinstance(entry, dict) else {} for entry in entries],
+                             columns=FIELDS, dtype=object)
+        problems = pd.DataFrame(index=frame.index)
+        problems['object'] = [not isinstance(entry, dict) for entry in entries]
+
+        dates = pd.to_datetime(frame['date'].astype('string').str.strip(), format='%Y-%m-%d', errors='coerce')
+        problems['date'] = dates.isna()
+        problems['future'] = dates > pd.Timestamp(today)
+
+        amounts = pd.to_numeric(frame['amount'].where(frame['amount'].map(lambda v: not isinstance(v, bool))),
+                                errors='coerce')
+        problems['amount'] = ~((amounts > 0) & (amounts < float('inf')))
+
+        text = {}
+        for field, limit in MAX_LENGTHS.items():
+            values = frame[field].where(frame[field].isna() | frame[field].map(lambda v: isinstance(v, str)))
+            values = values.astype('string').str.strip()
+            text[field] = values
+            problems[f'{field}_length'] = values.str.len().gt(limit).fillna(False)
+        problems['title'] = text['title'].fillna('').eq('')
+        problems['category'] = text['category'].fillna('').eq('')
+
+        messages = {
+            'object': "entry must be an object",
+            'date': "date must be YYYY-MM-DD",
+            'future': "date is in the future",
+            'amount': "amount must be a positive number",
+            'title': "title is required",
+            'category': "category is required",
+            **{f'{field}_length': f"{field} is longer than {limit} characters" for field, limit in MAX_LENGTHS.items()},
+        }
+        # A non-object entry has no fields, so only report that
+        problems.loc[problems['object'], problems.columns != 'object'] = False
+        problems = problems.astype(bool)
+        invalid = problems.any(axis=1)
+
+        errors = [
+            {'index': int(index), 'errors': [messages[column] for column in problems.columns if row[column]]}
+            for index, row in problems[invalid].iterrows()
+        ]
+
+        valid = ~invalid
+        created_at = datetime.utcnow()
+        clean = pd.DataFrame({
+            'index': frame.index[valid],
+            'date': dates[valid].dt.date,
+            'title': text['title'][valid],
+            'amount': amounts[valid].astype(float),
+            'category': text['category'][valid],
+            'sub_category': text['sub_category'][valid].fillna(''),
+            'payment_method': text['payment_method'][valid].fillna(''),
+        })
+        rows = [dict(row, created_at=created_at) for row in clean.astype(object).to_dict('records')]
+        return rows, errors
+
+    @staticmethod
+    def ingest(user, entries, atomic=False):
+        """Validate and insert ``entries`` for ``user``. Returns the response body.
+
+        With ``atomic=True`` nothing is inserted unless every entry is valid.
+        """
+        rows, errors = BulkIngestService.validate(entries)
+        if not rows or (atomic and errors):
+            return {'inserted': 0, 'failed': len(errors), 'ids': [], 'errors': errors, 'budgets': []}
+
+        user_id = user.id
+        for row in rows:
+            row['user_id'] = user_id
+        # Sheets are kept in date order, and the ids follow it
+        rows.sort(key=lambda row: (row['date'], row['index']))
+        values = [{key: row[key] for key in row if key != 'index'} for row in rows]
+
+        def save():
+            ids = db_engine.insert_returning_ids(Transaction, values)
+            RollupService.apply_many([RollupService.snapshot(row) for row in values])
+            db.session.commit()
+            return ids
+
+        # Run again with backoff if another writer holds the SQLite lock
+        ids = db_engine.write(save)
+
+        dates = sorted({row['date'] for row in rows})
+        result_cache.invalidate_for_transaction(user_id, *dates)
+        BulkIngestService._queue_sheet_appends(user, rows)
+
+        return {
+            'inserted': len(ids),
+            'failed': len(errors),
+            'ids': [{'index': row['index'], 'id': tx_id} for row, tx_id in zip(rows, ids)],
+            'errors': errors,
+            'budgets': BulkIngestService._budget_status(user_id, rows),
+        }
+
+    @staticmethod
+    def _queue_sheet_appends(user, rows):
+        """One ``append_many`` per month sheet that exists; the current month's is created if needed"""
+        today = date.today()
+        by_month = {}
+        for row in rows:
+            by_month.setdefault((row['date'].year, row['date'].month), []).append({
+                'date': row['date'].strftime('%Y-%m-%d'),
+                'title': row['title'],
+                'amount': row['amount'],
+                'category': row['category'],
+                'sub_category': row['sub_category'],
+                'payment_method': row['payment_method'],
+            })
+        for (year, month), sheet_rows in by_month.items():
+            try:
+                if (year, month) == (today.year, today.month):
+                    excel_queue.enqueue(user.id, 'append_many', sheet_rows)
+                    continue
+                file_path = ExcelService.sheet_path_for(user.user_name, date(year, month, 1))
+                if os.path.exists(file_path):
+                    excel_queue.enqueue(user.id, 'append_many', sheet_rows, file_path=file_path)
+            except Exception as e:
+                # The database is the primary copy, so a sheet that can't be queued is only logged
+                logging.error(f"Error queueing Excel bulk append for {month}/{year}: {e}")
+
+    @staticmethod
+    def _budget_status(user_id, rows):
+        """Status of every budget the batch touched, with the notice the form paths flash"""
+        touched = {}
+        for row in rows:
+            touched.setdefault((row['date'].year, row['date'].month), set()).add(row['category'])
+        statuses = []
+        for (year, month), categories in sorted(touched.items()):
+            for status in BudgetService.month_status(user_id, year, month):
+                if status['category'] in categories:
+                    message, level = BudgetService.notice(status)
+                    statuses.append(dict(status, year=year, month=month, message=message, level=level))
+        return statuses
@@ -0,0 +1,133 @@
+from collections import OrderedDict
+from datetime import date
+from models.get_dates import SPANS, get_span_range
+import threading
+import time
+
+class ResultCache:
+    """Bounded LRU + TTL cache for per-user computed views.
+
+    Keys are ``(user_id, kind, period)``, e.g. ``(7, 'budgets', (2025, 3))``.
+    Write paths call ``invalidate_for_transaction`` / ``invalidate_for_budget``
+    after committing so only the views a write can affect are dropped. The
+    cache lives in the process, so with several workers a stale entry in
+    another worker lasts at most ``ttl`` seconds.
+    """
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._by_user = {}             # user_id -> set of keys
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def init_app(self, app):
+        app.config.setdefault('RESULT_CACHE_MAX_ENTRIES', self.max_entries)
+        app.config.setdefault('RESULT_CACHE_TTL', self.ttl)
+        self.max_entries = app.config['RESULT_CACHE_MAX_ENTRIES']
+        self.ttl = app.config['RESULT_CACHE_TTL']
+        app.extensions['result_cache'] = self
+
+    def get(self, key):
+        """Return ``(True, value)`` on a hit and ``(False, None)`` on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def set(self, key, value):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._by_user.setdefault(key[0], set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        hit, value = self.get(key)
+        if hit:
+            return value
+        value = compute()
+        self.set(key, value)
+        return value
+
+    def invalidate(self, user_id, kind=None, period=None):
+        """Drop a user's entries, optionally only one kind and/or one period"""
+        with self._lock:
+            for key in list(self._by_user.get(user_id, ())):
+                if kind is not None and key[1] != kind:
+                    continue
+                if period is not None and key[2] != period:
+                    continue
+                self._remove(key)
+                self.invalidations += 1
+
+    def invalidate_for_transaction(self, user_id, *tx_dates):
+        """A transaction dated ``tx_dates`` was written: drop every view that can include it"""
+        self.invalidate(user_id, 'dashboard')
+        for tx_date in tx_dates:
+            period = (tx_date.year, tx_date.month)
+            for span in SPANS:
+                start, end = get_span_range(span, tx_date)
+                self.invalidate(user_id, 'spendings', (span, start))
+                # The following period's insights compare against this one
+                self.invalidate(user_id, 'spendings', (span, end))
+            self.invalidate(user_id, 'budgets', period)
+            # A backdated write changes the history anomaly baselines are built from
+            today = date.today()
+            if period < (today.year, today.month):
+                self.invalidate(user_id, 'anomaly_baseline')
+
+    def invalidate_for_budget(self, user_id, year, month):
+        self.invalidate(user_id, 'budgets', (year, month))
+        # Any week, month, quarter or year overlapping the month can use the budget
+        self.invalidate(user_id, 'spendings')
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        keys = self._by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[key[0]]
+
+
+result_cache = ResultCache()
@@ -0,0 +1,216 @@
+from models import db
+from sqlalchemy import event, insert, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+import atexit
+import config
+import logging
+import random
+import threading
+import time
+
+def is_locked(error):
+    """True for SQLite's 'database is locked' / busy errors, which are worth retrying"""
+    message = str(getattr(error, 'orig', error)).lower()
+    return isinstance(error, OperationalError) and ('locked' in message or 'busy' in message)
+
+
+class DatabaseEngine:
+    """Engine configuration, write retries and housekeeping for ``db``.
+
+    ``DATABASE_URL`` picks the database. For SQLite, the file is switched to
+    WAL so readers don't block the writer, and every new connection gets the
+    other ``SQLITE_*`` pragmas: ``synchronous=NORMAL`` (durable across crashes
+    of the app, fsyncs only at checkpoints), a ``busy_timeout`` so a writer
+    waits for the lock instead of failing at once, a larger page cache and
+    memory-mapped reads. A background
+    thread runs ``PRAGMA optimize`` every ``DB_OPTIMIZE_INTERVAL`` seconds to
+    keep the planner's statistics fresh. Server databases (PostgreSQL, MySQL)
+    get a connection pool sized by ``DB_POOL_SIZE``/``DB_MAX_OVERFLOW``.
+
+    SQLite still allows one writer at a time, and a deferred transaction that
+    read before writing can fail with "database is locked" without waiting.
+    ``write`` runs a unit of work (including its commit) and, when it fails
+    that way, rolls back and runs it again after an exponential backoff with
+    jitter, up to ``DB_WRITE_RETRIES`` times.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.retries = config.DB_WRITE_RETRIES
+        self.retry_base = config.DB_WRITE_RETRY_BASE_SECONDS
+        self._engines = set()
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {'retries': 0, 'gave_up': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Build the engine options from the config, then initialise ``db`` with them"""
+        self.app = app
+        app.extensions['db_engine'] = self
+        app.config.setdefault('SQLALCHEMY_DATABASE_URI', config.DATABASE_URL)
+        for key in ('DB_POOL_SIZE', 'DB_MAX_OVERFLOW', 'DB_POOL_TIMEOUT', 'DB_POOL_RECYCLE',
+                    'SQLITE_JOURNAL_MODE', 'SQLITE_SYNCHRONOUS', 'SQLITE_BUSY_TIMEOUT_MS',
+                    'SQLITE_CACHE_SIZE_KB', 'SQLITE_MMAP_SIZE', 'DB_OPTIMIZE_INTERVAL',
+                    'DB_WRITE_RETRIES', 'DB_WRITE_RETRY_BASE_SECONDS'):
+            app.config.setdefault(key, getattr(config, key))
+        self.retries = app.config['DB_WRITE_RETRIES']
+        self.retry_base = app.config['DB_WRITE_RETRY_BASE_SECONDS']
+
+        url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+        app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', self.engine_options(url, app.config))
+        db.init_app(app)
+
+        with app.app_context():
+            engine = db.engine
+        if url.get_backend_name() == 'sqlite' and engine not in self._engines:
+            event.listen(engine, 'connect', self._sqlite_pragmas(app.config))
+            self._engines.add(engine)
+            if url.database not in (None, '', ':memory:'):
+                self._set_journal_mode(engine, app.config['SQLITE_JOURNAL_MODE'])
+
+        self.stop()
+        atexit.register(self.stop)
+        if url.get_backend_name() == 'sqlite' and app.config['DB_OPTIMIZE_INTERVAL'] > 0:
+            self.start()
+
+    @staticmethod
+    def engine_options(url, settings):
+        """``create_engine`` keyword arguments for ``url``"""
+        if url.get_backend_name() == 'sqlite':
+            if url.database in (None, '', ':memory:'):
+                return {}  # one shared in-memory connection; nothing to pool
+            return {
+                'pool_size': settings['DB_POOL_SIZE'],
+                'max_overflow': settings['DB_MAX_OVERFLOW'],
+                'pool_timeout': settings['DB_POOL_TIMEOUT'],
+                # The driver's own lock wait, matching the busy_timeout pragma
+                'connect_args': {'timeout': settings['SQLITE_BUSY_TIMEOUT_MS'] / 1000},
+            }
+        return {
+            'pool_size': settings['DB_POOL_SIZE'],
+            'max_overflow': settings['DB_MAX_OVERFLOW'],
+            'pool_timeout': settings['DB_POOL_TIMEOUT'],
+            'pool_recycle': settings['DB_POOL_RECYCLE'],
+            'pool_pre_ping': True,
+        }
+
+    @staticmethod
+    def _sqlite_pragmas(settings):
+        pragmas = [
+            f"PRAGMA busy_timeout = {int(settings['SQLITE_BUSY_TIMEOUT_MS'])}",
+            f"PRAGMA synchronous = {settings['SQLITE_SYNCHRONOUS']}",
+            # Negative cache_size is in KiB rather than pages
+            f"PRAGMA cache_size = -{int(settings['SQLITE_CACHE_SIZE_KB'])}",
+            f"PRAGMA mmap_size = {int(settings['SQLITE_MMAP_SIZE'])}",
+            "PRAGMA temp_store = MEMORY",
+        ]
+
+        def on_connect(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for pragma in pragmas:
+                    cursor.execute(pragma)
+            finally:
+                cursor.close()
+        return on_connect
+
+    @staticmethod
+    def _set_journal_mode(engine, mode):
+        # The journal mode is stored in the database file, so it is set once rather than per connection
+        try:
+            with engine.connect() as conn:
+                current = conn.execute(text("PRAGMA journal_mode")).scalar()
+                if current.lower() != mode.lower():
+                    conn.execute(text(f"PRAGMA journal_mode = {mode}"))
+        except OperationalError as e:
+            logging.error(f"Could not set journal_mode={mode}: {e}")
+
+    # Writes
+
+    def write(self, work, *args, **kwargs):
+        """Run ``work`` (which commits) and retry it with backoff if the database is locked.
+
+        ``work`` must be safe to run again from the start: load what it
+        changes inside it, because the rollback before a retry expires every
+        object in the session.
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                return work(*args, **kwargs)
+            except OperationalError as e:
+                db.session.rollback()
+                if not is_locked(e):
+                    raise
+                if attempt == self.retries:
+                    with self._lock:
+                        self._stats['gave_up'] += 1
+                    logging.error(f"Write still locked after {attempt + 1} attempt(s): {e}")
+                    raise
+                with self._lock:
+                    self._stats['retries'] += 1
+                delay = self.retry_base * (2 ** attempt) * random.uniform(0.5, 1.5)
+                logging.warning(f"Database locked, retrying write in {delay * 1000:.0f} ms")
+                time.sleep(delay)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    @staticmethod
+    def insert_returning_ids(model, rows):
+        """Insert ``rows`` (column dicts) into ``model``'s table and return their ids in the same order.
+
+        Uses one multi-row ``INSERT ... RETURNING`` where the dialect has it
+        (SQLite 3.35+, PostgreSQL, MariaDB 10.5+). MySQL has no RETURNING, so
+        there each row is inserted on its own and its id read from the cursor.
+        """
+        if not rows:
+            return []
+        if db.session.get_bind().dialect.insert_returning:
+            statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+            return db.session.scalars(statement, rows).all()
+        return [db.session.execute(insert(model).values(**row)).inserted_primary_key[0] for row in rows]
+
+    # Housekeeping
+
+    def optimize(self, analyze=False):
+        """Refresh the query planner's statistics. ``analyze`` rebuilds them in full."""
+        with db.engine.connect() as conn:
+            if db.engine.dialect.name == 'sqlite':
+                if analyze:
+                    conn.execute(text("ANALYZE"))
+                else:
+                    # Caps how many rows each index is sampled on, so this stays fast on big tables
+                    conn.execute(text("PRAGMA analysis_limit = 1000"))
+                    conn.execute(text("PRAGMA optimize"))
+            else:
+                conn.execute(text("ANALYZE"))
+            conn.commit()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='db-optimize', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.app.config['DB_OPTIMIZE_INTERVAL']):
+            try:
+                with self.app.app_context():
+                    self.optimize()
+            except Exception as e:
+                logging.error(f"PRAGMA optimize failed: {e}")
+
+
+db_engine = DatabaseEngine()
@@ -0,0 +1,168 @@
+from models import db
+from models.email_jobs import EmailJob
+from services.email_service import SMTPSession, build_message
+from services.sheet_storage import sheet_storage
+from services.metrics import metrics
+from datetime import datetime, timedelta
+import atexit
+import logging
+import os
+import shutil
+import threading
+import config
+
+class EmailQueue:
+    """Persistent outbound mail queue with a pool of SMTP workers.
+
+    Jobs are rows in ``email_jobs``, so queued mail survives restarts and the
+    UI can poll a job's status. Each worker thread keeps its own authenticated
+    ``SMTPSession`` open across messages. Failed sends are retried with
+    exponential backoff up to ``EMAIL_MAX_ATTEMPTS``.
+    """
+
+    OUTBOX_DIR = '.outbox'  # Under SHEETS_ROOT
+    LEASE_SECONDS = 300  # A 'sending' job whose worker died is picked up again after this
+
+    def __init__(self, app=None):
+        self.app = None
+        self._threads = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self.sessions = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['email_queue'] = self
+        app.config.setdefault('EMAIL_WORKERS', config.EMAIL_WORKERS)
+        app.config.setdefault('EMAIL_MAX_ATTEMPTS', config.EMAIL_MAX_ATTEMPTS)
+        app.config.setdefault('EMAIL_RETRY_BASE_SECONDS', config.EMAIL_RETRY_BASE_SECONDS)
+        app.config.setdefault('EMAIL_POLL_SECONDS', 5)
+        app.config.setdefault('EMAIL_QUEUE_AUTOSTART', config.EMAIL_QUEUE_AUTOSTART)
+        atexit.register(self.stop)
+        if app.config['EMAIL_QUEUE_AUTOSTART']:
+            # Picks up jobs left queued by a previous run
+            self.start()
+
+    def start(self):
+        """Start the worker pool (idempotent)."""
+        if self._threads:
+            return
+        self._stop.clear()
+        for index in range(self.app.config['EMAIL_WORKERS']):
+            session = SMTPSession()
+            self.sessions.append(session)
+            thread = threading.Thread(target=self._work, args=(session,), name=f'email-worker-{index}', daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        for session in self.sessions:
+            session.close()
+        self._threads = []
+        self.sessions = []
+
+    def enqueue(self, to_address, subject, body, attachment_path=None, attachment_name=None, user_id=None):
+        """Persist a job and wake a worker. Returns the job id straight away."""
+        job = EmailJob(
+            user_id=user_id,
+            to_address=to_address,
+            subject=subject,
+            body=body,
+            attachment_name=attachment_name
+        )
+        db.session.add(job)
+        db.session.flush()
+
+        if attachment_path:
+            # Snapshot the attachment so later exports can't replace it before it is sent
+            outbox_dir = sheet_storage.path(self.OUTBOX_DIR)
+            os.makedirs(outbox_dir, exist_ok=True)
+            outbox_path = os.path.join(outbox_dir, f'{job.id}-{os.path.basename(attachment_path)}')
+            try:
+                os.link(attachment_path, outbox_path)
+            except OSError:
+                shutil.copyfile(attachment_path, outbox_path)
+            job.attachment_path = outbox_path
+
+        db.session.commit()
+        self.start()
+        self._wakeup.set()
+        return job.id
+
+    def _work(self, session):
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    job = self._claim_next()
+                    if job is not None:
+                        self._deliver(job, session)
+                        continue
+            except Exception as e:
+                logging.error(f"Email worker error: {e}")
+
+            self._wakeup.wait(self.app.config['EMAIL_POLL_SECONDS'])
+            self._wakeup.clear()
+
+    def _claim_next(self):
+        now = datetime.utcnow()
+        candidates = db.session.query(EmailJob.id).filter(
+            EmailJob.status.in_([EmailJob.QUEUED, EmailJob.SENDING]),
+            EmailJob.next_attempt_at <= now
+        ).order_by(EmailJob.next_attempt_at).limit(5).all()
+
+        for (job_id,) in candidates:
+            # Compare-and-set so two workers never send the same job
+            claimed = EmailJob.query.filter(
+                EmailJob.id == job_id,
+                EmailJob.status.in_([EmailJob.QUEUED, EmailJob.SENDING]),
+                EmailJob.next_attempt_at <= now
+            ).update({
+                EmailJob.status: EmailJob.SENDING,
+                EmailJob.attempts: EmailJob.attempts + 1,
+                EmailJob.next_attempt_at: now + timedelta(seconds=self.LEASE_SECONDS)
+            }, synchronize_session=False)
+            db.session.commit()
+            if claimed:
+                return EmailJob.query.get(job_id)
+        return None
+
+    def _deliver(self, job, session):
+        try:
+            attachment = job.attachment_path if job.attachment_path else None
+            msg = build_message(job.to_address, job.subject, job.body, attachment, job.attachment_name)
+            with metrics.track('email_send'):
+                session.send(msg)
+        except Exception as e:
+            session.close()
+            job.last_error = str(e)
+            if job.attempts >= self.app.config['EMAIL_MAX_ATTEMPTS']:
+                job.status = EmailJob.FAILED
+                self._discard_attachment(job)
+                logging.error(f"Email job {job.id} failed permanently: {e}")
+            else:
+                delay = self.app.config['EMAIL_RETRY_BASE_SECONDS'] * (2 ** (job.attempts - 1))
+                job.status = EmailJob.QUEUED
+                job.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+                logging.warning(f"Email job {job.id} attempt {job.attempts} failed, retrying in {delay}s: {e}")
+            db.session.commit()
+            return
+
+        job.status = EmailJob.SENT
+        job.sent_at = datetime.utcnow()
+        job.last_error = None
+        db.session.commit()
+        self._discard_attachment(job)
+        logging.info(f"Email job {job.id} sent to {job.to_address}")
+
+    def _discard_attachment(self, job):
+        if job.attachment_path and os.path.exists(job.attachment_path):
+            os.remove(job.attachment_path)
+
+
+email_queue = EmailQueue()
@@ -1,51 +1,102 @@
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
-import logging
-from dotenv import load_dotenv
+import time
 import os
+import config
 
-load_dotenv()
+def build_message(to_address, subject, body, attachment=None, attachment_name=None):
+    """Build the MIME message. ``attachment`` is a file path or a file-like object."""
+    # The email package is only needed when mail is actually built, so it isn't imported at startup
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+    from email.mime.base import MIMEBase
+    from email import encoders
 
-def send_email(to_address, subject, body, attachment):
-    # Gmail SMTP Configuration
-    gmail_user = os.getenv('GMAIL_USER')
-    gmail_password = os.getenv('GMAIL_APP_PASSWORD')
-    smtp_server = "smtp.gmail.com"
-    smtp_port = 587
-
-    if not gmail_user or not gmail_password:
-        raise ValueError("Gmail credentials not found in environment variables")
-
-    # Create email message
     msg = MIMEMultipart()
-    msg['From'] = gmail_user
+    msg['From'] = config.EMAIL_FROM
     msg['To'] = to_address
     msg['Subject'] = subject
     msg.attach(MIMEText(body, 'plain'))
 
-    # Attach file
-    part = MIMEBase('application', 'octet-stream')
-    attachment.seek(0)
-    part.set_payload(attachment.read())
-    encoders.encode_base64(part)
-    
-    part.add_header(
-        'Content-Disposition',
-        'attachment',
-        filename=attachment.filename
-    )
-    msg.attach(part)
-
-    try:
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
+    if attachment is not None:
+        # Attach file
+        part = MIMEBase('application', 'octet-stream')
+        if isinstance(attachment, str):
+            with open(attachment, 'rb') as f:
+                part.set_payload(f.read())
+            attachment_name = attachment_name or os.path.basename(attachment)
+        else:
+            attachment.seek(0)
+            part.set_payload(attachment.read())
+            attachment_name = attachment_name or attachment.filename
+        encoders.encode_base64(part)
+
+        part.add_header(
+            'Content-Disposition',
+            'attachment',
+            filename=attachment_name
+        )
+        msg.attach(part)
+
+    return msg
+
+
+class SMTPSession:
+    """A reusable, authenticated SMTP connection.
+
+    The connection (and its STARTTLS handshake and login) is opened on first
+    use and kept for later messages. A connection that has been idle longer
+    than ``keepalive`` seconds is checked with NOOP first, and a dropped
+    connection is reopened once before giving up.
+    """
+
+    def __init__(self, host=None, port=None, use_tls=None, username=None, password=None, keepalive=30):
+        self.host = host or config.SMTP_HOST
+        self.port = port or config.SMTP_PORT
+        self.use_tls = config.SMTP_USE_TLS if use_tls is None else use_tls
+        self.username = config.SMTP_USERNAME if username is None else username
+        self.password = config.SMTP_PASSWORD if password is None else password
+        self.keepalive = keepalive
+        self._server = None
+        self._last_used = 0
+        self.connections_opened = 0
+
+    def _connect(self):
+        import smtplib
+        self.close()
+        server = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.use_tls:
             server.starttls()
-            server.login(gmail_user, gmail_password)
-            server.send_message(msg)
-            logging.info(f"Email sent successfully to {to_address}")
-            return True
-    except Exception as e:
-        logging.error(f"Failed to send email: {str(e)}")
-        raise e
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        self._server = server
+        self.connections_opened += 1
+
+    def _ensure_connected(self):
+        import smtplib
+        if self._server is None:
+            self._connect()
+        elif time.monotonic() - self._last_used > self.keepalive:
+            try:
+                status, _ = self._server.noop()
+                if status != 250:
+                    self._connect()
+            except smtplib.SMTPException:
+                self._connect()
+
+    def send(self, msg):
+        import smtplib
+        self._ensure_connected()
+        try:
+            self._server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self._connect()
+            self._server.send_message(msg)
+        self._last_used = time.monotonic()
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
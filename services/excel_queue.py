@@ -0,0 +1,123 @@
+from services.transaction_services import ExcelService
+from services.sheet_storage import sheet_storage
+from services.metrics import metrics
+from datetime import date, datetime
+import atexit
+import logging
+import os
+import threading
+
+def sheet_lock(file_path):
+    """Return the lock that serialises every load/save of one workbook"""
+    return sheet_storage.lock(file_path)
+
+
+class ExcelWriteQueue:
+    """Write-behind mirror of transactions into the users' Excel sheets.
+
+    Requests enqueue operations and return once their DB commit has landed.
+    Each user has at most one writer thread, which drains everything queued
+    for that user and applies it with one load/save per workbook, so bursts of
+    writes are coalesced and two requests can no longer overwrite each
+    other's rows.
+    """
+
+    SHUTDOWN_TIMEOUT = 10  # Seconds interpreter exit waits for queued writes
+
+    def __init__(self, app=None):
+        self.app = None
+        self._exit_hook = False
+        self._pending = {}   # user_id -> [(file_path, action, data), ...]
+        self._workers = {}   # user_id -> writer thread
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['excel_queue'] = self
+        if not self._exit_hook:
+            # Once per process, and bounded so a stuck writer can't hold up shutdown
+            atexit.register(self.flush, self.SHUTDOWN_TIMEOUT)
+            self._exit_hook = True
+
+    def enqueue(self, user_id, action, data, file_path=None):
+        """Queue one operation.
+
+        ``file_path=None`` means the month sheet of the transaction's date
+        (the first row's, for ``append_many``), worked out now rather than
+        when the write happens, so a write queued just before midnight on the
+        last day of a month still lands in that month's workbook.
+        """
+        if self.app is None:
+            raise RuntimeError("ExcelWriteQueue is not bound to an app, call init_app first")
+
+        if file_path is None:
+            file_path = self._sheet_path_for(user_id, data)
+
+        with self._lock:
+            self._pending.setdefault(user_id, []).append((file_path, action, data))
+            if user_id not in self._workers:
+                worker = threading.Thread(target=self._drain, args=(user_id,),
+                                          name=f'excel-writer-{user_id}', daemon=True)
+                self._workers[user_id] = worker
+                worker.start()
+
+    def flush(self, timeout=None):
+        """Block until every queued operation has been written. Returns False on timeout."""
+        with self._lock:
+            return self._idle.wait_for(lambda: not self._workers, timeout)
+
+    def pending_count(self):
+        with self._lock:
+            return sum(len(ops) for ops in self._pending.values())
+
+    def _drain(self, user_id):
+        while True:
+            with self._lock:
+                batch = self._pending.pop(user_id, [])
+                if not batch:
+                    del self._workers[user_id]
+                    self._idle.notify_all()
+                    return
+            try:
+                self._write_batch(user_id, batch)
+            except Exception as e:
+                logging.error(f"Error writing Excel batch for user {user_id}: {e}")
+
+    def _write_batch(self, user_id, batch):
+        with self.app.app_context():
+            # Group by workbook, keeping the order operations arrived in
+            by_file = {}
+            for file_path, action, data in batch:
+                by_file.setdefault(file_path, []).append((action, data))
+
+            for file_path, operations in by_file.items():
+                if not file_path or not os.path.exists(file_path):
+                    logging.error(f"Excel sheet missing, dropping {len(operations)} operation(s): {file_path}")
+                    continue
+                with sheet_lock(file_path), metrics.track('excel_write'):
+                    ExcelService.apply_operations(file_path, operations, strict=False)
+                logging.debug(f"Wrote {len(operations)} Excel operation(s) to {file_path}")
+
+    @staticmethod
+    def _sheet_path_for(user_id, data):
+        """Path of the month sheet ``data`` belongs to; this month's is created if needed"""
+        from models.users import User
+        row = data[0] if isinstance(data, list) and data else data
+        tx_date = row.get('date') if isinstance(row, dict) else None
+        if isinstance(tx_date, str):
+            tx_date = datetime.strptime(tx_date[:10], '%Y-%m-%d').date()
+        today = date.today()
+        tx_date = tx_date or today
+
+        user = User.query.get(user_id)
+        if not user:
+            return None
+        if (tx_date.year, tx_date.month) == (today.year, today.month):
+            return user.current_sheet_path if user.get_current_sheet() else None
+        return ExcelService.sheet_path_for(user.user_name, tx_date)
+
+
+excel_queue = ExcelWriteQueue()
@@ -0,0 +1,300 @@
+from concurrent.futures import Future
+from models import db
+from models.idempotency import IdempotencyKey
+from models.transactions import Transaction
+from services.cache import ResultCache, result_cache
+from services.db_engine import db_engine
+from services.metrics import metrics
+from services.rollup_service import RollupService
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+import atexit
+import config
+import logging
+import threading
+import time
+
+class _Write:
+    __slots__ = ('user_id', 'key', 'rows', 'future', 'arrived')
+
+    def __init__(self, user_id, key, rows):
+        self.user_id = user_id
+        self.key = key
+        self.rows = rows
+        self.future = Future()
+        self.arrived = time.monotonic()
+
+
+class GroupCommitWriter:
+    """Small transaction inserts (quick-card taps, the map form) with group commit and idempotency keys.
+
+    ``submit`` hands one caller's rows to a writer thread and blocks until
+    they are committed. The writer waits up to ``GROUP_COMMIT_WINDOW_MS``
+    after the first pending write for others to arrive, then commits up to
+    ``GROUP_COMMIT_MAX_BATCH`` of them with one multi-row insert (row by row
+    on dialects without ``INSERT ... RETURNING``, such as MySQL), one rollup
+    update and one commit, and only then acknowledges every caller. On SQLite
+    the commit (the fsync, and the wait for the write lock) is most of the
+    cost of a small write, so a burst shares it instead of queueing for it.
+    With ``GROUP_COMMIT_ENABLED=0`` each write is committed on its own, in
+    the caller's thread, through the same code.
+
+    A write can carry a client ``key``. Keys are stored in
+    ``idempotency_keys`` in the same transaction as the rows, so a repeat of
+    a key (a double tap, a client retry, even on another worker) gets the
+    first write's ids back with ``duplicate=True`` instead of a second row.
+    Keys in the same batch are coalesced, recently seen keys are answered
+    from memory, and keys older than ``IDEMPOTENCY_TTL`` seconds are deleted
+    by the writer thread (with group commit off, on a session of its own, so
+    a caller's pending work is never committed or rolled back with it).
+    If a batch fails, its writes are retried one by one so a bad row only
+    fails its own caller.
+    """
+
+    SWEEP_SECONDS = 60
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = config.GROUP_COMMIT_ENABLED
+        self.window = config.GROUP_COMMIT_WINDOW_MS / 1000
+        self.max_batch = config.GROUP_COMMIT_MAX_BATCH
+        self.ttl = config.IDEMPOTENCY_TTL
+        self._recent = ResultCache(max_entries=10000, ttl=self.ttl)
+        self._pending = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self._last_sweep = 0.0
+        self._stats = {'writes': 0, 'batches': 0, 'duplicates': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.stop()
+        self.app = app
+        app.extensions['group_commit'] = self
+        app.config.setdefault('GROUP_COMMIT_ENABLED', config.GROUP_COMMIT_ENABLED)
+        app.config.setdefault('GROUP_COMMIT_WINDOW_MS', config.GROUP_COMMIT_WINDOW_MS)
+        app.config.setdefault('GROUP_COMMIT_MAX_BATCH', config.GROUP_COMMIT_MAX_BATCH)
+        app.config.setdefault('IDEMPOTENCY_TTL', config.IDEMPOTENCY_TTL)
+        self.enabled = app.config['GROUP_COMMIT_ENABLED']
+        self.window = app.config['GROUP_COMMIT_WINDOW_MS'] / 1000
+        self.max_batch = app.config['GROUP_COMMIT_MAX_BATCH']
+        self.ttl = app.config['IDEMPOTENCY_TTL']
+        self._recent.ttl = self.ttl
+        self._recent.clear()
+        atexit.register(self.stop)
+
+    def submit(self, user_id, rows, key=None, timeout=30):
+        """Insert ``rows`` (Transaction column dicts) for ``user_id`` once they're committed.
+
+        Returns ``{'ids': [...], 'duplicate': bool}``. ``key`` must be at most
+        64 characters.
+        """
+        if key:
+            hit, ids = self._recent.get((user_id, 'idempotency', key))
+            if hit:
+                self._count('duplicates')
+                return {'ids': ids, 'duplicate': True}
+
+        write = _Write(user_id, key or None, [dict(row, user_id=user_id) for row in rows])
+        if not self.enabled:
+            self._sweep_apart()
+            self._process([write])
+            return write.future.result()
+
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("GroupCommitWriter is stopped")
+            self._pending.append(write)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='group-commit', daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        return write.future.result(timeout)
+
+    def stop(self, timeout=5):
+        """Commit whatever is pending and stop the writer thread"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        with self._cond:
+            self._thread = None
+            self._stopping = False
+
+    def stats(self):
+        with self._cond:
+            return dict(self._stats)
+
+    def _count(self, name, amount=1):
+        with self._cond:
+            self._stats[name] += amount
+
+    # Writer thread
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                # Give writes arriving within the window a chance to share this commit
+                deadline = self._pending[0].arrived + self.window
+                while len(self._pending) < self.max_batch and not self._stopping:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+            try:
+                # The batch's SQL belongs to no request, so it is counted under group_commit
+                with self.app.app_context(), metrics.attribute('group_commit'):
+                    self._sweep(db.session)
+                    self._process(batch)
+            except Exception as e:
+                logging.error(f"Group commit failed: {e}")
+                for write in batch:
+                    if not write.future.done():
+                        write.future.set_exception(e)
+
+    # Committing
+
+    def _process(self, batch):
+        # The first write of each key is the one committed; repeats in the batch share its result
+        leaders, followers = [], []
+        seen = {}
+        for write in batch:
+            if write.key is None:
+                leaders.append(write)
+            elif (write.user_id, write.key) in seen:
+                followers.append((write, seen[(write.user_id, write.key)]))
+            else:
+                seen[(write.user_id, write.key)] = write
+                leaders.append(write)
+
+        stored = self._stored_results(seen)
+        fresh = []
+        for write in leaders:
+            if write.key is not None and (write.user_id, write.key) in stored:
+                self._resolve(write, stored[(write.user_id, write.key)], duplicate=True)
+            else:
+                fresh.append(write)
+
+        if fresh:
+            try:
+                self._commit(fresh)
+            except Exception as e:
+                if len(fresh) == 1:
+                    self._fail(fresh[0], e)
+                else:
+                    logging.warning(f"Group commit of {len(fresh)} writes failed, committing them one by one: {e}")
+                    for write in fresh:
+                        try:
+                            self._commit([write])
+                        except Exception as single_error:
+                            self._fail(write, single_error)
+
+        for write, leader in followers:
+            try:
+                self._resolve(write, leader.future.result(0)['ids'], duplicate=True)
+            except Exception as e:
+                write.future.set_exception(e)
+
+    @staticmethod
+    def _stored_results(keys):
+        """Results already stored for ``keys`` (``{(user_id, key): write}``), by the same pairs"""
+        if not keys:
+            return {}
+        found = IdempotencyKey.query.with_entities(
+            IdempotencyKey.user_id, IdempotencyKey.key, IdempotencyKey.result
+        ).filter(IdempotencyKey.key.in_({key for _, key in keys})).all()
+        return {(user_id, key): result for user_id, key, result in found if (user_id, key) in keys}
+
+    def _commit(self, writes):
+        rows = [row for write in writes for row in write.rows]
+
+        def save():
+            ids = []
+            if rows:
+                # One INSERT ... RETURNING for the batch; row by row on MySQL, which has no RETURNING
+                ids = db_engine.insert_returning_ids(Transaction, rows)
+                RollupService.apply_many([RollupService.snapshot(row) for row in rows])
+            results, offset = [], 0
+            for write in writes:
+                write_ids = ids[offset:offset + len(write.rows)]
+                offset += len(write.rows)
+                results.append(write_ids)
+                if write.key is not None:
+                    db.session.add(IdempotencyKey(user_id=write.user_id, key=write.key, result=write_ids))
+            db.session.commit()
+            return results
+
+        try:
+            with metrics.track('group_commit'):
+                # Run again with backoff if another writer holds the SQLite lock
+                results = db_engine.write(save)
+        except Exception:
+            db.session.rollback()
+            raise
+        self._count('batches')
+        for write, ids in zip(writes, results):
+            result_cache.invalidate_for_transaction(write.user_id, *{row['date'] for row in write.rows})
+            self._resolve(write, ids, duplicate=False)
+
+    def _fail(self, write, error):
+        # Another worker committed the same key first: answer with its result
+        if isinstance(error, IntegrityError) and write.key is not None:
+            stored = self._stored_results({(write.user_id, write.key): write})
+            if stored:
+                self._resolve(write, stored[(write.user_id, write.key)], duplicate=True)
+                return
+        logging.error(f"Write for user {write.user_id} failed: {error}")
+        write.future.set_exception(error)
+
+    def _resolve(self, write, ids, duplicate):
+        if write.key is not None:
+            self._recent.set((write.user_id, 'idempotency', write.key), ids)
+        self._count('writes')
+        if duplicate:
+            self._count('duplicates')
+        write.future.set_result({'ids': ids, 'duplicate': duplicate})
+
+    def _sweep_due(self):
+        with self._cond:
+            now = time.monotonic()
+            if now - self._last_sweep < self.SWEEP_SECONDS:
+                return False
+            self._last_sweep = now
+            return True
+
+    def _sweep_apart(self):
+        """Sweep from a caller's thread, on its own session so the request's pending work is left alone"""
+        if not self._sweep_due():
+            return
+        session = db.session.session_factory()
+        try:
+            self._delete_expired(session)
+        finally:
+            session.close()
+
+    def _sweep(self, session):
+        """Delete keys older than the TTL, at most once a minute"""
+        if self._sweep_due():
+            self._delete_expired(session)
+
+    def _delete_expired(self, session):
+        try:
+            cutoff = datetime.utcnow() - timedelta(seconds=self.ttl)
+            session.query(IdempotencyKey).filter(IdempotencyKey.created_at < cutoff).delete(synchronize_session=False)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logging.error(f"Error sweeping idempotency keys: {e}")
+
+
+group_writer = GroupCommitWriter()
@@ -0,0 +1,247 @@
+from models import db
+from models.transactions import Transaction
+from models.budget_recurring import Budget
+from models.get_dates import SPANS, get_span_range, get_week_range, get_month_range
+from datetime import date, timedelta
+import numpy as np
+
+class InsightsEngine:
+    """Spending insights for a week, month, quarter or year.
+
+    ``load`` runs one query for ``(date, amount, category)`` over the selected
+    period and the one before it, and returns the columns as NumPy arrays.
+    ``compute`` derives everything the /spendings page shows from those
+    arrays: category totals, top/bottom categories, period-over-period
+    changes, budget alerts, daily extremes and recommendations. It does not
+    touch the database, so it can be used on any columns.
+
+    Budgets are set per month. A month's budget counts towards a period in
+    proportion to the days of that month the period covers, so a week gets
+    7/30 of a 30-day month's budget and a quarter gets its three months in full.
+    """
+
+    PERIODS = SPANS
+    TOP_N = 3
+    CHANGES_N = 5
+
+    @staticmethod
+    def period_range(period, year, month=None, week=None):
+        """Half-open [start, end) of the selected period.
+
+        A week is an ISO week number of ``year``; a quarter is the one
+        containing ``month``.
+        """
+        if period not in InsightsEngine.PERIODS:
+            raise ValueError(f"Unknown period: {period}")
+        if period == 'week':
+            return get_week_range(year, week)
+        return get_span_range(period, date(int(year), int(month or 1), 1))
+
+    @staticmethod
+    def previous_range(period, start):
+        return get_span_range(period, start - timedelta(days=1))
+
+    @staticmethod
+    def label(period, start, end):
+        if period == 'week':
+            return f"{start:%d %b} - {end - timedelta(days=1):%d %b %Y}"
+        if period == 'month':
+            return f"{start:%B %Y}"
+        if period == 'quarter':
+            return f"Q{(start.month - 1) // 3 + 1} {start.year}"
+        return str(start.year)
+
+    @staticmethod
+    def load(user_id, start, end):
+        """``(ordinals, amounts, categories)`` arrays for ``user_id``'s transactions in [start, end)"""
+        rows = db.session.query(
+            Transaction.date, Transaction.amount, Transaction.category
+        ).filter(
+            Transaction.user_id == user_id,
+            Transaction.in_period(start, end)
+        ).all()
+
+        ordinals = np.fromiter((row[0].toordinal() for row in rows), dtype=np.int64, count=len(rows))
+        amounts = np.fromiter((row[1] or 0.0 for row in rows), dtype=np.float64, count=len(rows))
+        categories = np.array([row[2] or 'Other' for row in rows], dtype=object)
+        return ordinals, amounts, categories
+
+    @staticmethod
+    def load_budgets(user_id, start, end):
+        """{category: budget limit} for [start, end), pro-rated from the monthly budgets it overlaps"""
+        first = start.year * 12 + start.month - 1
+        last_day = end - timedelta(days=1)
+        last = last_day.year * 12 + last_day.month - 1
+        budgets = db.session.query(Budget.category, Budget.amount, Budget.year, Budget.month).filter(
+            Budget.user_id == user_id,
+            Budget.year * 12 + Budget.month - 1 >= first,
+            Budget.year * 12 + Budget.month - 1 <= last
+        ).all()
+
+        limits = {}
+        for category, amount, year, month in budgets:
+            month_start, month_end = get_month_range(year, month)
+            covered = (min(end, month_end) - max(start, month_start)).days
+            share = amount * covered / (month_end - month_start).days
+            limits[category] = limits.get(category, 0.0) + share
+        return {category: round(limit, 2) for category, limit in limits.items()}
+
+    @staticmethod
+    def for_user(user_id, period, start, end, today=None):
+        """Template context for ``user_id``'s insights over [start, end)"""
+        prev_start, _ = InsightsEngine.previous_range(period, start)
+        ordinals, amounts, categories = InsightsEngine.load(user_id, prev_start, end)
+        budgets = InsightsEngine.load_budgets(user_id, start, end)
+        context = InsightsEngine.compute(ordinals, amounts, categories, start, end, prev_start, budgets, today)
+        context['period'] = period
+        context['period_label'] = InsightsEngine.label(period, start, end)
+        return context
+
+    @staticmethod
+    def compute(ordinals, amounts, categories, start, end, prev_start, budgets=None, today=None):
+        """Insights for [start, end) compared with [prev_start, start) from column arrays"""
+        today = today or date.today()
+        budgets = budgets or {}
+        start_ord, end_ord = start.toordinal(), end.toordinal()
+
+        names, codes = np.unique(categories, return_inverse=True)
+        current = (ordinals >= start_ord) & (ordinals < end_ord)
+        previous = (ordinals >= prev_start.toordinal()) & (ordinals < start_ord)
+        current_totals = np.bincount(codes[current], weights=amounts[current], minlength=len(names))
+        previous_totals = np.bincount(codes[previous], weights=amounts[previous], minlength=len(names))
+        current_counts = np.bincount(codes[current], minlength=len(names))
+
+        # Categories with spending this period, largest first
+        order = np.argsort(-current_totals, kind='stable')
+        order = order[current_counts[order] > 0]
+        spendings_data = {str(names[i]): round(float(current_totals[i]), 2) for i in order}
+        sorted_categories = list(spendings_data.items())
+
+        total = round(float(current_totals.sum()), 2)
+        transaction_count = int(current.sum())
+        # Average over the days that have passed, not the full length of an ongoing period
+        days = (min(end, max(start, today + timedelta(days=1))) - start).days or (end - start).days
+        daily_average = round(total / days, 2) if total > 0 else 0
+
+        insights = {
+            'top_3_categories': sorted_categories[:InsightsEngine.TOP_N],
+            'bottom_3_categories': sorted_categories[-InsightsEngine.TOP_N:] if len(sorted_categories) > InsightsEngine.TOP_N else [],
+        }
+        insights.update(InsightsEngine._period_change(total, float(previous_totals.sum())))
+        insights['category_changes'] = InsightsEngine._category_changes(names, current_totals, previous_totals, current_counts)
+        insights.update(InsightsEngine._budget_status(spendings_data, total, budgets))
+        insights.update(InsightsEngine._daily_extremes(ordinals[current], amounts[current], start_ord, end_ord))
+        insights['recommendations'] = InsightsEngine._recommendations(insights, sorted_categories, total, daily_average)
+
+        return {
+            'spendings_data': spendings_data,
+            'total_spendings': total,
+            'top_category': sorted_categories[0][0] if sorted_categories else None,
+            'transaction_count': transaction_count,
+            'daily_average': daily_average,
+            'insights': insights,
+        }
+
+    @staticmethod
+    def _period_change(total, prev_total):
+        if prev_total > 0:
+            change = total - prev_total
+            return {
+                'prev_period_spending': round(prev_total, 2),
+                'spending_change': round(change, 2),
+                'spending_change_percent': round(change / prev_total * 100, 1),
+                'spending_trend': 'up' if change > 0 else 'down',
+            }
+        return {
+            'prev_period_spending': 0,
+            'spending_change': total,
+            'spending_change_percent': 0,
+            'spending_trend': 'stable',
+        }
+
+    @staticmethod
+    def _category_changes(names, current_totals, previous_totals, current_counts):
+        """The biggest category moves against the previous period, for categories present in both"""
+        both = np.flatnonzero((current_counts > 0) & (previous_totals > 0))
+        change = current_totals[both] - previous_totals[both]
+        percent = change / previous_totals[both] * 100
+        changes = []
+        for k in np.argsort(-np.abs(change), kind='stable')[:InsightsEngine.CHANGES_N]:
+            i = both[k]
+            changes.append({
+                'category': str(names[i]),
+                'current': round(float(current_totals[i]), 2),
+                'previous': round(float(previous_totals[i]), 2),
+                'change': round(float(change[k]), 2),
+                'change_percent': round(float(percent[k]), 1),
+                'trend': 'up' if change[k] > 0 else 'down',
+            })
+        return changes
+
+    @staticmethod
+    def _budget_status(spendings_data, total, budgets):
+        alerts = []
+        for category, limit in budgets.items():
+            spent = spendings_data.get(category, 0)
+            if limit > 0 and spent > limit:
+                overspend = round(spent - limit, 2)
+                alerts.append({
+                    'category': category,
+                    'limit': limit,
+                    'spent': spent,
+                    'overspend': overspend,
+                    'overspend_percent': round(overspend / limit * 100, 1),
+                    'status': 'alert',
+                })
+        alerts.sort(key=lambda a: a['overspend_percent'], reverse=True)
+        total_budget = round(sum(budgets.values()), 2)
+        return {
+            'budget_alerts': alerts,
+            'total_budget': total_budget,
+            'budget_utilization': round(total / total_budget * 100, 1) if total_budget > 0 else 0,
+        }
+
+    @staticmethod
+    def _daily_extremes(ordinals, amounts, start_ord, end_ord):
+        """Highest and lowest days among the days with spending, as (date label, amount)"""
+        if not len(ordinals):
+            return {}
+        daily = np.bincount(ordinals - start_ord, weights=amounts, minlength=end_ord - start_ord)
+        active = np.flatnonzero(np.bincount(ordinals - start_ord, minlength=end_ord - start_ord))
+        highest = active[np.argmax(daily[active])]
+        lowest = active[np.argmin(daily[active])]
+        day_label = lambda offset: f"{date.fromordinal(int(start_ord + offset)):%d %b}"
+        return {
+            'highest_spending_day': (day_label(highest), round(float(daily[highest]), 2)),
+            'lowest_spending_day': (day_label(lowest), round(float(daily[lowest]), 2)),
+        }
+
+    @staticmethod
+    def _recommendations(insights, sorted_categories, total, daily_average):
+        recommendations = []
+        if insights['spending_trend'] == 'up' and insights['spending_change_percent'] > 10:
+            recommendations.append({
+                'type': 'warning',
+                'text': f"Your spending increased by {insights['spending_change_percent']}% compared to the previous period. Consider reviewing your expenses."
+            })
+
+        if insights['budget_alerts']:
+            recommendations.append({
+                'type': 'alert',
+                'text': f"You've exceeded budget in {len(insights['budget_alerts'])} category(ies). Review your spending limits."
+            })
+
+        if sorted_categories and sorted_categories[0][1] > total * 0.7:
+            recommendations.append({
+                'type': 'info',
+                'text': f"Your top category ({sorted_categories[0][0]}) accounts for {round(sorted_categories[0][1] / total * 100, 1)}% of spending. This is concentrated."
+            })
+
+        if daily_average > 0 and insights.get('highest_spending_day'):
+            high_day, high_amount = insights['highest_spending_day']
+            if high_amount > daily_average * 3:
+                recommendations.append({
+                    'type': 'info',
+                    'text': f"{high_day} had unusually high spending (₹{high_amount}). Check for bulk purchases."
+                })
+        return recommendations
@@ -0,0 +1,231 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from sqlalchemy import event
+import logging
+import os
+import threading
+import time
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + '}'
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram, one series per label tuple"""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted(self._series.items())
+        for labels, series in items:
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{_labels(self.label_names + ("le",), labels + (bound,))} {count}')
+            lines.append(f'{self.name}_bucket{_labels(self.label_names + ("le",), labels + ("+Inf",))} {series[-1]}')
+            lines.append(f'{self.name}_sum{_labels(self.label_names, labels)} {series[-2]:.6f}')
+            lines.append(f'{self.name}_count{_labels(self.label_names, labels)} {series[-1]}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] += amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f'{self.name}{_labels(self.label_names, labels)} {value}')
+        return lines
+
+
+class Metrics:
+    """Request timing and SQL instrumentation, rendered in the Prometheus text format.
+
+    ``init_app`` hooks the request cycle and the engine's
+    ``before_cursor_execute``/``after_cursor_execute`` events; statement counts
+    and SQL time are kept per thread, so each request only sees its own
+    queries. Side paths that don't run inside a request (Excel writes, email
+    delivery, recurring sweeps) are timed with ``timed``/``track``. Requests
+    slower than ``SLOW_REQUEST_SECONDS`` are logged with their SQL breakdown.
+
+    SQL a worker thread runs on a request's behalf is not part of that
+    request's counts. A thread that wraps its work in ``attribute`` has its
+    statements counted under ``background_sql_*{operation=...}`` instead; the
+    group-commit writer does, so with ``GROUP_COMMIT_ENABLED`` the inserts
+    behind /map_transaction and /quick_map show up as ``group_commit`` there.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._local = threading.local()
+        self._engines = set()
+        self.request_duration = Histogram('http_request_duration_seconds', 'Wall time per request',
+                                          ('endpoint', 'method'), DURATION_BUCKETS)
+        self.request_sql_statements = Histogram('http_request_sql_statements', 'SQL statements per request',
+                                                ('endpoint',), COUNT_BUCKETS)
+        self.request_sql_duration = Histogram('http_request_sql_duration_seconds', 'SQL time per request',
+                                              ('endpoint',), DURATION_BUCKETS)
+        self.requests_total = Counter('http_requests_total', 'Requests by endpoint, method and status',
+                                      ('endpoint', 'method', 'status'))
+        self.slow_requests_total = Counter('http_slow_requests_total', 'Requests over SLOW_REQUEST_SECONDS',
+                                           ('endpoint',))
+        self.operation_duration = Histogram('operation_duration_seconds', 'Background and side-path operations',
+                                            ('operation',), DURATION_BUCKETS)
+        self.operation_errors_total = Counter('operation_errors_total', 'Failed side-path operations',
+                                              ('operation',))
+        self.background_sql_statements_total = Counter('background_sql_statements_total',
+                                                       'SQL statements run outside a request, by operation',
+                                                       ('operation',))
+        self.background_sql_seconds_total = Counter('background_sql_seconds_total',
+                                                    'SQL time outside a request, by operation', ('operation',))
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from models import db
+
+        self.app = app
+        app.extensions['metrics'] = self
+        app.config.setdefault('SLOW_REQUEST_SECONDS', float(os.getenv('SLOW_REQUEST_SECONDS', '1.0')))
+
+        with app.app_context():
+            engine = db.engine
+        if engine not in self._engines:
+            event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+            self._engines.add(engine)
+
+        app.before_request(self._start_request)
+        app.after_request(self._end_request)
+
+    # SQL events
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.statement_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(self._local, 'statement_started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        self._local.sql_count = getattr(self._local, 'sql_count', 0) + 1
+        self._local.sql_seconds = getattr(self._local, 'sql_seconds', 0.0) + elapsed
+        operation = getattr(self._local, 'operation', None)
+        if operation is not None and getattr(self._local, 'request_started', None) is None:
+            self.background_sql_statements_total.inc(operation)
+            self.background_sql_seconds_total.inc(operation, amount=elapsed)
+
+    # Request cycle
+
+    def _start_request(self):
+        self._local.request_started = time.perf_counter()
+        self._local.sql_count = 0
+        self._local.sql_seconds = 0.0
+
+    def _end_request(self, response):
+        from flask import request
+
+        started = getattr(self._local, 'request_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        self._local.request_started = None
+        endpoint = request.endpoint or 'unmatched'
+        sql_count = getattr(self._local, 'sql_count', 0)
+        sql_seconds = getattr(self._local, 'sql_seconds', 0.0)
+
+        self.request_duration.observe(elapsed, endpoint, request.method)
+        self.request_sql_statements.observe(sql_count, endpoint)
+        self.request_sql_duration.observe(sql_seconds, endpoint)
+        self.requests_total.inc(endpoint, request.method, str(response.status_code))
+
+        if elapsed >= self.app.config['SLOW_REQUEST_SECONDS']:
+            self.slow_requests_total.inc(endpoint)
+            logging.warning(f"Slow request: {request.method} {request.path} ({endpoint}) took {elapsed * 1000:.0f} ms, "
+                            f"{sql_count} SQL statement(s) in {sql_seconds * 1000:.0f} ms")
+        return response
+
+    # Side paths
+
+    @contextmanager
+    def track(self, operation):
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.operation_errors_total.inc(operation)
+            raise
+        finally:
+            self.operation_duration.observe(time.perf_counter() - started, operation)
+
+    @contextmanager
+    def attribute(self, operation):
+        """Count the SQL this thread runs outside a request under ``operation``"""
+        previous = getattr(self._local, 'operation', None)
+        self._local.operation = operation
+        try:
+            yield
+        finally:
+            self._local.operation = previous
+
+    def timed(self, operation):
+        """Decorator form of ``track``"""
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.track(operation):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def render(self, extra_lines=()):
+        lines = []
+        for metric in (self.requests_total, self.request_duration, self.request_sql_statements,
+                       self.request_sql_duration, self.slow_requests_total, self.operation_duration,
+                       self.operation_errors_total, self.background_sql_statements_total,
+                       self.background_sql_seconds_total):
+            lines.extend(metric.render())
+        lines.extend(extra_lines)
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
@@ -0,0 +1,107 @@
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import check_password_hash, generate_password_hash
+from services.metrics import metrics
+import atexit
+import threading
+import config
+
+class HasherBusy(Exception):
+    """More password hashes are waiting than ``PASSWORD_HASH_MAX_PENDING`` allows"""
+
+
+class PasswordHasher:
+    """Password hashing and verification on a bounded thread pool.
+
+    scrypt and PBKDF2 are CPU-bound on purpose, and hashlib releases the GIL
+    while computing them, so the pool caps how many cores a burst of logins or
+    registrations can take: at most ``PASSWORD_HASH_WORKERS`` hashes run at
+    once, and once ``PASSWORD_HASH_MAX_PENDING`` callers are waiting, new ones
+    get ``HasherBusy`` instead of queueing behind them. Other requests keep
+    their threads and cores.
+
+    ``PASSWORD_HASH_METHOD`` sets the algorithm and cost. ``needs_rehash``
+    compares a stored hash's parameters with it, so ``verify_and_update`` can
+    upgrade a hash the next time its password is known to be right.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.method = config.PASSWORD_HASH_METHOD
+        self.workers = config.PASSWORD_HASH_WORKERS
+        self.max_pending = config.PASSWORD_HASH_MAX_PENDING
+        self._prefix = None
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['password_hasher'] = self
+        app.config.setdefault('PASSWORD_HASH_METHOD', config.PASSWORD_HASH_METHOD)
+        app.config.setdefault('PASSWORD_HASH_WORKERS', config.PASSWORD_HASH_WORKERS)
+        app.config.setdefault('PASSWORD_HASH_MAX_PENDING', config.PASSWORD_HASH_MAX_PENDING)
+        self.shutdown()
+        self.method = app.config['PASSWORD_HASH_METHOD']
+        self.workers = app.config['PASSWORD_HASH_WORKERS']
+        self.max_pending = app.config['PASSWORD_HASH_MAX_PENDING']
+        self._prefix = None
+        atexit.register(self.shutdown)
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+                self._slots = threading.BoundedSemaphore(self.workers + self.max_pending)
+            return self._executor, self._slots
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = None
+            self._slots = None
+
+    def _run(self, operation, fn, *args):
+        executor, slots = self._pool()
+        if not slots.acquire(blocking=False):
+            metrics.operation_errors_total.inc(operation)
+            raise HasherBusy(f"{operation}: too many password hashes pending")
+        try:
+            with metrics.track(operation):
+                return executor.submit(fn, *args).result()
+        finally:
+            slots.release()
+
+    @property
+    def prefix(self):
+        """The ``method:cost`` prefix hashes made with the configured method start with"""
+        if self._prefix is None:
+            self._prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return self._prefix
+
+    def hash(self, password):
+        return self._run('password_hash', generate_password_hash, password, self.method)
+
+    def verify(self, stored_hash, password):
+        if not stored_hash:
+            return False
+        return self._run('password_verify', check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        return stored_hash.split('$', 1)[0] != self.prefix
+
+    def verify_and_update(self, user, password):
+        """Check ``password`` for ``user``; rehash it with the current method if its hash is outdated.
+
+        Returns True when the password is right. The caller commits the new hash.
+        """
+        if not self.verify(user.password, password):
+            return False
+        if self.needs_rehash(user.password):
+            user.password = self.hash(password)
+        return True
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,161 @@
+from models import db
+from models.budget_recurring import RecurringTransaction
+from models.transactions import Transaction
+from services.rollup_service import RollupService
+from services.cache import result_cache
+from services.metrics import metrics
+from datetime import date, datetime
+from sqlalchemy import insert
+import atexit
+import calendar
+import config
+import logging
+import threading
+
+class RecurringScheduler:
+    """Materialises due recurring transactions for every user.
+
+    ``sweep`` walks active recurring items in id-ordered batches and writes one
+    bulk insert per batch. Each item is caught up month by month from the
+    month after ``last_logged``, so downtime across a month boundary still
+    produces every missed entry, dated on its scheduled day. ``last_logged`` is
+    advanced with a compare-and-set in the same transaction as the inserts,
+    which keeps overlapping sweeps (several workers, CLI plus app) idempotent.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._thread = None
+        self._stop = threading.Event()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['recurring_scheduler'] = self
+        app.config.setdefault('RECURRING_SCHEDULER_ENABLED', config.RECURRING_SCHEDULER_ENABLED)
+        app.config.setdefault('RECURRING_SCHEDULER_INTERVAL', config.RECURRING_SCHEDULER_INTERVAL)
+        app.config.setdefault('RECURRING_SCHEDULER_BATCH_SIZE', 500)
+        atexit.register(self.stop)
+        if app.config['RECURRING_SCHEDULER_ENABLED']:
+            self.start()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='recurring-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    created = RecurringScheduler.sweep(batch_size=self.app.config['RECURRING_SCHEDULER_BATCH_SIZE'])
+                    if created:
+                        logging.info(f"Recurring scheduler logged {created} transaction(s)")
+            except Exception as e:
+                logging.error(f"Recurring scheduler sweep failed: {e}")
+            self._stop.wait(self.app.config['RECURRING_SCHEDULER_INTERVAL'])
+
+    @staticmethod
+    def due_dates(rtx, today):
+        """Scheduled dates of ``rtx`` that are due by ``today`` and not yet logged.
+
+        A new item starts from the month it was created in. If its day has
+        already passed that month, that occurrence is dated on the day the
+        item was created, so it is logged at once but never before it existed.
+        """
+        created_on = rtx.created_at.date() if rtx.created_at else None
+        if rtx.last_logged:
+            year, month = rtx.last_logged.year, rtx.last_logged.month + 1
+        elif rtx.created_at:
+            year, month = rtx.created_at.year, rtx.created_at.month
+        else:
+            year, month = today.year, today.month
+        if month > 12:
+            year, month = year + 1, 1
+
+        dates = []
+        while (year, month) <= (today.year, today.month):
+            # Clamp e.g. day 31 to the last day of shorter months
+            day = min(rtx.day_of_month, calendar.monthrange(year, month)[1])
+            scheduled = date(year, month, day)
+            if scheduled > today:
+                break
+            dates.append(max(scheduled, created_on) if created_on else scheduled)
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return dates
+
+    @staticmethod
+    @metrics.timed('recurring_sweep')
+    def sweep(today=None, user_id=None, batch_size=500):
+        """Log every due recurring transaction. Returns the number of transactions created."""
+        today = today or date.today()
+        created = 0
+        last_id = 0
+
+        while True:
+            query = RecurringTransaction.query.filter(
+                RecurringTransaction.is_active == True,
+                RecurringTransaction.id > last_id
+            )
+            if user_id is not None:
+                query = query.filter(RecurringTransaction.user_id == user_id)
+            batch = query.order_by(RecurringTransaction.id).limit(batch_size).all()
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            rows = []
+            try:
+                for rtx in batch:
+                    dates = RecurringScheduler.due_dates(rtx, today)
+                    if not dates:
+                        continue
+
+                    # Claim the item; a concurrent sweep that got here first makes this a no-op
+                    claimed = RecurringTransaction.query.filter(
+                        RecurringTransaction.id == rtx.id,
+                        RecurringTransaction.last_logged == rtx.last_logged if rtx.last_logged else RecurringTransaction.last_logged.is_(None)
+                    ).update({RecurringTransaction.last_logged: dates[-1]}, synchronize_session=False)
+                    if not claimed:
+                        continue
+
+                    for scheduled in dates:
+                        rows.append({
+                            'user_id': rtx.user_id,
+                            'date': scheduled,
+                            'title': f"[Recurring] {rtx.title}",
+                            'amount': rtx.amount,
+                            'category': rtx.category,
+                            'sub_category': rtx.sub_category,
+                            'payment_method': rtx.payment_method,
+                            'created_at': datetime.utcnow()
+                        })
+
+                if rows:
+                    db.session.execute(insert(Transaction), rows)
+                    RollupService.apply_many([RollupService.snapshot(row) for row in rows])
+                db.session.commit()
+                created += len(rows)
+
+                for row in rows:
+                    result_cache.invalidate_for_transaction(row['user_id'], row['date'])
+            except Exception as e:
+                logging.error(f"Error processing recurring batch ending at id {last_id}: {e}")
+                db.session.rollback()
+
+            if len(batch) < batch_size:
+                break
+
+        return created
+
+
+recurring_scheduler = RecurringScheduler()
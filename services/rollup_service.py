@@ -0,0 +1,402 @@
+from models import db
+from models.rollups import SpendingRollup, CategorySpend
+from models.transactions import Transaction
+from models.get_dates import get_month_range
+from sqlalchemy import func, extract, case, or_
+from datetime import datetime
+import logging
+
+class RollupService:
+    """Maintains the per-month spending rollup.
+
+    Every write path calls one of the ``record_*`` helpers before it commits,
+    so the rollup changes in the same database transaction as the rows it
+    summarises. Aggregate reads then go through the ``*_total(s)`` helpers.
+
+    The same helpers keep ``CategorySpend``, a running (user, month, category)
+    counter that budget checks read with one primary-key lookup. Both are
+    changed in SQL rather than read into Python and written back, so
+    concurrent writers can't lose an increment: additions go through
+    ``INSERT ... ON CONFLICT DO UPDATE SET total = total + excluded.total``,
+    which also creates a missing row without racing another first write,
+    and removals through ``UPDATE ... SET total = total - ?``.
+    """
+
+    BUCKET_COLUMNS = ('user_id', 'year', 'month', 'category', 'sub_category', 'payment_method')
+    COUNTER_COLUMNS = ('user_id', 'year', 'month', 'category')
+    # Rows per upsert statement, well under SQLite's bound-parameter limit
+    UPSERT_CHUNK = 500
+
+    @staticmethod
+    def snapshot(tx):
+        """Capture the rollup-relevant fields of a transaction (or dict)."""
+        if isinstance(tx, dict):
+            get = tx.get
+        else:
+            get = lambda field: getattr(tx, field, None)
+        return {
+            'user_id': get('user_id'),
+            'date': get('date'),
+            'amount': float(get('amount') or 0),
+            'category': get('category'),
+            'sub_category': get('sub_category') or '',
+            'payment_method': get('payment_method') or ''
+        }
+
+    @staticmethod
+    def _bucket_key(row):
+        return (row['user_id'], row['date'].year, row['date'].month,
+                row['category'], row['sub_category'], row['payment_method'])
+
+    @staticmethod
+    def _bucket_query(key):
+        user_id, year, month, category, sub_category, payment_method = key
+        return SpendingRollup.query.filter_by(
+            user_id=user_id,
+            year=year,
+            month=month,
+            category=category,
+            sub_category=sub_category,
+            payment_method=payment_method
+        )
+
+    @staticmethod
+    def _upsert(model, rows, key_columns, on_conflict):
+        """``INSERT ... ON CONFLICT (key_columns) DO UPDATE`` for ``rows``, in chunks.
+
+        ``on_conflict(existing, incoming)`` returns the SET clause, where
+        ``existing`` is the table and ``incoming`` the row that conflicted.
+        The dialect's own insert is used: SQLite and PostgreSQL spell it
+        ``ON CONFLICT``, MySQL ``ON DUPLICATE KEY UPDATE``.
+        """
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect in ('mysql', 'mariadb'):
+            from sqlalchemy.dialects.mysql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        table = model.__table__
+        for start in range(0, len(rows), RollupService.UPSERT_CHUNK):
+            statement = insert(table).values(rows[start:start + RollupService.UPSERT_CHUNK])
+            if dialect in ('mysql', 'mariadb'):
+                statement = statement.on_duplicate_key_update(on_conflict(table.c, statement.inserted))
+            else:
+                statement = statement.on_conflict_do_update(
+                    index_elements=[table.c[name] for name in key_columns],
+                    set_=on_conflict(table.c, statement.excluded)
+                )
+            db.session.execute(statement)
+
+    @staticmethod
+    def record_insert(tx):
+        RollupService.apply_many([RollupService.snapshot(tx)])
+
+    @staticmethod
+    def record_delete(tx):
+        RollupService.remove_many([RollupService.snapshot(tx)])
+
+    @staticmethod
+    def record_update(old_snapshot, tx):
+        """Move a transaction between buckets. ``old_snapshot`` must be taken before the edit."""
+        RollupService.remove_many([old_snapshot])
+        RollupService.apply_many([RollupService.snapshot(tx)])
+
+    @staticmethod
+    def apply_many(rows):
+        """Add a batch of transaction snapshots to the rollup with one multi-row upsert."""
+        grouped = {}
+        for row in rows:
+            key = RollupService._bucket_key(row)
+            amount = row['amount']
+            bucket = grouped.get(key)
+            if bucket is None:
+                grouped[key] = [amount, 1, amount, amount]
+            else:
+                bucket[0] += amount
+                bucket[1] += 1
+                bucket[2] = min(bucket[2], amount)
+                bucket[3] = max(bucket[3], amount)
+
+        now = datetime.utcnow()
+        buckets = [
+            {
+                'user_id': user_id,
+                'year': year,
+                'month': month,
+                'category': category,
+                'sub_category': sub_category,
+                'payment_method': payment_method,
+                'total': total,
+                'count': count,
+                'min_amount': min_amount,
+                'max_amount': max_amount,
+                'updated_at': now
+            }
+            for (user_id, year, month, category, sub_category, payment_method), (total, count, min_amount, max_amount)
+            in grouped.items()
+        ]
+
+        # Add to the stored bucket in SQL, so concurrent writers can't lose an increment
+        def merge(existing, incoming):
+            return {
+                'total': existing.total + incoming.total,
+                'count': existing.count + incoming.count,
+                'min_amount': case(
+                    (or_(existing.min_amount.is_(None), incoming.min_amount < existing.min_amount), incoming.min_amount),
+                    else_=existing.min_amount
+                ),
+                'max_amount': case(
+                    (or_(existing.max_amount.is_(None), incoming.max_amount > existing.max_amount), incoming.max_amount),
+                    else_=existing.max_amount
+                ),
+                'updated_at': incoming.updated_at
+            }
+
+        if buckets:
+            RollupService._upsert(SpendingRollup, buckets, RollupService.BUCKET_COLUMNS, merge)
+        RollupService._adjust_category_spend(grouped.items(), sign=1)
+
+    @staticmethod
+    def remove_many(rows):
+        """Subtract a batch of snapshots. The rows must already be deleted/changed in the session."""
+        grouped = {}
+        for row in rows:
+            key = RollupService._bucket_key(row)
+            bucket = grouped.setdefault(key, [0, 0, []])
+            bucket[0] += row['amount']
+            bucket[1] += 1
+            bucket[2].append(row['amount'])
+
+        for key, (total, count, amounts) in grouped.items():
+            bucket = RollupService._bucket_query(key)
+            updated = bucket.update({
+                SpendingRollup.total: SpendingRollup.total - total,
+                SpendingRollup.count: SpendingRollup.count - count,
+                SpendingRollup.updated_at: datetime.utcnow()
+            }, synchronize_session=False)
+            if not updated:
+                logging.warning(f"Rollup bucket missing for {key}, skipping decrement")
+                continue
+            if bucket.filter(SpendingRollup.count <= 0).delete(synchronize_session=False):
+                continue
+
+            # Min/max can't be decremented, so re-read them only when an extreme left the bucket
+            min_amount, max_amount = bucket.with_entities(SpendingRollup.min_amount, SpendingRollup.max_amount).one()
+            if any(min_amount is None or a <= min_amount or a >= max_amount for a in amounts):
+                RollupService._refresh_extremes(key)
+
+        RollupService._adjust_category_spend(grouped.items(), sign=-1)
+
+    @staticmethod
+    def _adjust_category_spend(buckets, sign):
+        """Add (``sign=1``) or subtract (``sign=-1``) grouped rollup buckets to the category counters"""
+        deltas = {}
+        for key, (total, count, *_) in buckets:
+            user_id, year, month, category = key[:4]
+            delta = deltas.setdefault((user_id, year, month, category), [0.0, 0])
+            delta[0] += sign * total
+            delta[1] += sign * count
+
+        now = datetime.utcnow()
+        # New counters and increments go through one upsert, so two first writes can't both insert
+        increments = [
+            {'user_id': user_id, 'year': year, 'month': month, 'category': category,
+             'total': total, 'count': count, 'updated_at': now}
+            for (user_id, year, month, category), (total, count) in deltas.items() if count > 0
+        ]
+        if increments:
+            RollupService._upsert(CategorySpend, increments, RollupService.COUNTER_COLUMNS, lambda existing, incoming: {
+                'total': existing.total + incoming.total,
+                'count': existing.count + incoming.count,
+                'updated_at': incoming.updated_at
+            })
+
+        for (user_id, year, month, category), (total, count) in deltas.items():
+            if count >= 0:
+                continue
+            counter = CategorySpend.query.filter_by(user_id=user_id, year=year, month=month, category=category)
+            counter.update({
+                CategorySpend.total: CategorySpend.total + total,
+                CategorySpend.count: CategorySpend.count + count,
+                CategorySpend.updated_at: now
+            }, synchronize_session=False)
+            counter.filter(CategorySpend.count <= 0).delete(synchronize_session=False)
+
+    @staticmethod
+    def _refresh_extremes(key):
+        user_id, year, month, category, sub_category, payment_method = key
+        min_amount, max_amount = db.session.query(
+            func.min(Transaction.amount), func.max(Transaction.amount)
+        ).filter(
+            Transaction.user_id == user_id,
+            Transaction.in_period(*get_month_range(year, month)),
+            Transaction.category == category,
+            func.coalesce(Transaction.sub_category, '') == sub_category,
+            func.coalesce(Transaction.payment_method, '') == payment_method
+        ).one()
+        RollupService._bucket_query(key).update({
+            SpendingRollup.min_amount: min_amount,
+            SpendingRollup.max_amount: max_amount
+        }, synchronize_session=False)
+
+    @staticmethod
+    def rebuild(user_id=None):
+        """Recompute the rollup from the transactions table. Returns the number of buckets written."""
+        delete_query = SpendingRollup.query
+        if user_id is not None:
+            delete_query = delete_query.filter_by(user_id=user_id)
+        delete_query.delete(synchronize_session=False)
+
+        year_col = extract('year', Transaction.date)
+        month_col = extract('month', Transaction.date)
+        sub_category_col = func.coalesce(Transaction.sub_category, '')
+        payment_method_col = func.coalesce(Transaction.payment_method, '')
+
+        query = db.session.query(
+            Transaction.user_id, year_col, month_col, Transaction.category,
+            sub_category_col, payment_method_col,
+            func.sum(Transaction.amount), func.count(Transaction.id),
+            func.min(Transaction.amount), func.max(Transaction.amount)
+        )
+        if user_id is not None:
+            query = query.filter(Transaction.user_id == user_id)
+        query = query.group_by(
+            Transaction.user_id, year_col, month_col, Transaction.category,
+            sub_category_col, payment_method_col
+        )
+
+        buckets = [
+            {
+                'user_id': uid,
+                'year': int(year),
+                'month': int(month),
+                'category': category,
+                'sub_category': sub_category,
+                'payment_method': payment_method,
+                'total': float(total or 0),
+                'count': count,
+                'min_amount': min_amount,
+                'max_amount': max_amount
+            }
+            for uid, year, month, category, sub_category, payment_method, total, count, min_amount, max_amount in query.all()
+        ]
+        if buckets:
+            db.session.bulk_insert_mappings(SpendingRollup, buckets)
+        RollupService._rebuild_category_spend(user_id)
+        db.session.commit()
+        return len(buckets)
+
+    @staticmethod
+    def _rebuild_category_spend(user_id=None):
+        """Recompute the category counters from the (just rebuilt) rollup buckets"""
+        delete_query = CategorySpend.query
+        if user_id is not None:
+            delete_query = delete_query.filter_by(user_id=user_id)
+        delete_query.delete(synchronize_session=False)
+
+        query = db.session.query(
+            SpendingRollup.user_id, SpendingRollup.year, SpendingRollup.month, SpendingRollup.category,
+            func.sum(SpendingRollup.total), func.sum(SpendingRollup.count)
+        )
+        if user_id is not None:
+            query = query.filter(SpendingRollup.user_id == user_id)
+        query = query.group_by(SpendingRollup.user_id, SpendingRollup.year, SpendingRollup.month, SpendingRollup.category)
+
+        counters = [
+            {'user_id': uid, 'year': year, 'month': month, 'category': category,
+             'total': float(total or 0), 'count': int(count or 0)}
+            for uid, year, month, category, total, count in query.all()
+        ]
+        if counters:
+            db.session.bulk_insert_mappings(CategorySpend, counters)
+
+    # ----- Aggregate reads -----
+
+    @staticmethod
+    def month_total(user_id, year, month):
+        total = db.session.query(func.sum(SpendingRollup.total)).filter(
+            SpendingRollup.user_id == user_id,
+            SpendingRollup.year == year,
+            SpendingRollup.month == month
+        ).scalar()
+        return float(total or 0)
+
+    @staticmethod
+    def category_totals(user_id, year, month):
+        """Return [(category, total), ...] for one month."""
+        rows = db.session.query(
+            SpendingRollup.category, func.sum(SpendingRollup.total)
+        ).filter(
+            SpendingRollup.user_id == user_id,
+            SpendingRollup.year == year,
+            SpendingRollup.month == month
+        ).group_by(SpendingRollup.category).all()
+        return [(category, float(total or 0)) for category, total in rows]
+
+    @staticmethod
+    def monthly_totals(user_id, year):
+        """Return {month_number: total} for every month of ``year`` that has spending."""
+        rows = db.session.query(
+            SpendingRollup.month, func.sum(SpendingRollup.total)
+        ).filter(
+            SpendingRollup.user_id == user_id,
+            SpendingRollup.year == year
+        ).group_by(SpendingRollup.month).all()
+        return {month: float(total or 0) for month, total in rows}
+
+    @staticmethod
+    def totals_for_months(user_id, periods):
+        """Return {(year, month): total} for the given list of (year, month) pairs."""
+        periods = list(periods)
+        if not periods:
+            return {}
+        years = {year for year, _ in periods}
+        rows = db.session.query(
+            SpendingRollup.year, SpendingRollup.month, func.sum(SpendingRollup.total)
+        ).filter(
+            SpendingRollup.user_id == user_id,
+            SpendingRollup.year.in_(years)
+        ).group_by(SpendingRollup.year, SpendingRollup.month).all()
+        totals = {(year, month): float(total or 0) for year, month, total in rows}
+        return {period: totals.get(period, 0.0) for period in periods}
+
+    @staticmethod
+    def category_month_totals(user_id, periods):
+        """Return {(year, month): {category: total}} for the given (year, month) pairs, in one grouped query."""
+        periods = list(periods)
+        if not periods:
+            return {}
+        years = {year for year, _ in periods}
+        rows = db.session.query(
+            SpendingRollup.year, SpendingRollup.month, SpendingRollup.category, func.sum(SpendingRollup.total)
+        ).filter(
+            SpendingRollup.user_id == user_id,
+            SpendingRollup.year.in_(years)
+        ).group_by(SpendingRollup.year, SpendingRollup.month, SpendingRollup.category).all()
+
+        wanted = set(periods)
+        totals = {period: {} for period in periods}
+        for year, month, category, total in rows:
+            if (year, month) in wanted:
+                totals[(year, month)][category] = float(total or 0)
+        return totals
+
+    @staticmethod
+    def category_spent(user_id, year, month, category):
+        """Running total of one category in one month, from its counter"""
+        total = db.session.query(CategorySpend.total).filter_by(
+            user_id=user_id, year=year, month=month, category=category
+        ).scalar()
+        return float(total or 0)
+
+    @staticmethod
+    def month_count(user_id, year, month):
+        """Number of transactions in one month"""
+        count = db.session.query(func.sum(SpendingRollup.count)).filter(
+            SpendingRollup.user_id == user_id,
+            SpendingRollup.year == year,
+            SpendingRollup.month == month
+        ).scalar()
+        return int(count or 0)
@@ -0,0 +1,149 @@
+from models import db
+from models.transactions import Transaction
+from sqlalchemy import text
+import logging
+import re
+import weakref
+
+class SearchService:
+    """Full-text search over a user's whole transaction history.
+
+    On SQLite, ``transactions_fts`` is an FTS5 external-content index over
+    ``transactions`` (title, category, sub_category, payment_method). Triggers
+    keep it in sync with every insert, update and delete, including the bulk
+    Core inserts done by the migration and the recurring scheduler. On other
+    databases, or a SQLite build without FTS5, searches fall back to ``ILIKE``.
+
+    Only the all-months ``search`` uses the index, and it matches whole
+    words and word prefixes ("ub" finds "Uber", "ber" doesn't). The search
+    box inside one period (``filter``) keeps the original title substring
+    match: the period's date range is already narrow, and users expect
+    "ber" to find "Uber" there.
+    """
+
+    TABLE = 'transactions_fts'
+    COLUMNS = ('title', 'category', 'sub_category', 'payment_method')
+    # bm25 column weights, in COLUMNS order: a title hit outranks a category hit
+    WEIGHTS = (10.0, 4.0, 2.0, 1.0)
+
+    _DDL = [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5(
+            title, category, sub_category, payment_method,
+            content='transactions', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )""",
+        f"""CREATE TRIGGER IF NOT EXISTS transactions_fts_ai AFTER INSERT ON transactions BEGIN
+            INSERT INTO {TABLE}(rowid, title, category, sub_category, payment_method)
+            VALUES (new.id, new.title, new.category, new.sub_category, new.payment_method);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS transactions_fts_ad AFTER DELETE ON transactions BEGIN
+            INSERT INTO {TABLE}({TABLE}, rowid, title, category, sub_category, payment_method)
+            VALUES ('delete', old.id, old.title, old.category, old.sub_category, old.payment_method);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS transactions_fts_au AFTER UPDATE OF title, category, sub_category, payment_method ON transactions BEGIN
+            INSERT INTO {TABLE}({TABLE}, rowid, title, category, sub_category, payment_method)
+            VALUES ('delete', old.id, old.title, old.category, old.sub_category, old.payment_method);
+            INSERT INTO {TABLE}(rowid, title, category, sub_category, payment_method)
+            VALUES (new.id, new.title, new.category, new.sub_category, new.payment_method);
+        END""",
+    ]
+
+    # Whether the index exists, per engine, so apps on different databases don't share the answer
+    _available = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def is_available():
+        """True when the FTS index exists in the current database"""
+        engine = db.engine
+        available = SearchService._available.get(engine)
+        if available is None:
+            if engine.dialect.name != 'sqlite':
+                available = False
+            else:
+                exists = db.session.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {'name': SearchService.TABLE}
+                ).first()
+                available = exists is not None
+            SearchService._available[engine] = available
+        return available
+
+    @staticmethod
+    def ensure_index():
+        """Create the FTS table and its triggers if missing. A new index is populated from existing rows."""
+        if db.engine.dialect.name != 'sqlite':
+            return False
+        SearchService._available.pop(db.engine, None)
+        created = not SearchService.is_available()
+        try:
+            with db.engine.begin() as conn:
+                for statement in SearchService._DDL:
+                    conn.execute(text(statement))
+        except Exception as e:
+            # e.g. a SQLite build without FTS5
+            logging.error(f"Could not create the full-text index: {e}")
+            SearchService._available[db.engine] = False
+            return False
+
+        SearchService._available[db.engine] = True
+        if created:
+            SearchService.rebuild()
+        return True
+
+    @staticmethod
+    def rebuild():
+        """Re-index every transaction from the content table. Returns the number of rows indexed."""
+        with db.engine.begin() as conn:
+            conn.execute(text(f"INSERT INTO {SearchService.TABLE}({SearchService.TABLE}) VALUES ('rebuild')"))
+            count = conn.execute(text("SELECT count(*) FROM transactions")).scalar()
+        return count
+
+    @staticmethod
+    def build_match(query):
+        """Turn free text into an FTS5 expression: every term must match, each as a prefix.
+
+        ``"metro card"`` becomes ``"metro"* AND "card"*``. Terms are quoted so
+        user input can't inject FTS operators or column filters.
+        """
+        terms = re.findall(r'\w+', query or '', flags=re.UNICODE)
+        return ' AND '.join(f'"{term}"*' for term in terms)
+
+    @staticmethod
+    def filter(query, search):
+        """Restrict an ORM ``Transaction`` query for one period to titles containing ``search``"""
+        if not search:
+            return query
+        return query.filter(Transaction.title.ilike(f"%{search}%"))
+
+    @staticmethod
+    def search(user_id, query, limit=50):
+        """Best matches across the user's entire history, best first.
+
+        Returns a list of transaction dicts with an added ``score`` (bm25, lower
+        is better; None on the ILIKE fallback).
+        """
+        match = SearchService.build_match(query)
+        if not match:
+            return []
+
+        if not SearchService.is_available():
+            rows = Transaction.query.filter(
+                Transaction.user_id == user_id,
+                Transaction.title.ilike(f"%{query}%")
+            ).order_by(Transaction.date.desc(), Transaction.id.desc()).limit(limit).all()
+            return [dict(tx.to_dict(), score=None) for tx in rows]
+
+        weights = ', '.join(str(w) for w in SearchService.WEIGHTS)
+        ranked = db.session.execute(text(f"""
+            SELECT t.id, bm25({SearchService.TABLE}, {weights}) AS score
+            FROM {SearchService.TABLE}
+            JOIN transactions t ON t.id = {SearchService.TABLE}.rowid
+            WHERE {SearchService.TABLE} MATCH :match AND t.user_id = :user_id
+            ORDER BY score, t.date DESC
+            LIMIT :limit
+        """), {'match': match, 'user_id': user_id, 'limit': limit}).fetchall()
+
+        if not ranked:
+            return []
+        by_id = {tx.id: tx for tx in Transaction.query.filter(Transaction.id.in_([row.id for row in ranked]))}
+        return [dict(by_id[row.id].to_dict(), score=round(row.score, 4)) for row in ranked if row.id in by_id]
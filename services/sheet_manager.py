@@ -0,0 +1,80 @@
+from models.spreadsheets import SpreadSheet
+from services.sheet_storage import sheet_storage
+from datetime import date
+import logging
+import os
+import threading
+
+class SheetManager:
+    """Remembers each user's prepared sheet for the current month.
+
+    The first call for a user in a month creates the directory and the
+    templated sheet (or checks an existing one's template once) and syncs
+    ``all_sheets`` with the directory. Later calls are a dict lookup plus one
+    ``stat`` to notice a sheet that was deleted behind our back: no directory
+    listing, no workbook load and no DB round trip. A new month, a missing
+    file or ``invalidate`` sends the user back through the slow path.
+    """
+
+    def __init__(self):
+        self._current = {}   # user_name -> (sheet_name, sheet_path)
+        self._locks = {}     # user_name -> lock around the slow path
+        self._guard = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def current_sheet(self, user, today=None):
+        """Return ``(sheet_name, sheet_path)`` of the user's sheet for ``today``'s month, creating it if needed"""
+        today = today or date.today()
+        sheet_name = f"{today.strftime('%B')}_{today.year}"
+
+        cached = self._current.get(user.user_name)
+        if cached and cached[0] == sheet_name and os.path.isfile(cached[1]):
+            self.hits += 1
+            return cached
+
+        with self._user_lock(user.user_name):
+            # Another request may have prepared it while we waited
+            cached = self._current.get(user.user_name)
+            if cached and cached[0] == sheet_name and os.path.isfile(cached[1]):
+                self.hits += 1
+                return cached
+
+            self.misses += 1
+            sheet_path = self._prepare(user, sheet_name)
+            self._current[user.user_name] = (sheet_name, sheet_path)
+            return sheet_name, sheet_path
+
+    def invalidate(self, user_name=None):
+        """Forget one user's sheet (e.g. after a rename), or everyone's"""
+        if user_name is None:
+            self._current.clear()
+        else:
+            self._current.pop(user_name, None)
+
+    def _user_lock(self, user_name):
+        with self._guard:
+            lock = self._locks.get(user_name)
+            if lock is None:
+                lock = self._locks[user_name] = threading.Lock()
+            return lock
+
+    def _prepare(self, user, sheet_name):
+        sheet_storage.ensure_user_dir(user.user_name)
+        sheet_path = sheet_storage.sheet_path(user.user_name, sheet_name)
+
+        spreadsheet = SpreadSheet(sheet_name, user)
+        with sheet_storage.lock(sheet_path):
+            if not os.path.exists(sheet_path):
+                spreadsheet.create_templated_sheet(sheet_path)
+                logging.debug(f"Created sheet {sheet_path}")
+            elif not SpreadSheet.has_template(sheet_path):
+                user.current_sheet_path = sheet_path
+                if spreadsheet.is_blank():
+                    spreadsheet.apply_template()
+
+        user.sync_all_sheets_with_directory()
+        return sheet_path
+
+
+sheet_manager = SheetManager()
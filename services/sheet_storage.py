@@ -0,0 +1,79 @@
+import config
+import os
+import tempfile
+import threading
+
+class SheetStorage:
+    """Where the workbooks live, and how they are written safely.
+
+    Every path is absolute and built from ``SHEETS_ROOT``; nothing here (or in
+    its callers) changes the process working directory, so concurrent
+    requests in a threaded server can't write into each other's folders.
+    ``lock(path)`` serialises every read-modify-write of one file across
+    threads, and ``save_workbook`` writes to a temp file in the same
+    directory and renames it over the target, so a reader never sees a
+    half-written sheet.
+    """
+
+    def __init__(self, root=None):
+        self.root = os.path.abspath(root or config.SHEETS_ROOT)
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault('SHEETS_ROOT', self.root)
+        self.root = os.path.abspath(app.config['SHEETS_ROOT'])
+        app.extensions['sheet_storage'] = self
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, *parts):
+        """Absolute path under the root"""
+        return os.path.join(self.root, *parts)
+
+    def user_dir(self, user_name):
+        return self.path(user_name)
+
+    def sheet_path(self, user_name, sheet_name):
+        return self.path(user_name, f'{sheet_name}.xlsx')
+
+    def ensure_user_dir(self, user_name):
+        """Create the user's directory if needed. Returns True if it was created."""
+        user_dir = self.user_dir(user_name)
+        if os.path.isdir(user_dir):
+            return False
+        os.makedirs(user_dir, exist_ok=True)
+        return True
+
+    def rename_user_dir(self, prev_user_name, new_user_name):
+        """Rename a user's directory. Returns False if there was nothing to rename."""
+        prev_dir = self.user_dir(prev_user_name)
+        if not os.path.exists(prev_dir):
+            return False
+        os.rename(prev_dir, self.user_dir(new_user_name))
+        return True
+
+    def lock(self, file_path):
+        """Return the (re-entrant) lock that serialises every load/save of one file"""
+        path = os.path.abspath(file_path)
+        with self._guard:
+            lock = self._locks.get(path)
+            if lock is None:
+                lock = self._locks[path] = threading.RLock()
+            return lock
+
+    def save_workbook(self, workbook, file_path):
+        """Save atomically: write a temp file next to ``file_path`` and rename it into place"""
+        directory = os.path.dirname(os.path.abspath(file_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.', suffix='.xlsx.tmp', dir=directory)
+        os.close(fd)
+        try:
+            workbook.save(tmp_path)
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+sheet_storage = SheetStorage()
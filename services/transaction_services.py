@@ -1,114 +1,158 @@
 from models.users import User, db
 from services.user_services import UserService
+from services.rollup_service import RollupService
+from services.sheet_storage import sheet_storage
 import os
-from flask import send_file, abort
 import logging
-import openpyxl
-from openpyxl.styles import Alignment
-from services.email_service import send_email  # Import the send_email function
-import io
+import hashlib
+import tempfile
+import base64
+import json
 from datetime import datetime, timedelta, date
-from sqlalchemy import func, extract
+from sqlalchemy import func
+from models.get_dates import get_month_range
 import statistics
 
 class TransactionServices:
 
     @staticmethod
     def generate_file_content(month, year, user_id):
+        """Build (or reuse) the month's workbook from the database.
+
+        Returns ``(file_path, file_name)``; the caller decides whether to send
+        the file as a download or by email.
+        """
         try:
             if not user_id:
                 logging.error("User ID is missing")
-                return None, None, None
+                return None, None
 
-            logging.debug(f"Starting download for month: {month}, year: {year}, user_id: {user_id}")
+            logging.debug(f"Starting export for month: {month}, year: {year}, user_id: {user_id}")
 
             user = UserService.get_user_by_id(user_id)
             if not user:
                 logging.error(f"No user found with id: {user_id}")
-                return None, None, None
+                return None, None
 
             file_name = f'{month}_{year}'
-            file_path = f'{os.getcwd()}/Sheets/{user.user_name}/{file_name}.xlsx'
-
-            if os.path.exists(file_path):
-                logging.debug(f"XLSX file found: {file_path}")
-                response = send_file(file_path, as_attachment=True)
-                logging.debug(f"XLSX file sent: {file_path}")
-                return file_path, response, file_name
-            else:
-                logging.error(f"XLSX file not found: {file_path}")
-                abort(404, description="File not found")
+            month_num = datetime.strptime(month, '%B').month
+            file_path = ExcelService.export_month(user, month_num, int(year))
+            return file_path, file_name
         except Exception as e:
             logging.error(f"Error in generate_file_content: {e}")
-            return None, None, None
+            return None, None
 
     @staticmethod
-    def send_file_via_email(file_path, user_id):
-        try:
-            user = UserService.get_user_by_id(user_id)
-            if not user:
-                logging.error(f"No user found with id: {user_id}")
-                return
+    def queue_file_via_email(file_path, user_id, file_name=None):
+        """Queue the monthly report for delivery and return the email job id"""
+        from services.email_queue import email_queue
 
-            email_address = user.email_id
-            subject = f"{os.path.basename(file_path)} - Monthly Expense Report"
-            body = "File attached, Monthly expense report."
+        user = UserService.get_user_by_id(user_id)
+        if not user:
+            logging.error(f"No user found with id: {user_id}")
+            return None
 
-            print('\n\nSending email to:', email_address)
+        attachment_name = f'{file_name}.xlsx' if file_name else os.path.basename(file_path)
+        return email_queue.enqueue(
+            to_address=user.email_id,
+            subject=f"{attachment_name} - Monthly Expense Report",
+            body="File attached, Monthly expense report.",
+            attachment_path=file_path,
+            attachment_name=attachment_name,
+            user_id=user.id
+        )
+
+    # sort_by -> (column name, descending)
+    PAGE_SORTS = {
+        'date_desc': ('date', True),
+        'date_asc': ('date', False),
+        'amount_desc': ('amount', True),
+        'amount_asc': ('amount', False),
+    }
+    MAX_PAGE_SIZE = 200
 
-            # Create BytesIO object from file
-            with open(file_path, 'rb') as f:
-                file_data = io.BytesIO(f.read())
-                file_data.filename = os.path.basename(file_path)
+    @staticmethod
+    def encode_cursor(sort_by, tx):
+        value = tx.date.isoformat() if TransactionServices.PAGE_SORTS[sort_by][0] == 'date' else tx.amount
+        raw = json.dumps([sort_by, value, tx.id]).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
 
-            send_email(email_address, subject, body, file_data)
-            logging.info(f"Email sent successfully to {email_address}")
-        except Exception as e:
-            logging.error(f"Failed to send email to {email_address}: {e}")
+    @staticmethod
+    def decode_cursor(cursor, sort_by):
+        """Returns ``(value, id)``; raises ValueError for a malformed cursor or one from another sort"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            cursor_sort, value, tx_id = json.loads(raw)
+        except Exception:
+            raise ValueError('Invalid cursor')
+        if cursor_sort != sort_by:
+            raise ValueError('Cursor does not match sort order')
+        # Well-formed JSON can still hold the wrong types, e.g. a number for the date
+        try:
+            if TransactionServices.PAGE_SORTS[sort_by][0] == 'date':
+                value = date.fromisoformat(value)
+            else:
+                value = float(value)
+            return value, int(tx_id)
+        except (TypeError, ValueError):
+            raise ValueError('Invalid cursor')
 
     @staticmethod
-    def process_recurring_transactions(user_id):
-        from models.budget_recurring import RecurringTransaction
+    def page_transactions(user_id, start, end, category=None, search=None, sort_by='date_desc', cursor=None, limit=50):
+        """One keyset page of a user's transactions in ``[start, end)``.
+
+        Rows are ordered by ``(date, id)`` or ``(amount, id)`` and the next page
+        seeks past the last row of this one, so the cost of a page does not grow
+        with how deep into the list it is. Returns ``(transactions, next_cursor)``
+        where ``next_cursor`` is None on the last page.
+        """
         from models.transactions import Transaction
-        from models import db
-        from datetime import datetime, date
-        
-        today = date.today()
-        # Find active recurring transactions for this user that haven't been logged this month
-        # and whose day has passed or is today
-        recurring_txs = RecurringTransaction.query.filter_by(user_id=user_id, is_active=True).all()
-        
-        for rtx in recurring_txs:
-            # Check if already logged this month
-            if rtx.last_logged and rtx.last_logged.month == today.month and rtx.last_logged.year == today.year:
-                continue
-                
-            # Check if today is matching or past the scheduled day
-            if today.day >= rtx.day_of_month:
-                try:
-                    # Create the transaction
-                    new_tx = Transaction(
-                        user_id=user_id,
-                        date=today,
-                        title=f"[Recurring] {rtx.title}",
-                        amount=rtx.amount,
-                        category=rtx.category,
-                        sub_category=rtx.sub_category,
-                        payment_method=rtx.payment_method
-                    )
-                    db.session.add(new_tx)
-                    
-                    # Update the recurring transaction's last logged date
-                    rtx.last_logged = today
-                    db.session.commit()
-                    logging.info(f"Automatically logged recurring transaction: {rtx.title} for user {user_id}")
-                except Exception as e:
-                    logging.error(f"Error processing recurring transaction {rtx.id}: {e}")
-                    db.session.rollback()
+
+        if sort_by not in TransactionServices.PAGE_SORTS:
+            sort_by = 'date_desc'
+        limit = max(1, min(int(limit), TransactionServices.MAX_PAGE_SIZE))
+        column_name, descending = TransactionServices.PAGE_SORTS[sort_by]
+        column = getattr(Transaction, column_name)
+
+        query = Transaction.query.filter(
+            Transaction.user_id == user_id,
+            Transaction.in_period(start, end)
+        )
+        if category:
+            query = query.filter(Transaction.category == category)
+        if search:
+            from services.search_service import SearchService
+            query = SearchService.filter(query, search)
+
+        if cursor:
+            value, last_id = TransactionServices.decode_cursor(cursor, sort_by)
+            if descending:
+                query = query.filter(db.or_(column < value, db.and_(column == value, Transaction.id < last_id)))
+            else:
+                query = query.filter(db.or_(column > value, db.and_(column == value, Transaction.id > last_id)))
+
+        if descending:
+            query = query.order_by(column.desc(), Transaction.id.desc())
+        else:
+            query = query.order_by(column.asc(), Transaction.id.asc())
+
+        # One extra row tells us whether there is another page
+        rows = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = TransactionServices.encode_cursor(sort_by, rows[-1])
+        return [tx.to_dict() for tx in rows], next_cursor
 
     @staticmethod
     def get_analytics_data(user_id):
         """Generate comprehensive analytics data for dashboard"""
+        from services.analytics_engine import AnalyticsEngine
+        return AnalyticsEngine.compute(user_id)
+
+    @staticmethod
+    def _legacy_analytics_data(user_id):
+        """Per-metric implementation over the rollups, kept as a baseline for benchmarks"""
         from models.transactions import Transaction
         
         try:
@@ -119,8 +163,7 @@ class TransactionServices:
             # Get current month transactions
             current_month_txs = Transaction.query.filter(
                 Transaction.user_id == user_id,
-                extract('month', Transaction.date) == current_month,
-                extract('year', Transaction.date) == current_year
+                Transaction.in_period(*get_month_range(current_year, current_month))
             ).all()
             
             analytics = {
@@ -142,25 +185,18 @@ class TransactionServices:
     @staticmethod
     def _calculate_monthly_trend(user_id, current_year):
         """Calculate month-over-month spending for last 12 months"""
-        from models.transactions import Transaction
+        totals = RollupService.monthly_totals(user_id, current_year)
         
         monthly_totals = {}
         for month in range(1, 13):
-            total = db.session.query(func.sum(Transaction.amount)).filter(
-                Transaction.user_id == user_id,
-                extract('month', Transaction.date) == month,
-                extract('year', Transaction.date) == current_year
-            ).scalar() or 0
             month_name = datetime(current_year, month, 1).strftime('%b')
-            monthly_totals[month_name] = float(total)
+            monthly_totals[month_name] = float(totals.get(month, 0))
         
         return monthly_totals
     
     @staticmethod
     def _calculate_category_growth(user_id):
         """Compare this month vs last month spending by category"""
-        from models.transactions import Transaction
-        
         now = datetime.now()
         current_month = now.month
         current_year = now.year
@@ -171,23 +207,9 @@ class TransactionServices:
         else:
             last_month, last_year = current_month - 1, current_year
         
-        # Current month by category
-        current_data = db.session.query(
-            Transaction.category, func.sum(Transaction.amount)
-        ).filter(
-            Transaction.user_id == user_id,
-            extract('month', Transaction.date) == current_month,
-            extract('year', Transaction.date) == current_year
-        ).group_by(Transaction.category).all()
-        
-        # Last month by category
-        last_data = db.session.query(
-            Transaction.category, func.sum(Transaction.amount)
-        ).filter(
-            Transaction.user_id == user_id,
-            extract('month', Transaction.date) == last_month,
-            extract('year', Transaction.date) == last_year
-        ).group_by(Transaction.category).all()
+        # Category totals for both months come from the rollup
+        current_data = RollupService.category_totals(user_id, current_year, current_month)
+        last_data = RollupService.category_totals(user_id, last_year, last_month)
         
         current_dict = {cat: float(amt) for cat, amt in current_data}
         last_dict = {cat: float(amt) for cat, amt in last_data}
@@ -217,13 +239,7 @@ class TransactionServices:
     @staticmethod
     def _calculate_daily_average(user_id, month, year):
         """Calculate average spending per day"""
-        from models.transactions import Transaction
-        
-        total = db.session.query(func.sum(Transaction.amount)).filter(
-            Transaction.user_id == user_id,
-            extract('month', Transaction.date) == month,
-            extract('year', Transaction.date) == year
-        ).scalar() or 0
+        total = RollupService.month_total(user_id, year, month)
         
         # Approximate days in month
         if month == 12:
@@ -283,80 +299,26 @@ class TransactionServices:
     @staticmethod
     def _detect_anomalies(user_id, month, year):
         """Detect unusual spending patterns"""
-        from models.transactions import Transaction
-        
-        try:
-            current_txs = Transaction.query.filter(
-                Transaction.user_id == user_id,
-                extract('month', Transaction.date) == month,
-                extract('year', Transaction.date) == year
-            ).all()
-            
-            if not current_txs or len(current_txs) < 5:
-                return []
-            
-            # Get last 3 months average for each category
-            anomalies = []
-            categories = set(tx.category for tx in current_txs)
-            
-            for category in categories:
-                current_total = sum(tx.amount for tx in current_txs if tx.category == category)
-                
-                # Get last 3 months data
-                three_months_ago = date.today() - timedelta(days=90)
-                historical = Transaction.query.filter(
-                    Transaction.user_id == user_id,
-                    Transaction.category == category,
-                    Transaction.date < date(year, month, 1),
-                    Transaction.date >= three_months_ago
-                ).all()
-                
-                if historical:
-                    avg_historical = sum(tx.amount for tx in historical) / 3  # 3 months
-                    
-                    # Flag if current is 50% higher than average
-                    if current_total > avg_historical * 1.5:
-                        anomalies.append({
-                            'category': category,
-                            'current': round(current_total, 2),
-                            'historical_avg': round(avg_historical, 2),
-                            'increase_pct': round(((current_total - avg_historical) / avg_historical) * 100, 1)
-                        })
-            
-            return anomalies
-        except Exception as e:
-            logging.error(f"Error detecting anomalies: {e}")
-            return []
+        from services.anomaly_service import AnomalyService
+        return AnomalyService.detect(user_id, month, year)
     
     @staticmethod
     def _calculate_savings_rate(user_id, month, year):
         """Estimate savings rate (requires income data if available)"""
-        from models.transactions import Transaction
-        
         # This is a simple calculation based on spending
         # Can be enhanced if income data is available
-        current_total = db.session.query(func.sum(Transaction.amount)).filter(
-            Transaction.user_id == user_id,
-            extract('month', Transaction.date) == month,
-            extract('year', Transaction.date) == year
-        ).scalar() or 0
-        
-        # Calculate average spending last 3 months
-        three_months_avg = 0
+        periods = [(year, month)]
         for i in range(1, 4):
             if month - i <= 0:
-                check_month = 12 + month - i
-                check_year = year - 1
+                periods.append((year - 1, 12 + month - i))
             else:
-                check_month = month - i
-                check_year = year
-            
-            monthly_total = db.session.query(func.sum(Transaction.amount)).filter(
-                Transaction.user_id == user_id,
-                extract('month', Transaction.date) == check_month,
-                extract('year', Transaction.date) == check_year
-            ).scalar() or 0
-            three_months_avg += monthly_total
+                periods.append((year, month - i))
+        
+        totals = RollupService.totals_for_months(user_id, periods)
+        current_total = totals[(year, month)]
+        
+        # Calculate average spending last 3 months
+        three_months_avg = sum(totals[period] for period in periods[1:])
         
         three_months_avg = three_months_avg / 3
         
@@ -378,32 +340,173 @@ class TransactionServices:
 
 class ExcelService:
 
+    HEADINGS = ["Sr No", "Date", "Transaction Title", "Amount", "Category", "Sub Category", "Payment Method"]
+    EXPORT_DIR = '.exports'  # Under SHEETS_ROOT
+    EXPORT_FORMAT_VERSION = '1'  # Bump when the export layout changes to invalidate cached files
+    EXPORT_BATCH_SIZE = 1000
+
+    @staticmethod
+    def _export_rows(user_id, month, year):
+        """Stream the month's transactions as plain tuples, never materialising ORM objects"""
+        from models.transactions import Transaction
+        query = db.select(
+            Transaction.id, Transaction.date, Transaction.title, Transaction.amount,
+            Transaction.category, Transaction.sub_category, Transaction.payment_method
+        ).where(
+            Transaction.user_id == user_id,
+            Transaction.in_period(*get_month_range(year, month))
+        ).order_by(Transaction.date, Transaction.id).execution_options(yield_per=ExcelService.EXPORT_BATCH_SIZE)
+        return db.session.execute(query)
+
+    @staticmethod
+    def export_fingerprint(user_id, month, year):
+        """Return (content hash, row count) of the rows a month export is built from"""
+        digest = hashlib.sha256(ExcelService.EXPORT_FORMAT_VERSION.encode())
+        count = 0
+        for row in ExcelService._export_rows(user_id, month, year):
+            digest.update(repr(tuple(row)).encode())
+            count += 1
+        return digest.hexdigest()[:16], count
+
+    @staticmethod
+    def export_month(user, month, year):
+        """Return the path of an .xlsx export of one month, built straight from the database.
+
+        Files are cached by the content hash of their rows, so downloading an
+        unchanged month again skips regeneration.
+        """
+        sheet_name = f"{datetime(year, month, 1).strftime('%B')}_{year}"
+        export_dir = sheet_storage.path(ExcelService.EXPORT_DIR, str(user.id))
+        fingerprint, row_count = ExcelService.export_fingerprint(user.id, month, year)
+        file_path = os.path.join(export_dir, f'{sheet_name}-{fingerprint}.xlsx')
+
+        if os.path.exists(file_path):
+            logging.debug(f"Export cache hit: {file_path}")
+            return file_path
+
+        with sheet_storage.lock(file_path):
+            if os.path.exists(file_path):
+                return file_path
+            os.makedirs(export_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix='.', suffix='.xlsx.tmp', dir=export_dir)
+            os.close(fd)
+            try:
+                ExcelService._write_export(tmp_path, sheet_name, ExcelService._export_rows(user.id, month, year), row_count)
+                os.replace(tmp_path, file_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+        # Drop exports of this month built from older data
+        for old_file in os.listdir(export_dir):
+            if old_file.startswith(f'{sheet_name}-') and old_file.endswith('.xlsx') and old_file != os.path.basename(file_path):
+                try:
+                    os.remove(os.path.join(export_dir, old_file))
+                except FileNotFoundError:
+                    pass
+
+        logging.debug(f"Export built: {file_path}")
+        return file_path
+
+    @staticmethod
+    def _write_export(file_path, sheet_name, rows, row_count):
+        """Write the SpreadSheet.apply_template layout in write-only mode, one row at a time"""
+        # openpyxl is only imported by the paths that touch a workbook, to keep startup light
+        import openpyxl
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Alignment
+        from openpyxl.utils import get_column_letter
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        headings = ExcelService.HEADINGS
+        center = Alignment(horizontal='center', vertical='center')
+
+        def centered(value):
+            cell = WriteOnlyCell(sheet, value=value)
+            cell.alignment = center
+            return cell
+
+        # Merged title, "Total Amount" header and SUM cell, as in apply_template
+        sheet.merged_cells.add(f'A1:{get_column_letter(len(headings))}1')
+        total_col = get_column_letter(len(headings) + 1)
+        total_end_col = get_column_letter(len(headings) + 2)
+        sheet.merged_cells.add(f'{total_col}1:{total_end_col}2')
+        sheet.merged_cells.add(f'{total_col}3:{total_end_col}4')
+        for col_num, heading in enumerate(headings, 1):
+            sheet.column_dimensions[get_column_letter(col_num)].width = len(heading) + 2
+
+        # Write-only sheets are emitted top to bottom, so the SUM range is sized from the row count
+        last_row = max(4, 3 + row_count)
+
+        sheet.append([centered(sheet_name)] + [None] * (len(headings) - 1) + [centered("Total Amount")])
+        sheet.append([])
+        sheet.append([centered(h) for h in headings] + [centered(f"=SUM(D4:D{last_row})")])
+
+        for sr_no, row in enumerate(rows, 1):
+            _, tx_date, title, amount, category, sub_category, payment_method = row
+            sheet.append([
+                centered(sr_no),
+                centered(tx_date.strftime('%Y-%m-%d')),
+                centered(title),
+                centered(float(amount)),
+                centered(category),
+                centered(sub_category),
+                centered(payment_method),
+            ])
+
+        workbook.save(file_path)
+
     @staticmethod
     def append_transaction_data(file_path, transaction_data):
+        ExcelService.apply_operations(file_path, [('append', transaction_data)])
+
+    @staticmethod
+    def update_transaction_data(file_path, transaction_data):
+        ExcelService.apply_operations(file_path, [('update', transaction_data)])
+
+    @staticmethod
+    def delete_transaction_data(file_path, transaction_id):
+        ExcelService.apply_operations(file_path, [('delete', {'transaction_id': transaction_id})])
+
+    @staticmethod
+    def sheet_path_for(user_name, tx_date):
+        """Path of the month sheet a transaction dated ``tx_date`` belongs to"""
+        return sheet_storage.sheet_path(user_name, f"{tx_date.strftime('%B')}_{tx_date.strftime('%Y')}")
+
+    @staticmethod
+    def apply_operations(file_path, operations, strict=True):
+        """Apply a batch of ('append' | 'append_many' | 'update' | 'delete', data) operations with one load and one save.
+
+        With ``strict=False`` an operation that fails (e.g. a row that is no longer
+        in the sheet) is logged and skipped instead of aborting the whole batch.
+        """
+        with sheet_storage.lock(file_path):
+            ExcelService._apply_operations(file_path, operations, strict)
+
+    @staticmethod
+    def _apply_operations(file_path, operations, strict):
+        import openpyxl
+        from openpyxl.styles import Alignment
         # Load the workbook and select the active sheet
         workbook = openpyxl.load_workbook(file_path)
         sheet = workbook.active
 
-        # Find the last row with data (excluding the sum row)
-        last_row = 3  # Start after headers
-        for row in range(4, sheet.max_row + 1):
-            if sheet.cell(row=row, column=1).value is not None:
-                last_row = row
-
-        # Calculate the next Sr No
-        next_sr_no = 1 if last_row == 3 else sheet.cell(row=last_row, column=1).value + 1
-
-        # Append the transaction data to the sheet
-        new_row = [
-            next_sr_no,
-            transaction_data['date'],
-            transaction_data['title'],
-            float(transaction_data['amount']),
-            transaction_data['category'],
-            transaction_data['sub_category'],
-            transaction_data['payment_method'],
-        ]
-        sheet.append(new_row)
+        for action, data in operations:
+            try:
+                if action == 'append':
+                    ExcelService._append_row(sheet, data)
+                elif action == 'append_many':
+                    ExcelService._append_rows(sheet, data)
+                elif action == 'update':
+                    ExcelService._update_row(sheet, data)
+                elif action == 'delete':
+                    ExcelService._delete_row(sheet, data)
+                else:
+                    raise ValueError(f"Unknown Excel operation: {action}")
+            except ValueError as e:
+                if strict:
+                    raise
+                logging.error(f"Skipping Excel {action} on {file_path}: {e}")
 
         # Update the sum formula
         max_row = sheet.max_row
@@ -411,27 +514,65 @@ class ExcelService:
         amount_column = 'D'  # Assuming "Amount" is in column D
         sheet.cell(row=3, column=headings + 1, value=f"=SUM({amount_column}4:{amount_column}{max_row})").alignment = Alignment(horizontal='center', vertical='center')
 
-        # Center-align all cells in the new row
-        for cell in sheet[sheet.max_row]:
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-
         # Save the workbook
-        workbook.save(file_path)
-        logging.debug(f"Transaction data appended to the Excel sheet with Sr No: {next_sr_no}")
+        sheet_storage.save_workbook(workbook, file_path)
 
     @staticmethod
-    def update_transaction_data(file_path, transaction_data):
-        # Load the workbook and select the active sheet
-        workbook = openpyxl.load_workbook(file_path)
-        sheet = workbook.active
-
-        # Find row by transaction_id (Sr No)
-        row_num = None
+    def _find_row(sheet, transaction_data):
+        """Find a data row by Sr No (transaction_id) or, for DB-driven edits, by its old values"""
+        match = transaction_data.get('match')
         for row in range(4, sheet.max_row + 1):  # Start from row 4 (data starts after header)
-            if str(sheet.cell(row=row, column=1).value) == str(transaction_data['transaction_id']):
-                row_num = row
-                break
+            if match is None:
+                if str(sheet.cell(row=row, column=1).value) == str(transaction_data['transaction_id']):
+                    return row
+            elif (str(sheet.cell(row=row, column=2).value)[:10] == str(match['date'])
+                    and sheet.cell(row=row, column=3).value == match['title']
+                    and sheet.cell(row=row, column=4).value is not None
+                    and float(sheet.cell(row=row, column=4).value) == float(match['amount'])):
+                return row
+        return None
+
+    @staticmethod
+    def _append_row(sheet, transaction_data):
+        ExcelService._append_rows(sheet, [transaction_data])
+
+    @staticmethod
+    def _append_rows(sheet, rows):
+        """Append transactions after the last data row, numbering them on from its Sr No"""
+        from openpyxl.styles import Alignment
+        # Find the last row with data (excluding the sum row), once for the whole batch
+        last_row = 3  # Start after headers
+        for row in range(4, sheet.max_row + 1):
+            if sheet.cell(row=row, column=1).value is not None:
+                last_row = row
+
+        # Calculate the next Sr No
+        next_sr_no = 1 if last_row == 3 else sheet.cell(row=last_row, column=1).value + 1
+
+        alignment = Alignment(horizontal='center', vertical='center')
+        for offset, transaction_data in enumerate(rows):
+            # Append the transaction data to the sheet
+            new_row = [
+                next_sr_no + offset,
+                transaction_data['date'],
+                transaction_data['title'],
+                float(transaction_data['amount']),
+                transaction_data['category'],
+                transaction_data['sub_category'],
+                transaction_data['payment_method'],
+            ]
+            sheet.append(new_row)
+
+            # Center-align all cells in the new row
+            for cell in sheet[sheet.max_row]:
+                cell.alignment = alignment
+
+        logging.debug(f"Appended {len(rows)} transaction(s) to the Excel sheet from Sr No: {next_sr_no}")
 
+    @staticmethod
+    def _update_row(sheet, transaction_data):
+        from openpyxl.styles import Alignment
+        row_num = ExcelService._find_row(sheet, transaction_data)
         if row_num is None:
             raise ValueError("Transaction not found")
 
@@ -447,23 +588,19 @@ class ExcelService:
         for cell in sheet[row_num]:
             cell.alignment = Alignment(horizontal='center', vertical='center')
 
-        # Save the workbook
-        workbook.save(file_path)
-
     @staticmethod
-    def delete_transaction_data(file_path, transaction_id):
-        # Load the workbook and select the active sheet
-        workbook = openpyxl.load_workbook(file_path)
-        sheet = workbook.active
+    def _delete_row(sheet, transaction_data):
+        from openpyxl.styles import Alignment
+        row_num = ExcelService._find_row(sheet, transaction_data)
+        if row_num is None:
+            logging.warning(f"Excel row not found for delete: {transaction_data}")
+            return
 
         # Find all non-empty rows and their data
         valid_rows = []
         for row in range(4, sheet.max_row + 1):
             # Check if row has actual data (not just empty cells)
-            if any(sheet.cell(row=row, column=col).value for col in range(2, 8)):
-                sr_no = sheet.cell(row=row, column=1).value
-                if str(sr_no) == str(transaction_id):
-                    continue  # Skip the row to be deleted
+            if row != row_num and any(sheet.cell(row=row, column=col).value for col in range(2, 8)):
                 row_data = [sheet.cell(row=row, column=col).value for col in range(1, 8)]
                 valid_rows.append(row_data)
 
@@ -479,12 +616,3 @@ class ExcelService:
             # Center-align all cells in the row
             for cell in sheet[sheet.max_row]:
                 cell.alignment = Alignment(horizontal='center', vertical='center')
-
-        # Update the sum formula
-        max_row = sheet.max_row
-        headings = 7
-        amount_column = 'D'
-        sheet.cell(row=3, column=headings + 1, value=f"=SUM({amount_column}4:{amount_column}{max_row})").alignment = Alignment(horizontal='center', vertical='center')
-
-        # Save the workbook
-        workbook.save(file_path)
\ No newline at end of file
@@ -0,0 +1,50 @@
+from models import db
+from models.users import User
+from services.cache import ResultCache
+import os
+
+class UserCache:
+    """Identity cache behind ``login_manager.user_loader``.
+
+    The loader runs on every authenticated request. A hit merges a cached,
+    detached ``User`` into the request's session with ``merge(load=False)``,
+    which costs no SQL; the deferred ``all_sheets`` column is only fetched by
+    the few paths that read it. Entries live ``USER_CACHE_TTL`` seconds and
+    are dropped by ``invalidate`` when a profile is updated or deleted; other
+    workers see such a change once their entry expires.
+    """
+
+    def __init__(self, max_entries=4096, ttl=60):
+        self._cache = ResultCache(max_entries=max_entries, ttl=ttl)
+
+    def init_app(self, app):
+        app.config.setdefault('USER_CACHE_MAX_ENTRIES', self._cache.max_entries)
+        app.config.setdefault('USER_CACHE_TTL', int(os.getenv('USER_CACHE_TTL', str(self._cache.ttl))))
+        self._cache.max_entries = app.config['USER_CACHE_MAX_ENTRIES']
+        self._cache.ttl = app.config['USER_CACHE_TTL']
+        app.extensions['user_cache'] = self
+
+    def load(self, user_id):
+        """The user with ``user_id``, attached to the current session, or None"""
+        key = (user_id, 'user', None)
+        hit, cached = self._cache.get(key)
+        if not hit:
+            cached = db.session.get(User, user_id)
+            if cached is None:
+                return None
+            # Keep a clean detached copy; the request gets its own instance below
+            db.session.expunge(cached)
+            self._cache.set(key, cached)
+        return db.session.merge(cached, load=False)
+
+    def invalidate(self, user_id=None):
+        if user_id is None:
+            self._cache.clear()
+        else:
+            self._cache.invalidate(user_id)
+
+    def stats(self):
+        return self._cache.stats()
+
+
+user_cache = UserCache()
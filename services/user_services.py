@@ -1,4 +1,6 @@
 from models.users import User,db
+from services.user_cache import user_cache
+from services.password_hasher import password_hasher
 
 class UserService:
 
@@ -32,14 +34,36 @@ class UserService:
             user.last_name = last_name
 
         user.update()
+        user_cache.invalidate(user_id)
         return user
     
+    @staticmethod
+    def authenticate(user_name, password):
+        """Return the user when ``password`` is right, else None.
+
+        Unknown usernames are rejected without hashing anything. A hash made
+        with an older ``PASSWORD_HASH_METHOD`` is replaced on success.
+        Raises ``HasherBusy`` when the hashing pool is saturated.
+        """
+        user = User.get_by_user_name(user_name)
+        if not user:
+            return None
+
+        old_hash = user.password
+        if not password_hasher.verify_and_update(user, password):
+            return None
+        if user.password != old_hash:
+            user.update()
+            user_cache.invalidate(user.id)
+        return user
+
     @staticmethod
     def delete_user(user_id):
         user = User.get_by_id(user_id)
 
         if user:
             user.delete()
+            user_cache.invalidate(user_id)
             return True
 
         return False
@@ -0,0 +1,37 @@
+"""Shared fixtures: a fully configured app on a throwaway SQLite file and sheets root."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from models import db
+from models.users import User
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'SHEETS_ROOT': str(tmp_path / 'Sheets'),
+        'RECURRING_SCHEDULER_ENABLED': False,
+        'EMAIL_QUEUE_AUTOSTART': False,
+        'SCHEMA_AUTO_CREATE': True,
+        'DB_OPTIMIZE_INTERVAL': 0,
+        'TESTING': True,
+        'WTF_CSRF_ENABLED': False,
+    })
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def user(app):
+    user = User('Test', 'User', 'tester', 'secret', 'tester@example.com')
+    db.session.add(user)
+    db.session.commit()
+    return user
@@ -0,0 +1,211 @@
+"""AnalyticsEngine.compute must return exactly what the original per-metric queries did.
+
+The reference below is a frozen copy of the per-metric queries from before the
+rollups and the engine existed, reading ``transactions`` directly, so it shares
+no code or data source with the path under test. Anomalies were redefined by
+AnomalyService, so they are checked separately: the frame-based detection in
+``compute_from_frame`` against the rollup-based ``AnomalyService.detect``, and
+both against hand-computed totals.
+"""
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import extract, func
+
+from models import db
+from models.transactions import Transaction
+from services.analytics_engine import AnalyticsEngine
+from services.anomaly_service import AnomalyService
+from services.rollup_service import RollupService
+
+TODAY = date(2025, 3, 17)
+KEYS = {'monthly_trend', 'category_growth', 'average_transaction', 'daily_average',
+        'weekly_pattern', 'highest_spending_day', 'anomalies', 'savings_rate'}
+
+
+# Frozen reference: the original per-metric queries, with ``now`` passed in
+
+def month_filter(user_id, month, year):
+    return (Transaction.user_id == user_id,
+            extract('month', Transaction.date) == month,
+            extract('year', Transaction.date) == year)
+
+
+def month_sum(user_id, month, year):
+    return db.session.query(func.sum(Transaction.amount)).filter(*month_filter(user_id, month, year)).scalar() or 0
+
+
+def reference_analytics(user_id, today):
+    current_month, current_year = today.month, today.year
+    current_month_txs = Transaction.query.filter(*month_filter(user_id, current_month, current_year)).all()
+    return {
+        'monthly_trend': reference_monthly_trend(user_id, current_year),
+        'category_growth': reference_category_growth(user_id, today),
+        'average_transaction': reference_average_transaction(current_month_txs),
+        'daily_average': reference_daily_average(user_id, current_month, current_year),
+        'weekly_pattern': reference_weekly_pattern(current_month_txs),
+        'highest_spending_day': reference_highest_spending_day(current_month_txs),
+        'savings_rate': reference_savings_rate(user_id, current_month, current_year),
+    }
+
+
+def reference_monthly_trend(user_id, current_year):
+    return {datetime(current_year, month, 1).strftime('%b'): float(month_sum(user_id, month, current_year))
+            for month in range(1, 13)}
+
+
+def reference_category_growth(user_id, today):
+    current_month, current_year = today.month, today.year
+    if current_month == 1:
+        last_month, last_year = 12, current_year - 1
+    else:
+        last_month, last_year = current_month - 1, current_year
+
+    def by_category(month, year):
+        return {cat: float(amt) for cat, amt in db.session.query(Transaction.category, func.sum(Transaction.amount))
+                .filter(*month_filter(user_id, month, year)).group_by(Transaction.category).all()}
+
+    current_dict = by_category(current_month, current_year)
+    last_dict = by_category(last_month, last_year)
+    growth = {}
+    for category in set(current_dict) | set(last_dict):
+        current_amt = current_dict.get(category, 0)
+        last_amt = last_dict.get(category, 0)
+        if last_amt == 0:
+            growth[category] = 100 if current_amt > 0 else 0
+        else:
+            growth[category] = round(((current_amt - last_amt) / last_amt) * 100, 1)
+    return growth
+
+
+def reference_average_transaction(transactions):
+    if not transactions:
+        return 0
+    return round(sum(tx.amount for tx in transactions) / len(transactions), 2)
+
+
+def reference_daily_average(user_id, month, year):
+    total = month_sum(user_id, month, year)
+    next_month_start = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    days_in_month = (next_month_start - date(year, month, 1)).days
+    return round(float(total) / days_in_month, 2)
+
+
+def reference_weekly_pattern(transactions):
+    if not transactions:
+        return {}
+    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    daily_totals = {day: 0 for day in days}
+    daily_counts = {day: 0 for day in days}
+    for tx in transactions:
+        day_name = days[tx.date.weekday()]
+        daily_totals[day_name] += tx.amount
+        daily_counts[day_name] += 1
+    return {day: round(daily_totals[day] / daily_counts[day], 2) if daily_counts[day] > 0 else 0 for day in days}
+
+
+def reference_highest_spending_day(transactions):
+    if not transactions:
+        return None
+    daily_totals = {}
+    for tx in transactions:
+        day = tx.date.strftime('%Y-%m-%d')
+        daily_totals[day] = daily_totals.get(day, 0) + tx.amount
+    highest_day = max(daily_totals, key=daily_totals.get)
+    return {'date': highest_day, 'amount': round(daily_totals[highest_day], 2)}
+
+
+def reference_savings_rate(user_id, month, year):
+    current_total = month_sum(user_id, month, year)
+    three_months_avg = 0
+    for i in range(1, 4):
+        if month - i <= 0:
+            three_months_avg += month_sum(user_id, 12 + month - i, year - 1)
+        else:
+            three_months_avg += month_sum(user_id, month - i, year)
+    three_months_avg = three_months_avg / 3
+
+    if three_months_avg == 0:
+        savings_comparison = "N/A"
+    else:
+        diff = ((current_total - three_months_avg) / three_months_avg) * 100
+        if diff < 0:
+            savings_comparison = f"↓ {abs(round(diff, 1))}% (Good!)"
+        else:
+            savings_comparison = f"↑ {round(diff, 1)}%"
+    return {
+        'current_month': round(float(current_total), 2),
+        'three_month_avg': round(three_months_avg, 2),
+        'trend': savings_comparison
+    }
+
+
+# Fixtures
+
+def add(user, day, amount, category, sub_category='', payment_method='UPI'):
+    tx = Transaction(user_id=user.id, date=day, title=f"{category} {amount}", amount=amount,
+                     category=category, sub_category=sub_category, payment_method=payment_method,
+                     created_at=datetime.utcnow())
+    db.session.add(tx)
+    db.session.flush()
+    RollupService.record_insert(tx)
+
+
+def seed_history(user, today):
+    # Amounts are multiples of 0.25, so sums are exact whichever order they're added in
+    month_start = today.replace(day=1)
+    for day_offset in range(today.day):
+        day = month_start + timedelta(days=day_offset)
+        add(user, day, 120.25 + day_offset, 'Food', 'Cafe')
+        if day_offset % 3 == 0:
+            add(user, day, 40.5, 'Travel', 'Metro', 'Cash')
+    add(user, today, 9000.0, 'Shopping', 'Electronics', 'Credit Card')
+
+    # Six earlier months, for growth, savings and the anomaly baseline
+    for months_back in range(1, 7):
+        first = (month_start - timedelta(days=28 * months_back)).replace(day=1)
+        for offset in (0, 5, 12, 20):
+            add(user, first + timedelta(days=offset), 150.75 + months_back, 'Food', 'Groceries')
+            add(user, first + timedelta(days=offset), 60.25, 'Travel', 'Metro', 'Cash')
+        add(user, first + timedelta(days=3), 1200.0, 'Bills', 'Electricity Bill')
+    db.session.commit()
+
+
+def test_compute_matches_reference_queries(user):
+    seed_history(user, TODAY)
+
+    engine = AnalyticsEngine.compute(user.id, TODAY)
+    reference = reference_analytics(user.id, TODAY)
+
+    assert set(engine) == KEYS
+    for key in reference:
+        assert type(engine[key]) is type(reference[key]), key
+        assert engine[key] == reference[key], key
+
+    # The reference must have had data to compare
+    assert reference['average_transaction'] > 0
+    assert reference['highest_spending_day'] == {'date': '2025-03-17', 'amount': 9000.0 + 136.25}
+    assert set(reference['category_growth']) == {'Food', 'Travel', 'Bills', 'Shopping'}
+
+
+def test_anomalies_from_the_frame_match_the_rollups(user):
+    seed_history(user, TODAY)
+
+    start, end = AnalyticsEngine.window_for(TODAY)
+    from_frame = AnalyticsEngine.compute_from_frame(AnalyticsEngine.load_frame(user.id, start, end), TODAY)
+    from_rollups = AnomalyService.detect(user.id, TODAY.month, TODAY.year)
+
+    assert from_frame['anomalies'] == from_rollups
+    # Food this month is 17 * 120.25 + (0 + ... + 16); its six months of history average 4 * 154.25
+    assert [(a['category'], a['current'], a['historical_avg'], a['history_months']) for a in from_rollups] == [
+        ('Food', 2180.25, 617.0, 6)]
+
+
+def test_empty_history_matches_reference(user):
+    engine = AnalyticsEngine.compute(user.id, TODAY)
+    reference = reference_analytics(user.id, TODAY)
+
+    assert set(engine) == KEYS
+    assert {key: engine[key] for key in reference} == reference
+    assert engine['anomalies'] == []
+    assert engine['weekly_pattern'] == {}
+    assert engine['highest_spending_day'] is None
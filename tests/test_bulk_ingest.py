@@ -0,0 +1,40 @@
+"""POST /api/transactions/bulk, with and without INSERT ... RETURNING."""
+from datetime import date
+
+import pytest
+
+from models import db
+from models.transactions import Transaction
+from services.rollup_service import RollupService
+
+
+@pytest.fixture(params=[True, False], ids=['returning', 'row-by-row'])
+def client(request, app, user, monkeypatch):
+    # Without RETURNING (MySQL) the ids come from one insert per row
+    monkeypatch.setattr(db.engine.dialect, 'insert_returning', request.param)
+    client = app.test_client()
+    client.post('/login', data={'username': 'tester', 'password': 'secret'})
+    return client
+
+
+def test_bulk_inserts_valid_rows_in_date_order(client, user):
+    today = date.today().isoformat()
+    response = client.post('/api/transactions/bulk', json=[
+        {'date': today, 'title': 'Lunch', 'amount': 250, 'category': 'Food'},
+        {'date': '2025-01-02', 'title': 'Metro', 'amount': 40, 'category': 'Travel'},
+        {'date': 'yesterday', 'title': 'Bad', 'amount': 10, 'category': 'Food'},
+    ])
+    assert response.status_code == 207
+    body = response.get_json()
+    assert body['inserted'] == 2
+    assert body['errors'] == [{'index': 2, 'errors': ['date must be YYYY-MM-DD']}]
+
+    ids = {entry['index']: entry['id'] for entry in body['ids']}
+    assert [entry['index'] for entry in body['ids']] == [1, 0]
+    assert db.session.get(Transaction, ids[0]).title == 'Lunch'
+    assert db.session.get(Transaction, ids[1]).title == 'Metro'
+    assert RollupService.category_spent(user.id, 2025, 1, 'Travel') == 40.0
+
+
+def test_bulk_rejects_non_list(client):
+    assert client.post('/api/transactions/bulk', json={'title': 'x'}).status_code == 400
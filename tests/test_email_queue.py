@@ -0,0 +1,82 @@
+"""The email queue against local_smtp_server.py in stand-in mode (LOCAL_SMTP_FORWARD=0)."""
+import time
+from datetime import date, datetime
+
+import pytest
+
+import config
+from models import db
+from models.email_jobs import EmailJob
+from services.email_queue import email_queue
+
+
+@pytest.fixture
+def smtp_server(app, monkeypatch):
+    monkeypatch.setenv('LOCAL_SMTP_FORWARD', '0')
+    monkeypatch.setenv('LOCAL_SMTP_HOST', '127.0.0.1')
+    monkeypatch.setenv('LOCAL_SMTP_PORT', '1025')
+    monkeypatch.setattr(config, 'SMTP_HOST', '127.0.0.1')
+    monkeypatch.setattr(config, 'SMTP_PORT', 1025)
+    monkeypatch.setattr(config, 'SMTP_USE_TLS', False)
+    monkeypatch.setattr(config, 'SMTP_USERNAME', '')
+    monkeypatch.setattr(config, 'SMTP_PASSWORD', '')
+    app.config.update(EMAIL_WORKERS=1, EMAIL_POLL_SECONDS=0.05, EMAIL_RETRY_BASE_SECONDS=0.5, EMAIL_MAX_ATTEMPTS=5)
+
+    from local_smtp_server import start_server
+    servers = []
+    yield lambda: servers.append(start_server()) or servers[-1]
+    email_queue.stop()
+    for server in servers:
+        server.stop()
+
+
+def wait_for(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        db.session.expire_all()
+        result = predicate()
+        if result:
+            return result
+        time.sleep(0.05)
+    raise AssertionError("timed out")
+
+
+def test_worker_reuses_one_session(smtp_server, user):
+    server = smtp_server()
+    job_ids = [email_queue.enqueue(user.email_id, f"Report {i}", "body", user_id=user.id) for i in range(3)]
+
+    wait_for(lambda: all(db.session.get(EmailJob, job_id).status == EmailJob.SENT for job_id in job_ids))
+    assert sorted(msg['Subject'] for msg in server.handler.accepted) == ["Report 0", "Report 1", "Report 2"]
+    assert [session.connections_opened for session in email_queue.sessions] == [1]
+
+
+def test_failed_send_is_retried_with_backoff(smtp_server, user):
+    job_id = email_queue.enqueue(user.email_id, "Report", "body", user_id=user.id)
+
+    # Nothing listens on the port yet, so the first attempt fails and is rescheduled
+    job = wait_for(lambda: (lambda job: job if job.last_error else None)(db.session.get(EmailJob, job_id)))
+    failed_at = datetime.utcnow()
+    assert (job.status, job.attempts) == (EmailJob.QUEUED, 1)
+    assert 0 < (job.next_attempt_at - failed_at).total_seconds() <= 0.5
+
+    server = smtp_server()
+    job = wait_for(lambda: (lambda job: job if job.status == EmailJob.SENT else None)(db.session.get(EmailJob, job_id)))
+    assert job.attempts >= 2 and job.last_error is None
+    assert [msg['Subject'] for msg in server.handler.accepted] == ["Report"]
+
+
+def test_download_email_can_be_polled_until_sent(app, smtp_server, user):
+    smtp_server()
+    client = app.test_client()
+    client.post('/login', data={'username': 'tester', 'password': 'secret'})
+    today = date.today()
+
+    response = client.post('/download', data={'month': today.strftime('%B'), 'year': today.year,
+                                              'action': 'send_to_email'})
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+
+    status = wait_for(lambda: (lambda body: body if body['status'] == EmailJob.SENT else None)(
+        client.get(f'/email_status/{job_id}').get_json()))
+    assert status['attempts'] == 1 and status['sent_at']
+    assert client.get(f'/email_status/{job_id + 1}').status_code == 404
@@ -0,0 +1,46 @@
+"""The Excel write-behind queue: sheets picked when a write is queued, and one bounded exit hook."""
+import atexit
+from datetime import date
+
+import openpyxl
+
+from models.spreadsheets import SpreadSheet
+from services.excel_queue import ExcelWriteQueue
+from services.transaction_services import ExcelService
+
+
+def titles(path):
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    try:
+        return [cell for row in workbook.active.iter_rows(values_only=True) for cell in row if cell]
+    finally:
+        workbook.close()
+
+
+def test_sheet_follows_the_transaction_date(app, user):
+    queue = app.extensions['excel_queue']
+    today = date.today()
+    last_month = date(today.year - 1, 12, 1) if today.month == 1 else date(today.year, today.month - 1, 1)
+    old_path = ExcelService.sheet_path_for(user.user_name, last_month)
+    SpreadSheet(f"{last_month:%B}_{last_month.year}", user).create_templated_sheet(old_path)
+
+    row = {'title': 'Queued at month end', 'amount': 5, 'category': 'Food', 'sub_category': '', 'payment_method': 'UPI'}
+    queue.enqueue(user.id, 'append', dict(row, date=last_month.strftime('%Y-%m-%d')))
+    queue.enqueue(user.id, 'append', dict(row, title='Queued today', date=today.strftime('%Y-%m-%d')))
+    assert queue.flush(timeout=10)
+
+    assert 'Queued at month end' in titles(old_path)
+    assert 'Queued today' not in titles(old_path)
+    current = titles(user.current_sheet_path)
+    assert 'Queued today' in current and 'Queued at month end' not in current
+
+
+def test_exit_hook_is_registered_once_with_a_timeout(app, monkeypatch):
+    hooks = []
+    monkeypatch.setattr(atexit, 'register', lambda fn, *args: hooks.append((fn, args)))
+    monkeypatch.setitem(app.extensions, 'excel_queue', app.extensions['excel_queue'])
+    queue = ExcelWriteQueue()
+    queue.init_app(app)
+    queue.init_app(app)
+
+    assert hooks == [(queue.flush, (ExcelWriteQueue.SHUTDOWN_TIMEOUT,))]
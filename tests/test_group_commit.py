@@ -0,0 +1,78 @@
+"""Quick-card taps through the group-commit writer: one row per idempotency key, with or without RETURNING."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db
+from models.budget_recurring import QuickCard
+from models.idempotency import IdempotencyKey
+from models.transactions import Transaction
+
+
+@pytest.fixture(params=[(True, True), (True, False), (False, False)],
+                ids=['group-returning', 'group-row-by-row', 'per-write-row-by-row'])
+def client(request, app, user, monkeypatch):
+    enabled, returning = request.param
+    writer = app.extensions['group_commit']
+    monkeypatch.setattr(writer, 'enabled', enabled)
+    monkeypatch.setattr(db.engine.dialect, 'insert_returning', returning)
+    client = app.test_client()
+    client.post('/login', data={'username': 'tester', 'password': 'secret'})
+    yield client
+    writer.stop()
+
+
+@pytest.fixture
+def card(user):
+    card = QuickCard(user_id=user.id, title='Coffee', amount=120, category='Food',
+                     sub_category='Cafe', payment_method='UPI')
+    db.session.add(card)
+    db.session.commit()
+    return card
+
+
+def test_repeated_key_returns_first_transaction(client, card, user):
+    url = f'/api/quick_cards/{card.id}/log'
+    first = client.post(url, headers={'Idempotency-Key': 'tap-1'})
+    again = client.post(url, headers={'Idempotency-Key': 'tap-1'})
+    other = client.post(url, headers={'Idempotency-Key': 'tap-2'})
+
+    assert first.status_code == 201 and first.get_json()['duplicate'] is False
+    assert again.status_code == 200 and again.get_json() == {'id': first.get_json()['id'], 'duplicate': True}
+    assert other.status_code == 201 and other.get_json()['id'] != first.get_json()['id']
+    db.session.expire_all()
+    assert Transaction.query.filter_by(user_id=user.id, title='Coffee').count() == 2
+
+
+def test_sweep_from_a_caller_leaves_its_session_alone(app, user):
+    writer = app.extensions['group_commit']
+    db.session.add(IdempotencyKey(user_id=user.id, key='old', result=[1],
+                                  created_at=datetime.utcnow() - timedelta(seconds=writer.ttl + 60)))
+    db.session.commit()
+
+    pending = QuickCard(user_id=user.id, title='Tea', amount=30, category='Food')
+    db.session.add(pending)
+    writer._last_sweep = 0
+    writer._sweep_apart()
+
+    assert pending in db.session.new
+    with db.session.no_autoflush:
+        assert IdempotencyKey.query.filter_by(key='old').count() == 0
+    db.session.rollback()
+    assert QuickCard.query.count() == 0
+
+
+def test_writer_thread_sql_is_counted_as_group_commit(app, user, card, monkeypatch):
+    from services.metrics import metrics
+    writer = app.extensions['group_commit']
+    monkeypatch.setattr(writer, 'enabled', True)
+    statements = metrics.background_sql_statements_total
+    before = statements._values[('group_commit',)]
+    client = app.test_client()
+    client.post('/login', data={'username': 'tester', 'password': 'secret'})
+
+    assert client.post(f'/api/quick_cards/{card.id}/log').status_code == 201
+    writer.stop()
+
+    assert statements._values[('group_commit',)] > before
+    assert 'background_sql_statements_total{operation="group_commit"}' in metrics.render()
@@ -0,0 +1,148 @@
+"""InsightsEngine: pure computations on hand-built arrays, budget pro-rating and period ranges."""
+from datetime import date
+
+import numpy as np
+import pytest
+
+from models import db
+from models.budget_recurring import Budget
+from models.get_dates import get_span_range
+from services.insights_engine import InsightsEngine
+
+MARCH = (date(2025, 3, 1), date(2025, 4, 1))
+PREV_START = date(2025, 2, 1)
+
+
+def columns(rows):
+    """``(ordinals, amounts, categories)`` from ``[(date, amount, category)]``"""
+    return (np.array([day.toordinal() for day, _, _ in rows], dtype=np.int64),
+            np.array([amount for _, amount, _ in rows], dtype=np.float64),
+            np.array([category for _, _, category in rows], dtype=object))
+
+
+ROWS = [
+    # March
+    (date(2025, 3, 1), 100.0, 'Food'),
+    (date(2025, 3, 2), 50.0, 'Food'),
+    (date(2025, 3, 2), 30.0, 'Travel'),
+    (date(2025, 3, 10), 400.0, 'Bills'),
+    (date(2025, 3, 15), 20.0, 'Shopping'),
+    # February
+    (date(2025, 2, 5), 75.0, 'Food'),
+    (date(2025, 2, 6), 60.0, 'Travel'),
+    (date(2025, 2, 10), 400.0, 'Bills'),
+    # Outside both periods
+    (date(2025, 1, 31), 999.0, 'Food'),
+    (date(2025, 4, 1), 999.0, 'Food'),
+]
+
+
+def compute(today, budgets=None, rows=ROWS):
+    return InsightsEngine.compute(*columns(rows), *MARCH, PREV_START, budgets, today)
+
+
+def test_totals_and_categories():
+    result = compute(date(2025, 3, 15))
+    assert result['spendings_data'] == {'Bills': 400.0, 'Food': 150.0, 'Travel': 30.0, 'Shopping': 20.0}
+    assert result['total_spendings'] == 600.0
+    assert result['transaction_count'] == 5
+    assert result['top_category'] == 'Bills'
+
+    insights = result['insights']
+    assert insights['top_3_categories'] == [('Bills', 400.0), ('Food', 150.0), ('Travel', 30.0)]
+    assert insights['bottom_3_categories'] == [('Food', 150.0), ('Travel', 30.0), ('Shopping', 20.0)]
+    assert insights['prev_period_spending'] == 535.0
+    assert insights['spending_change'] == 65.0
+    assert insights['spending_change_percent'] == 12.1
+    assert insights['spending_trend'] == 'up'
+
+
+def test_category_changes_largest_move_first():
+    changes = compute(date(2025, 3, 15))['insights']['category_changes']
+    # Shopping has no previous spending, so it isn't compared
+    assert [(c['category'], c['change'], c['change_percent'], c['trend']) for c in changes] == [
+        ('Food', 75.0, 100.0, 'up'),
+        ('Travel', -30.0, -50.0, 'down'),
+        ('Bills', 0.0, 0.0, 'down'),
+    ]
+    assert changes[0]['current'] == 150.0 and changes[0]['previous'] == 75.0
+
+
+def test_daily_extremes_over_days_with_spending():
+    insights = compute(date(2025, 3, 15))['insights']
+    assert insights['highest_spending_day'] == ('10 Mar', 400.0)
+    assert insights['lowest_spending_day'] == ('15 Mar', 20.0)
+
+    empty = compute(date(2025, 3, 15), rows=ROWS[5:])
+    assert 'highest_spending_day' not in empty['insights']
+    assert empty['total_spendings'] == 0
+    assert empty['daily_average'] == 0
+    assert empty['top_category'] is None
+
+
+def test_daily_average_over_elapsed_days():
+    # An ongoing period is averaged over the days so far, today included
+    assert compute(date(2025, 3, 15))['daily_average'] == 40.0
+    # A finished period, or one that hasn't started, uses its full length
+    assert compute(date(2025, 5, 1))['daily_average'] == round(600 / 31, 2)
+    assert compute(date(2025, 2, 20))['daily_average'] == round(600 / 31, 2)
+
+
+def test_budget_alerts_and_recommendations():
+    insights = compute(date(2025, 3, 15), budgets={'Food': 100.0, 'Bills': 500.0})['insights']
+    assert insights['budget_alerts'] == [{
+        'category': 'Food', 'limit': 100.0, 'spent': 150.0,
+        'overspend': 50.0, 'overspend_percent': 50.0, 'status': 'alert',
+    }]
+    assert insights['total_budget'] == 600.0
+    assert insights['budget_utilization'] == 100.0
+    # Up 12.1%, one budget exceeded, and 10 Mar is over three times the daily average
+    assert [r['type'] for r in insights['recommendations']] == ['warning', 'alert', 'info']
+
+
+def test_load_budgets_pro_rates_week_and_quarter(user):
+    for month, amount in ((2, 280.0), (3, 310.0), (4, 300.0)):
+        db.session.add(Budget(user_id=user.id, category='Food', amount=amount, month=month, year=2025))
+    db.session.add(Budget(user_id=user.id, category='Bills', amount=620.0, month=3, year=2025))
+    db.session.commit()
+
+    # ISO week 9 of 2025 is Mon 24 Feb - Sun 2 Mar: 5/28 of February plus 2/31 of March
+    week = InsightsEngine.period_range('week', 2025, week=9)
+    assert week == (date(2025, 2, 24), date(2025, 3, 3))
+    assert InsightsEngine.load_budgets(user.id, *week) == {'Food': 70.0, 'Bills': 40.0}
+
+    # A week inside March gets 7/31 of it
+    assert InsightsEngine.load_budgets(user.id, *InsightsEngine.period_range('week', 2025, week=11)) == {
+        'Food': 70.0, 'Bills': 140.0}
+
+    # A quarter counts each of its months in full
+    q1 = InsightsEngine.period_range('quarter', 2025, month=2)
+    assert q1 == (date(2025, 1, 1), date(2025, 4, 1))
+    assert InsightsEngine.load_budgets(user.id, *q1) == {'Food': 590.0, 'Bills': 620.0}
+    assert InsightsEngine.load_budgets(user.id, *InsightsEngine.period_range('quarter', 2025, month=4)) == {
+        'Food': 300.0}
+
+
+def test_period_ranges_at_week_and_year_boundaries():
+    # 2020 has 53 ISO weeks; its last one runs into 2021
+    assert InsightsEngine.period_range('week', 2020, week=53) == (date(2020, 12, 28), date(2021, 1, 4))
+    assert get_span_range('week', date(2021, 1, 3)) == (date(2020, 12, 28), date(2021, 1, 4))
+    # 30 Dec 2024 is in week 1 of 2025
+    assert get_span_range('week', date(2024, 12, 30)) == (date(2024, 12, 30), date(2025, 1, 6))
+    assert InsightsEngine.period_range('week', 2025, week=1) == (date(2024, 12, 30), date(2025, 1, 6))
+
+    assert InsightsEngine.period_range('month', 2024, month=12) == (date(2024, 12, 1), date(2025, 1, 1))
+    assert InsightsEngine.period_range('quarter', 2025, month=11) == (date(2025, 10, 1), date(2026, 1, 1))
+    assert InsightsEngine.period_range('year', 2024) == (date(2024, 1, 1), date(2025, 1, 1))
+    assert get_span_range('year', date(2024, 12, 31)) == (date(2024, 1, 1), date(2025, 1, 1))
+
+    # The previous period steps back across the year boundary
+    assert InsightsEngine.previous_range('week', date(2024, 12, 30)) == (date(2024, 12, 23), date(2024, 12, 30))
+    assert InsightsEngine.previous_range('month', date(2025, 1, 1)) == (date(2024, 12, 1), date(2025, 1, 1))
+    assert InsightsEngine.previous_range('quarter', date(2025, 1, 1)) == (date(2024, 10, 1), date(2025, 1, 1))
+    assert InsightsEngine.previous_range('year', date(2025, 1, 1)) == (date(2024, 1, 1), date(2025, 1, 1))
+
+    with pytest.raises(ValueError):
+        InsightsEngine.period_range('fortnight', 2025, month=1)
+    with pytest.raises(ValueError):
+        get_span_range('fortnight', date(2025, 1, 1))
@@ -0,0 +1,48 @@
+"""Migrating month sheets: blank optional cells and a re-run of the same file."""
+import os
+from datetime import date
+
+import openpyxl
+from sqlalchemy import func
+
+from migrate_to_db import COLUMN_MAPPING, HEADER_ROW, migrate_data
+from models import db
+from models.rollups import SpendingRollup
+from models.transactions import Transaction
+
+
+def write_sheet(path, rows):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for column, heading in enumerate(COLUMN_MAPPING, 1):
+        sheet.cell(row=HEADER_ROW, column=column, value=heading)
+    for row_number, row in enumerate(rows, HEADER_ROW + 1):
+        for column, value in enumerate(row, 1):
+            sheet.cell(row=row_number, column=column, value=value)
+    workbook.save(path)
+
+
+def test_blank_cells_migrate_and_a_rerun_inserts_nothing(app, user, tmp_path):
+    sheets_dir = tmp_path / 'Import'
+    os.makedirs(sheets_dir / user.user_name, exist_ok=True)
+    write_sheet(sheets_dir / user.user_name / 'March_2025.xlsx', [
+        ['2025-03-01', 'Coffee', 120, 'Food', None, None],
+        ['2025-03-02', 'Bus', 40, 'Travel', 'Local', ''],
+        ['2025-03-02', 'Bus', 40, 'Travel', 'Local', ''],
+        [None, 'Undated', 10, 'Food', 'Cafe', 'UPI'],
+    ])
+    checkpoint = str(tmp_path / 'checkpoint.json')
+
+    def migrate():
+        migrate_data(sheets_dir=str(sheets_dir), workers=1, checkpoint_path=checkpoint, resume=False, app=app)
+        db.session.expire_all()
+        return db.session.query(func.count(Transaction.id)).scalar()
+
+    assert migrate() == 3
+    blank = Transaction.query.filter_by(title='Coffee').one()
+    assert blank.date == date(2025, 3, 1)
+    rollup = SpendingRollup.query.filter_by(user_id=user.id, category='Food').one()
+    assert (rollup.sub_category, rollup.payment_method, rollup.count) == ('', '', 1)
+
+    assert migrate() == 3
+    assert sum(rollup.count for rollup in SpendingRollup.query.all()) == 3
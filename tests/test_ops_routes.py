@@ -0,0 +1,24 @@
+"""/metrics and /cache_stats are only served locally or with OPS_TOKEN; probes stay open."""
+REMOTE = {'REMOTE_ADDR': '203.0.113.7'}
+
+
+def test_ops_endpoints_local_only_without_token(app, user):
+    client = app.test_client()
+    assert client.get('/cache_stats').status_code == 200
+    assert client.get('/metrics').status_code == 200
+
+    # Signed in is not enough from elsewhere
+    client.post('/login', data={'username': 'tester', 'password': 'secret'}, environ_base=REMOTE)
+    assert client.get('/cache_stats', environ_base=REMOTE).status_code == 403
+    assert client.get('/metrics', environ_base=REMOTE).status_code == 403
+    assert client.get('/healthz', environ_base=REMOTE).status_code == 200
+
+
+def test_ops_endpoints_with_token(app):
+    app.config['OPS_TOKEN'] = 'sekrit'
+    client = app.test_client()
+    assert client.get('/cache_stats').status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}, environ_base=REMOTE).status_code == 403
+    response = client.get('/cache_stats', headers={'Authorization': 'Bearer sekrit'}, environ_base=REMOTE)
+    assert response.status_code == 200
+    assert 'hits' in response.get_json()
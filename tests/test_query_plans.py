@@ -0,0 +1,39 @@
+"""The per-month queries must range-search the composite indexes added for them."""
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert
+
+from models import db
+from models.transactions import Transaction
+from services.db_engine import db_engine
+from upgrade_db import plan_uses_index, query_plan_failures
+
+
+def test_plan_match_is_exact():
+    plan = ['SEARCH transactions USING INDEX ix_transactions_user_date_amount (user_id=? AND date>? AND date<?)']
+    assert not plan_uses_index(plan, ['ix_transactions_user_date'])
+    assert plan_uses_index(plan, ['ix_transactions_user_date_amount'])
+    assert not plan_uses_index(plan, ['ix_transactions_user_date_amount'], covering=True)
+
+    covering = ['SEARCH transactions USING COVERING INDEX ix_transactions_user_date_amount (user_id=? AND date>?)']
+    assert plan_uses_index(covering, ['ix_transactions_user_date_amount'], covering=True)
+    assert not plan_uses_index(['SCAN transactions USING INDEX ix_transactions_user_date'],
+                               ['ix_transactions_user_date'])
+
+
+def test_month_queries_use_indexes(user):
+    # A year of history for a few users, so ANALYZE gives the planner realistic statistics
+    today = date.today()
+    rows = [
+        {'user_id': user_id, 'date': today - timedelta(days=day), 'title': f"Item {n}",
+         'amount': 10.0 + n, 'category': ('Food', 'Travel', 'Bills')[n % 3],
+         'sub_category': '', 'payment_method': 'UPI', 'created_at': datetime.utcnow()}
+        for user_id in (user.id, user.id + 1, user.id + 2)
+        for day in range(365)
+        for n in range(3)
+    ]
+    db.session.execute(insert(Transaction), rows)
+    db.session.commit()
+    db_engine.optimize(analyze=True)
+
+    assert query_plan_failures(user.id) == []
@@ -0,0 +1,59 @@
+"""Recurring items are logged on their scheduled days, never before they were created."""
+from datetime import date, datetime
+
+from models.budget_recurring import RecurringTransaction
+from models.transactions import Transaction
+from services.recurring_scheduler import RecurringScheduler
+
+
+def item(day_of_month, created_at, last_logged=None):
+    return RecurringTransaction(user_id=1, title='Rent', amount=100.0, category='Rent',
+                                day_of_month=day_of_month, created_at=created_at, last_logged=last_logged)
+
+
+def test_passed_day_is_logged_on_the_creation_date():
+    rtx = item(5, datetime(2025, 3, 20, 9, 0))
+    assert RecurringScheduler.due_dates(rtx, date(2025, 3, 20)) == [date(2025, 3, 20)]
+    assert RecurringScheduler.due_dates(rtx, date(2025, 4, 5)) == [date(2025, 3, 20), date(2025, 4, 5)]
+    rtx.last_logged = date(2025, 3, 20)
+    assert RecurringScheduler.due_dates(rtx, date(2025, 4, 4)) == []
+    assert RecurringScheduler.due_dates(rtx, date(2025, 4, 5)) == [date(2025, 4, 5)]
+
+
+def test_due_in_creation_month():
+    rtx = item(5, datetime(2025, 3, 5, 9, 0))
+    assert RecurringScheduler.due_dates(rtx, date(2025, 3, 5)) == [date(2025, 3, 5)]
+    assert RecurringScheduler.due_dates(item(25, datetime(2025, 3, 20)), date(2025, 3, 24)) == []
+
+
+def test_catches_up_after_last_logged():
+    rtx = item(31, datetime(2024, 11, 2), last_logged=date(2024, 12, 31))
+    assert RecurringScheduler.due_dates(rtx, date(2025, 3, 1)) == [date(2025, 1, 31), date(2025, 2, 28)]
+
+
+def test_creating_a_due_item_logs_it_at_once(app, user):
+    client = app.test_client()
+    client.post('/login', data={'username': 'tester', 'password': 'secret'})
+    today = date.today()
+
+    response = client.post('/recurring', data={'title': 'Gym', 'amount': '50', 'category': 'Health',
+                                                'sub_category': '', 'payment_method': 'UPI',
+                                                'day_of_month': str(today.day)})
+    assert response.status_code == 302
+
+    logged = Transaction.query.filter_by(user_id=user.id, title='[Recurring] Gym').all()
+    assert [tx.date for tx in logged] == [today]
+    # A second sweep has nothing left to log
+    assert RecurringScheduler.sweep(user_id=user.id) == 0
+
+
+def test_creating_an_item_whose_day_has_passed_logs_it_today(app, user):
+    client = app.test_client()
+    client.post('/login', data={'username': 'tester', 'password': 'secret'})
+    today = date.today()
+
+    client.post('/recurring', data={'title': 'Rent', 'amount': '900', 'category': 'Rent',
+                                     'sub_category': '', 'payment_method': 'UPI', 'day_of_month': '1'})
+
+    logged = Transaction.query.filter_by(user_id=user.id, title='[Recurring] Rent').all()
+    assert [tx.date for tx in logged] == [today]
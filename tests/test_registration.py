@@ -0,0 +1,32 @@
+"""Registration answers 503, not 500, while the password hashing pool is saturated."""
+import pytest
+
+from models.users import User
+from services.password_hasher import HasherBusy, password_hasher
+
+
+@pytest.fixture
+def busy_hasher(monkeypatch):
+    def busy(password):
+        raise HasherBusy("hash: too many password hashes pending")
+    monkeypatch.setattr(password_hasher, 'hash', busy)
+
+
+def test_register_form_returns_503(app, busy_hasher):
+    response = app.test_client().post('/register', data={
+        'first_name': 'New', 'last_name': 'User', 'user_name': 'newbie', 'email_id': 'new@example.com',
+        'password': 'secret', 'confirm_password': 'secret'})
+
+    assert response.status_code == 503
+    assert b'please try again in a moment' in response.data
+    assert User.query.filter_by(user_name='newbie').first() is None
+
+
+def test_create_user_api_returns_503(app, busy_hasher):
+    response = app.test_client().post('/user/create', json={
+        'first_name': 'New', 'last_name': 'User', 'user_name': 'newbie', 'email_id': 'new@example.com',
+        'password': 'secret'})
+
+    assert response.status_code == 503
+    assert 'error' in response.get_json()
+    assert User.query.filter_by(user_name='newbie').first() is None
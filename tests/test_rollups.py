@@ -0,0 +1,71 @@
+"""Rollup buckets and category counters stay exact under concurrent first writes."""
+import threading
+from datetime import date, datetime
+
+from models import db
+from models.rollups import CategorySpend, SpendingRollup
+from models.transactions import Transaction
+from services.db_engine import db_engine
+from services.rollup_service import RollupService
+
+
+def rows(model):
+    return sorted(tuple(row.to_dict().values()) for row in model.query.all())
+
+
+def test_concurrent_first_writes_keep_every_increment(app, user):
+    errors = []
+
+    def tap(amount):
+        with app.app_context():
+            def save():
+                tx = Transaction(user_id=user.id, date=date(2025, 3, 1 + amount % 3), title='Coffee',
+                                 amount=float(amount), category='Food', sub_category='Cafe',
+                                 payment_method='UPI', created_at=datetime.utcnow())
+                db.session.add(tx)
+                db.session.flush()
+                RollupService.record_insert(tx)
+                db.session.commit()
+            try:
+                db_engine.write(save)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=tap, args=(amount,)) for amount in range(1, 33)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    bucket = SpendingRollup.query.filter_by(user_id=user.id, year=2025, month=3, category='Food').one()
+    assert (bucket.total, bucket.count, bucket.min_amount, bucket.max_amount) == (528.0, 32, 1.0, 32.0)
+    assert RollupService.category_spent(user.id, 2025, 3, 'Food') == 528.0
+
+
+def test_incremental_updates_match_rebuild(user):
+    txs = [Transaction(user_id=user.id, date=date(2025, month, 10), title=f"T{n}", amount=float(n),
+                       category=('Food', 'Travel')[n % 2], sub_category='', payment_method=('UPI', 'Cash')[n % 3 == 0],
+                       created_at=datetime.utcnow())
+           for n in range(1, 21) for month in (1, 2)]
+    db.session.add_all(txs)
+    db.session.flush()
+    RollupService.apply_many([RollupService.snapshot(tx) for tx in txs])
+    db.session.commit()
+
+    # Remove the extremes of some buckets, then move one transaction to another bucket
+    for tx in txs[:4] + txs[-4:]:
+        snapshot = RollupService.snapshot(tx)
+        db.session.delete(tx)
+        RollupService.remove_many([snapshot])
+    moved = txs[10]
+    before = RollupService.snapshot(moved)
+    moved.category, moved.date = 'Bills', date(2025, 3, 1)
+    RollupService.record_update(before, moved)
+    db.session.commit()
+
+    incremental = (rows(SpendingRollup), rows(CategorySpend))
+    RollupService.rebuild(user.id)
+    assert (rows(SpendingRollup), rows(CategorySpend)) == incremental
@@ -0,0 +1,71 @@
+"""The period search box matches title substrings; the all-months search uses the FTS index."""
+from datetime import date, datetime
+
+from models import db
+from models.transactions import Transaction
+from services.search_service import SearchService
+from services.transaction_services import TransactionServices
+from models.get_dates import get_month_range
+
+
+def add(user, title, category, day=None):
+    db.session.add(Transaction(user_id=user.id, date=day or date.today(), title=title, amount=10.0,
+                               category=category, sub_category='', payment_method='UPI',
+                               created_at=datetime.utcnow()))
+
+
+def titles(user, search):
+    start, end = get_month_range(date.today().year, date.today().month)
+    rows, _ = TransactionServices.page_transactions(user.id, start, end, search=search)
+    return sorted(row['title'] for row in rows)
+
+
+def test_period_search_is_title_substring(user):
+    add(user, 'Uber to office', 'Travel')
+    add(user, 'Groceries', 'Food')
+    add(user, 'Cafe 100% arabica', 'Food')
+    db.session.commit()
+
+    assert titles(user, 'ber') == ['Uber to office']
+    # A category name is not a title match
+    assert titles(user, 'food') == []
+    assert titles(user, 'GROC') == ['Groceries']
+    assert titles(user, '') == ['Cafe 100% arabica', 'Groceries', 'Uber to office']
+
+
+def test_all_months_search_uses_index(user):
+    assert SearchService.is_available()
+    add(user, 'Uber to office', 'Travel', date(2020, 1, 5))
+    add(user, 'Groceries', 'Food')
+    db.session.commit()
+
+    assert [row['title'] for row in SearchService.search(user.id, 'ub')] == ['Uber to office']
+    assert [row['title'] for row in SearchService.search(user.id, 'food')] == ['Groceries']
+
+
+def test_availability_is_per_engine(app, tmp_path):
+    from app import create_app
+    assert SearchService.is_available()
+
+    other = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'bare.db'}",
+                        'SHEETS_ROOT': str(tmp_path / 'OtherSheets'), 'DB_OPTIMIZE_INTERVAL': 0})
+    with other.app_context():
+        assert not SearchService.is_available()
+        db.engine.dispose()
+    assert SearchService.is_available()
+
+
+def test_rebuild_script_indexes_a_new_index_once(app, user, monkeypatch):
+    import rebuild_search_index
+    db.session.execute(db.text(f"DROP TABLE {SearchService.TABLE}"))
+    db.session.commit()
+    SearchService._available.clear()
+    monkeypatch.setattr(rebuild_search_index, 'create_app', lambda: app)
+    calls = []
+    rebuild = SearchService.rebuild
+    monkeypatch.setattr(SearchService, 'rebuild', staticmethod(lambda: calls.append(1) or rebuild()))
+
+    rebuild_search_index.rebuild_search_index()
+    assert len(calls) == 1
+    rebuild_search_index.rebuild_search_index()
+    assert len(calls) == 2
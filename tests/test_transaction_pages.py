@@ -0,0 +1,38 @@
+"""Cursors for /api/transactions: round trips, and a 400 (never a 500) for bad ones."""
+import base64
+import json
+from datetime import date
+
+import pytest
+
+from services.transaction_services import TransactionServices
+
+
+def cursor(*parts):
+    return base64.urlsafe_b64encode(json.dumps(list(parts)).encode()).decode().rstrip('=')
+
+
+def test_decode_round_trip():
+    assert TransactionServices.decode_cursor(cursor('date_desc', '2025-03-04', 7), 'date_desc') == (date(2025, 3, 4), 7)
+    assert TransactionServices.decode_cursor(cursor('amount_asc', 12.5, 3), 'amount_asc') == (12.5, 3)
+
+
+@pytest.mark.parametrize('bad, sort_by', [
+    ('not-base64!', 'date_desc'),
+    (cursor('date_desc', 123, 7), 'date_desc'),
+    (cursor('date_desc', '2025-13-01', 7), 'date_desc'),
+    (cursor('date_desc', '2025-03-04', [1]), 'date_desc'),
+    (cursor('amount_asc', None, 3), 'amount_asc'),
+    (cursor('amount_asc', 12.5, 3), 'date_desc'),
+])
+def test_decode_rejects_bad_cursors(bad, sort_by):
+    with pytest.raises(ValueError):
+        TransactionServices.decode_cursor(bad, sort_by)
+
+
+def test_api_returns_400_for_wrongly_typed_cursor(app, user):
+    client = app.test_client()
+    client.post('/login', data={'username': 'tester', 'password': 'secret'})
+    response = client.get('/api/transactions', query_string={'cursor': cursor('date_desc', 123, 7)})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid cursor'}
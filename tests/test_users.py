@@ -0,0 +1,21 @@
+"""Renaming a user moves their sheet directory and repoints all_sheets at it."""
+import os
+
+from models import db
+from models.users import User
+from services.sheet_storage import sheet_storage
+
+
+def test_rename_rebuilds_sheet_paths_when_the_name_is_also_in_the_root(app):
+    # The sheets root ends in .../Sheets, so a user called Sheets appears twice in every path
+    user = User('Old', 'Name', 'Sheets', 'secret', 'sheets@example.com')
+    db.session.add(user)
+    db.session.commit()
+    assert user.all_sheets
+
+    user.update_user_dir_name('Sheets', 'renamed')
+    db.session.expire_all()
+
+    for sheet_name, path in user.all_sheets.items():
+        assert path == sheet_storage.sheet_path('renamed', sheet_name)
+        assert os.path.isfile(path)
@@ -0,0 +1,114 @@
+import argparse
+import re
+from datetime import date
+from sqlalchemy import text
+from app import create_app
+from models.users import db
+from models.transactions import Transaction
+from models.get_dates import get_month_range
+from services.search_service import SearchService
+from services.db_engine import db_engine
+
+def upgrade_schema(verbose=True):
+    """Create a new database or bring an existing one up to date with the models.
+
+    The app no longer does this on boot, so run it on deploy. ``db.create_all()``
+    only creates missing tables, so indexes added to tables that already exist
+    in an older ``site.db`` are created here.
+    """
+    db.create_all()
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+            if verbose:
+                print(f"Index ready: {index.name}")
+    # FTS5 index and sync triggers for transaction search
+    if SearchService.ensure_index() and verbose:
+        print(f"Index ready: {SearchService.TABLE}")
+
+def precompile_templates(app):
+    """Compile every template into the Jinja bytecode cache. Returns how many were compiled."""
+    names = app.jinja_env.list_templates(extensions=['html'])
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+def explain(query):
+    """Return the EXPLAIN QUERY PLAN detail lines for an ORM query (SQLite only)."""
+    statement = query.statement.compile(db.engine, compile_kwargs={"literal_binds": True})
+    rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {statement}")).fetchall()
+    return [row[-1] for row in rows]
+
+def plan_uses_index(plan, index_names, covering=False):
+    """True if ``plan`` range-searches ``transactions`` with one of ``index_names`` (exact names)."""
+    pattern = re.compile(
+        r'\bSEARCH transactions USING {}INDEX ({})\b'.format(
+            'COVERING ' if covering else '(?:COVERING )?',
+            '|'.join(re.escape(name) for name in index_names)
+        )
+    )
+    return any(pattern.search(line) for line in plan)
+
+def query_plan_failures(user_id=1):
+    """Check the per-month filters against the indexes that can serve them.
+
+    Returns ``[(check, plan), ...]`` for every query whose plan doesn't
+    range-search one of its acceptable indexes; an empty list means all pass.
+    Any index with a ``(user_id, date)`` prefix serves a plain month filter,
+    while the month sum must be answered from a covering index.
+    """
+    start, end = get_month_range(date.today().year, date.today().month)
+    checks = {
+        'month rows': (
+            Transaction.query.filter(Transaction.user_id == user_id, Transaction.in_period(start, end)),
+            ('ix_transactions_user_date', 'ix_transactions_user_date_amount', 'ix_transactions_fingerprint'),
+            False
+        ),
+        'month rows by category': (
+            Transaction.query.filter(
+                Transaction.user_id == user_id,
+                Transaction.category == 'Food',
+                Transaction.in_period(start, end)
+            ),
+            ('ix_transactions_user_category_date',),
+            False
+        ),
+        'month sum': (
+            db.session.query(db.func.sum(Transaction.amount)).filter(
+                Transaction.user_id == user_id,
+                Transaction.in_period(start, end)
+            ),
+            ('ix_transactions_user_date_amount', 'ix_transactions_fingerprint'),
+            True
+        ),
+    }
+
+    failures = []
+    for name, (query, index_names, covering) in checks.items():
+        plan = explain(query)
+        if not plan_uses_index(plan, index_names, covering):
+            failures.append((name, plan))
+    return failures
+
+def check_query_plans():
+    """Exit non-zero if a per-month query isn't answered from its indexes."""
+    failures = query_plan_failures()
+    for name, plan in failures:
+        print(f"{name}: {' | '.join(plan)}")
+    if failures:
+        raise SystemExit(f"{len(failures)} per-month queries are not using their index")
+    print("Query plans use the date indexes")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create missing tables and indexes and precompile the templates")
+    parser.add_argument('--check-plans', action='store_true', help="Verify the query plans use the date indexes")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        upgrade_schema()
+        db_engine.optimize(analyze=True)
+        print("Planner statistics refreshed")
+        print(f"Precompiled {precompile_templates(app)} templates")
+        if args.check_plans:
+            check_query_plans()